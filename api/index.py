@@ -16,12 +16,32 @@ if str(project_root) not in sys.path:
 try:
     from fastapi import FastAPI, UploadFile, File, HTTPException
     from fastapi.middleware.cors import CORSMiddleware
-    from fastapi.responses import JSONResponse
+    from fastapi import Request
+    from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
+    from starlette.background import BackgroundTask
     import json
+    import time
+    import queue
+    import tempfile
+    import multiprocessing
+    import asyncio
     from typing import Optional
 
     from src.pdf_parser import PDFParser
     from src.checkers import CheckEngine, CheckStatus, Importance
+    from src.result_cache import ResultCache, hash_bytes
+    from src.jobs import Job, JobRunner, JobStore
+    from src.check_pool import (
+        CheckPool, PoolFullError, check_pdf_bytes, check_pdf_bytes_events, check_pdf_path,
+    )
+    from src.metrics import CONTENT_TYPE, MetricsRegistry
+    from src.timings import StageTimings
+    from src.memory import MemoryLimitExceeded
+    from src.ocr import OcrEngine
+    from src.results_store import STATUS_VALUES, CheckRecord, open_default_store
+    from src import analytics
+    from src import reports
+    from datetime import datetime
     
     # MangumはVercelデプロイ時のみ必要（ローカル実行時は不要）
     try:
@@ -54,21 +74,281 @@ app.add_middleware(
 # グローバル変数（初期化を遅延させる）
 pdf_parser = None
 check_engine = None
+result_cache = None
+
+def get_result_cache():
+    """結果キャッシュを取得（遅延初期化）"""
+    global result_cache
+    if result_cache is None:
+        result_cache = ResultCache()
+    return result_cache
 
 def get_parser():
     """PDFパーサーを取得（遅延初期化）"""
     global pdf_parser
     if pdf_parser is None:
-        pdf_parser = PDFParser()
+        pdf_parser = PDFParser(cache=get_result_cache(), memory_limit_mb=MEMORY_LIMIT_MB,
+                               ocr=OcrEngine.from_env(get_result_cache()))
     return pdf_parser
 
 def get_check_engine():
     """チェックエンジンを取得（遅延初期化）"""
     global check_engine
     if check_engine is None:
-        check_engine = CheckEngine()
+        check_engine = CheckEngine(cache=get_result_cache())
     return check_engine
 
+check_pool = None
+
+# 同時実行数の上限に達したときにクライアントへ返す再試行までの秒数
+RETRY_AFTER_SECONDS = int(os.environ.get('SOUKEN_RETRY_AFTER', '5'))
+
+# 解析1件あたりのRSSの上限（MB、0なら上限なし）
+MEMORY_LIMIT_MB = float(os.environ.get('SOUKEN_MEMORY_LIMIT_MB', '0')) or None
+
+def get_check_pool():
+    """解析・チェック用プロセスプールを取得（遅延初期化）"""
+    global check_pool
+    if check_pool is None:
+        workers = int(os.environ.get('SOUKEN_POOL_WORKERS', '0')) or None
+        max_in_flight = int(os.environ.get('SOUKEN_MAX_IN_FLIGHT', '0')) or None
+        cache_dir = get_result_cache().cache_dir
+        check_pool = CheckPool(workers=workers, max_in_flight=max_in_flight,
+                               cache_dir=str(cache_dir) if cache_dir else None,
+                               memory_limit_mb=MEMORY_LIMIT_MB)
+    return check_pool
+
+event_manager = None
+
+def get_event_manager():
+    """ワーカーからストリーミング用のイベントを受け取るキューの管理プロセス（遅延初期化）"""
+    global event_manager
+    if event_manager is None:
+        event_manager = multiprocessing.Manager()
+    return event_manager
+
+# ストリーミングでワーカーのイベントを待つ間隔（秒、この間隔でクライアントの切断を確認する）
+STREAM_POLL_SECONDS = 0.5
+
+result_store = None
+result_store_opened = False
+
+def get_result_store():
+    """チェック結果の保存先を取得（遅延初期化、SOUKEN_RESULTS_DB=noneならNone）"""
+    global result_store, result_store_opened
+    if not result_store_opened:
+        result_store = open_default_store()
+        result_store_opened = True
+    return result_store
+
+analytics_cache = None
+
+def get_analytics_cache():
+    """集計用の列データのキャッシュを取得（遅延初期化、結果の保存が無効ならNone）"""
+    global analytics_cache
+    if analytics_cache is None:
+        store = get_result_store()
+        if store is not None:
+            analytics_cache = analytics.ColumnCache(store)
+    return analytics_cache
+
+job_store = None
+job_runner = None
+
+def get_job_runner():
+    """ジョブストアとワーカーを取得（遅延初期化、初回に中断ジョブを再開）"""
+    global job_store, job_runner
+    if job_runner is None:
+        job_store = JobStore()
+        job_runner = JobRunner(job_store, process_job,
+                               workers=int(os.environ.get('SOUKEN_JOB_WORKERS', '2')))
+        job_runner.start()
+    return job_runner
+
+
+# Prometheusメトリクス（/metrics で出力）
+metrics = MetricsRegistry()
+REQUEST_LATENCY = metrics.histogram(
+    'souken_http_request_duration_seconds', 'HTTPリクエストの処理時間（秒）',
+    ['method', 'route', 'status']
+)
+STAGE_LATENCY = metrics.histogram(
+    'souken_stage_duration_seconds', '解析・チェックの段階ごとの処理時間（秒）', ['stage']
+)
+PAGE_LATENCY = metrics.histogram(
+    'souken_page_extraction_seconds', '1ページのテキスト抽出時間（秒）',
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+PAGES_PROCESSED = metrics.counter('souken_pages_processed_total', 'テキストを抽出したページ数')
+DOCUMENT_PEAK_MEMORY = metrics.histogram(
+    'souken_document_peak_memory_megabytes', '図面1件の解析中のピークRSS（MB、ワーカープロセス）',
+    buckets=(64, 128, 256, 512, 1024, 2048, 4096)
+)
+DOCUMENTS_CHECKED = metrics.counter('souken_documents_checked_total', 'チェックした図面数', ['status'])
+CACHE_LOOKUPS = metrics.counter(
+    'souken_cache_lookups_total', '結果キャッシュの参照回数', ['cache', 'result']
+)
+metrics.gauge(
+    'souken_pool_in_flight', '解析・チェック用プールで実行中・待機中の件数',
+    function=lambda: {(): check_pool.in_flight if check_pool else 0}
+)
+metrics.gauge(
+    'souken_jobs', 'ステータスごとのジョブ件数（queuedがジョブキューの深さ）', ['status'],
+    function=lambda: {(status,): count for status, count in job_store.count_by_status().items()}
+    if job_store else {}
+)
+
+
+def record_metrics(timings: StageTimings, summary: Optional[dict] = None) -> None:
+    """1文書分の処理時間・ページ数・キャッシュ参照をメトリクスに反映する"""
+    for stage, seconds in timings.stages.items():
+        STAGE_LATENCY.observe(seconds, stage=stage)
+    for seconds in timings.pages:
+        PAGE_LATENCY.observe(seconds)
+    PAGES_PROCESSED.inc(len(timings.pages))
+    if timings.memory.get('peak_mb') is not None:
+        DOCUMENT_PEAK_MEMORY.observe(timings.memory['peak_mb'])
+    for cache, result in timings.cache.items():
+        CACHE_LOOKUPS.inc(cache=cache, result=result)
+    if summary is not None:
+        DOCUMENTS_CHECKED.inc(status=summary['status'])
+
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """リクエストごとの処理時間をルート単位で記録する"""
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get('route')
+    REQUEST_LATENCY.observe(
+        time.perf_counter() - start,
+        method=request.method,
+        route=getattr(route, 'path', 'unmatched'),
+        status=str(response.status_code)
+    )
+    return response
+
+
+def format_result(result) -> dict:
+    """CheckResultをAPIレスポンス用の辞書に変換"""
+    return {
+        'category': result.category,
+        'item': result.item,
+        'status': result.status.value,
+        'message': result.message,
+        'importance': result.importance.value,
+        'page_number': result.page_number,
+        'location': list(result.location) if result.location else None,
+        'suggestion': result.suggestion
+    }
+
+
+def format_check_response(file_name: str, results, summary: dict) -> dict:
+    """チェック結果をAPIレスポンス用の辞書に変換"""
+    return {
+        'file_name': file_name,
+        'status': 'completed',
+        'summary': summary,
+        'results': [format_result(result) for result in results]
+    }
+
+
+def build_check_response(file_name: str, results, summary: dict, stage_timings: StageTimings,
+                         include_timings: bool) -> JSONResponse:
+    """
+    チェック結果のレスポンスを組み立て、処理時間をメトリクスに反映する
+    
+    Args:
+        include_timings: Trueの場合、段階ごとの処理時間を `timings` ブロックとして含める
+            （serializationはレスポンス辞書の組み立てまで）
+    """
+    with stage_timings.stage('serialization'):
+        payload = format_check_response(file_name, results, summary)
+    if include_timings:
+        payload['timings'] = stage_timings.to_dict()
+    start = time.perf_counter()
+    response = JSONResponse(payload)
+    stage_timings.add('serialization', time.perf_counter() - start)
+    record_metrics(stage_timings, summary)
+    return response
+
+
+def save_results(file_name: str, file_hash: Optional[str], results, summary: dict,
+                 project: Optional[str] = None, office: Optional[str] = None) -> None:
+    """チェック結果を保存する（保存に失敗してもチェック結果は返す）"""
+    store = get_result_store()
+    if store is None:
+        return
+    try:
+        store.save(CheckRecord(
+            file_name=file_name, results=results, summary=summary, file_hash=file_hash,
+            project=project, office=office, ruleset_version=get_check_engine().ruleset_version
+        ))
+    except Exception as e:
+        print(f"チェック結果の保存エラー: {e}", file=sys.stderr)
+
+
+async def stream_check_events(request: Request, future, events, cancel, content: bytes, file_name: str):
+    """
+    ページを抽出するたびに進捗と確定した指摘をイベントとして返す
+    
+    抽出・チェックはプロセスプールのワーカー（check_pdf_bytes_events）で行い、ワーカーが送る
+    ページごとの結果をイベントに変換する。クライアントが切断したらワーカーに中止を伝える
+    
+    Args:
+        request: 切断の確認に使うリクエスト
+        future: check_pdf_bytes_events を投入したFuture
+        events: ワーカーがページごとの結果を送るキュー
+        cancel: セットするとワーカーが解析をやめるイベント
+    
+    Yields:
+        dict: 'event'キーに start / page / finding / summary / error のいずれかを持つ辞書
+    """
+    # ワーカーのイベントはすべて完了前に送られるので、完了の印（None）が最後に届く
+    future.add_done_callback(lambda _: events.put(None))
+    try:
+        while True:
+            try:
+                item = await asyncio.to_thread(events.get, True, STREAM_POLL_SECONDS)
+            except queue.Empty:
+                if await request.is_disconnected():
+                    return
+                continue
+            if item is None:
+                break
+            page_number, num_pages, findings = item
+            if page_number == 1:
+                yield {'event': 'start', 'file_name': file_name, 'num_pages': num_pages, 'cached': False}
+            yield {'event': 'page', 'page_number': page_number, 'num_pages': num_pages}
+            PAGES_PROCESSED.inc()
+            for finding in findings:
+                yield {'event': 'finding', **format_result(finding)}
+        
+        try:
+            results, summary, _, num_pages = future.result()
+        except Exception as e:
+            print(f"Error in check_drawing_stream: {str(e)}", file=sys.stderr)
+            yield {'event': 'error', 'detail': str(e)}
+            return
+        if num_pages is None:
+            yield {'event': 'start', 'file_name': file_name, 'num_pages': None, 'cached': True}
+            for result in results:
+                yield {'event': 'finding', **format_result(result)}
+        await asyncio.to_thread(save_results, file_name, hash_bytes(content), results, summary)
+        yield {'event': 'summary', **format_check_response(file_name, results, summary)}
+    finally:
+        # 切断（ジェネレータの中断）を含め、途中で終わったらワーカーに中止を伝える
+        if not future.done():
+            cancel.set()
+
+
+def process_job(job: Job) -> dict:
+    """ジョブ1件をプロセスプールで解析・チェックする（空きができるまで待つ）"""
+    results, summary, timings, file_hash = get_check_pool().submit(check_pdf_path, job.pdf_path).result()
+    record_metrics(timings, summary)
+    save_results(job.file_name, file_hash, results, summary)
+    return format_check_response(job.file_name, results, summary)
+
 
 @app.get("/")
 async def root():
@@ -79,11 +359,21 @@ async def root():
         "endpoints": {
             "health": "/api/health",
             "check": "/api/v1/check",
-            "check_items": "/api/v1/check-items"
+            "check_stream": "/api/v1/check/stream",
+            "jobs": "/api/v1/jobs",
+            "check_items": "/api/v1/check-items",
+            "results": "/api/v1/results",
+            "metrics": "/metrics"
         }
     }
 
 
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus形式のメトリクス"""
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
+
+
 @app.get("/api/health")
 async def health_check():
     """ヘルスチェック"""
@@ -98,6 +388,10 @@ async def health_check():
             "modules": {
                 "pdf_parser": parser_status,
                 "check_engine": engine_status
+            },
+            "pool": {
+                "in_flight": check_pool.in_flight if check_pool else 0,
+                "max_in_flight": check_pool.max_in_flight if check_pool else None
             }
         }
     except Exception as e:
@@ -111,14 +405,21 @@ async def health_check():
 @app.post("/api/v1/check")
 async def check_drawing(
     file: UploadFile = File(...),
-    check_categories: Optional[str] = None
+    check_categories: Optional[str] = None,
+    timings: bool = False,
+    project: Optional[str] = None,
+    office: Optional[str] = None
 ):
     """
     図面をアップロードしてチェックを実行
     
     Args:
         file: アップロードされたPDFファイル
-        check_categories: チェックカテゴリ（カンマ区切り、例: "required,souken_specific"）
+        check_categories: チェックカテゴリ（カンマ区切り、例: "required,souken_specific"、省略時は全カテゴリ）。
+            表題欄だけで判定できるカテゴリのみなら、各ページの表題欄だけを抽出する
+        timings: Trueの場合、段階ごとの処理時間を `timings` ブロックとして返す
+        project: 保存するチェック結果に付ける案件名
+        office: 保存するチェック結果に付ける設計事務所
     
     Returns:
         チェック結果
@@ -131,47 +432,51 @@ async def check_drawing(
                 detail="PDFファイルのみ対応しています"
             )
         
-        # ファイルを一時的に保存
-        import tempfile
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-            content = await file.read()
-            tmp_file.write(content)
-            tmp_path = tmp_file.name
+        content = await file.read()
+        
+        engine = get_check_engine()
+        rules = None
+        if check_categories:
+            try:
+                rules = engine.ruleset.rule_ids(
+                    category.strip() for category in check_categories.split(',') if category.strip()
+                )
+            except KeyError as e:
+                raise HTTPException(status_code=400, detail=e.args[0])
         
+        # キャッシュ済みならプールを使わずに返す（一部のカテゴリだけの結果はキャッシュしない）
+        stage_timings = StageTimings()
+        with stage_timings.stage('hash'):
+            file_hash = hash_bytes(content)
+        cached = None
+        if rules is None:
+            cached = engine.cached_results(file_hash, get_parser().version)
+        if cached is not None:
+            stage_timings.cache['results'] = 'hit'
+            summary = engine.get_summary(cached, stage_timings)
+            await asyncio.to_thread(save_results, file.filename, file_hash, cached, summary, project, office)
+            return build_check_response(file.filename, cached, summary, stage_timings, timings)
+        
+        # PDF解析・チェックはプロセスプールで実行し、イベントループを塞がない
         try:
-            # PDF解析
-            parser = get_parser()
-            drawing_data = parser.parse(tmp_path)
-            
-            # チェック実行
-            engine = get_check_engine()
-            results = engine.check_all(drawing_data)
-            summary = engine.get_summary(results)
-            
-            # 結果をフォーマット
-            formatted_results = []
-            for result in results:
-                formatted_results.append({
-                    'category': result.category,
-                    'item': result.item,
-                    'status': result.status.value,
-                    'message': result.message,
-                    'importance': result.importance.value,
-                    'page_number': result.page_number,
-                    'suggestion': result.suggestion
-                })
-            
-            return JSONResponse({
-                'file_name': file.filename,
-                'status': 'completed',
-                'summary': summary,
-                'results': formatted_results
-            })
+            future = get_check_pool().try_submit(check_pdf_bytes, content, file.filename, rules)
+        except PoolFullError as e:
+            raise HTTPException(
+                status_code=503,
+                detail=f"混雑しています。しばらくしてから再試行してください（{e}）",
+                headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+            )
+        try:
+            results, summary, worker_timings = await asyncio.wrap_future(future)
+        except MemoryLimitExceeded as e:
+            raise HTTPException(
+                status_code=413,
+                detail=f"図面が大きすぎるため解析を中止しました（{e}）"
+            )
+        stage_timings.merge(worker_timings)
+        await asyncio.to_thread(save_results, file.filename, file_hash, results, summary, project, office)
         
-        finally:
-            # 一時ファイルを削除
-            if os.path.exists(tmp_path):
-                os.unlink(tmp_path)
+        return build_check_response(file.filename, results, summary, stage_timings, timings)
     
     except HTTPException:
         raise
@@ -185,34 +490,287 @@ async def check_drawing(
         )
 
 
+@app.post("/api/v1/check/stream")
+async def check_drawing_stream(
+    request: Request,
+    file: UploadFile = File(...),
+    format: str = "ndjson"
+):
+    """
+    図面をアップロードし、ページごとの進捗と指摘を逐次返す
+    
+    Args:
+        file: アップロードされたPDFファイル
+        format: "ndjson"（1行1イベント）または "sse"（Server-Sent Events）
+    
+    Returns:
+        start / page / finding / summary イベントのストリーム
+    """
+    if not file.filename.endswith('.pdf'):
+        raise HTTPException(
+            status_code=400,
+            detail="PDFファイルのみ対応しています"
+        )
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(
+            status_code=400,
+            detail="formatは ndjson または sse を指定してください"
+        )
+    
+    content = await file.read()
+    manager = get_event_manager()
+    events = manager.Queue()
+    cancel = manager.Event()
+    try:
+        # 送信済みのページを重複して送らないよう、ワーカーの異常終了時も再実行しない
+        future = get_check_pool().try_submit(check_pdf_bytes_events, content, file.filename, events, cancel,
+                                             retry=False)
+    except PoolFullError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"混雑しています。しばらくしてから再試行してください（{e}）",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+        )
+    
+    async def body():
+        stream = stream_check_events(request, future, events, cancel, content, file.filename)
+        try:
+            async for event in stream:
+                data = json.dumps(event, ensure_ascii=False)
+                if format == "sse":
+                    yield f"event: {event['event']}\ndata: {data}\n\n"
+                else:
+                    yield data + "\n"
+        finally:
+            await stream.aclose()
+    
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(body(), media_type=media_type)
+
+
+# アップロードをディスクへ書き出す単位
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+@app.post("/api/v1/jobs", status_code=202)
+async def create_job(file: UploadFile = File(...)):
+    """
+    図面チェックをジョブとして登録し、すぐにジョブIDを返す
+    
+    Args:
+        file: アップロードされたPDFファイル
+    
+    Returns:
+        ジョブIDと状態確認用URL
+    """
+    if not file.filename.endswith('.pdf'):
+        raise HTTPException(
+            status_code=400,
+            detail="PDFファイルのみ対応しています"
+        )
+    
+    runner = get_job_runner()
+    pdf_path = job_store.new_upload_path()
+    try:
+        # 大きなファイルもメモリに載せずに少しずつ書き出す
+        with open(pdf_path, 'wb') as out:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                out.write(chunk)
+    except Exception as e:
+        if os.path.exists(pdf_path):
+            os.unlink(pdf_path)
+        print(f"Error in create_job: {str(e)}\n{traceback.format_exc()}", file=sys.stderr)
+        raise HTTPException(
+            status_code=500,
+            detail=f"アップロードの保存に失敗しました: {str(e)}"
+        )
+    
+    job = job_store.create(file.filename, pdf_path)
+    runner.notify()
+    return {
+        'job_id': job.job_id,
+        'status': job.status,
+        'status_url': f"/api/v1/jobs/{job.job_id}"
+    }
+
+
+@app.get("/api/v1/jobs/{job_id}")
+async def get_job(job_id: str):
+    """ジョブの状態と（完了していれば）チェック結果を取得"""
+    get_job_runner()
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="ジョブが見つかりません")
+    return job.to_dict()
+
+
 @app.get("/api/v1/check-items")
 async def get_check_items():
-    """チェック項目一覧を取得"""
+    """チェック項目一覧を取得（ルール定義ファイルから生成）"""
+    engine = get_check_engine()
     return {
+        "version": engine.ruleset_version,
         "categories": [
             {
-                "name": "必須記載事項",
-                "items": [
-                    "図面番号",
-                    "図面名",
-                    "縮尺",
-                    "作成日",
-                    "作成者"
-                ]
-            },
-            {
-                "name": "創建特有項目",
-                "items": [
-                    "外断熱仕様",
-                    "第一種換気システム",
-                    "釘ピッチ",
-                    "隠蔽部分の施工方法"
-                ]
+                "id": category['id'],
+                "name": category['name'],
+                "items": [item['name'] for item in category['items']],
+                "rules": category['items']
             }
+            for category in engine.ruleset.items()
         ]
     }
 
 
+@app.get("/api/v1/results")
+async def get_results(
+    item: Optional[str] = None,
+    status: Optional[str] = None,
+    project: Optional[str] = None,
+    file_hash: Optional[str] = None,
+    office: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    limit: int = 1000
+):
+    """
+    保存済みのチェック結果を検索（条件はすべてAND、新しい順）
+    
+    Args:
+        item: チェック項目名（例: 釘ピッチ）
+        status: ステータス（OK / NG / WARNING）
+        project: 案件名
+        file_hash: PDFのSHA-256
+        office: 設計事務所
+        since: この日時以降（ISO 8601、例: 2026-07-01）
+        until: この日時より前（ISO 8601）
+        limit: 最大件数
+    """
+    store = get_result_store()
+    if store is None:
+        raise HTTPException(status_code=404, detail="チェック結果の保存は無効です（SOUKEN_RESULTS_DB）")
+    if status is not None and status not in STATUS_VALUES:
+        raise HTTPException(status_code=400, detail=f"status には {', '.join(STATUS_VALUES)} を指定してください")
+    try:
+        since_at = datetime.fromisoformat(since) if since else None
+        until_at = datetime.fromisoformat(until) if until else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="since / until はISO 8601形式で指定してください")
+    found = await asyncio.to_thread(store.find, item=item, status=status, project=project,
+                                    file_hash=file_hash, office=office, since=since_at, until=until_at,
+                                    limit=max(1, limit))
+    return {"count": len(found), "results": [result.to_dict() for result in found]}
+
+
+@app.get("/api/v1/analytics")
+async def get_analytics(
+    group_by: str = "office,item,month",
+    pivot: Optional[str] = None,
+    project: Optional[str] = None,
+    office: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None
+):
+    """
+    保存済みのチェック結果の集計（ダッシュボード用）
+    
+    Args:
+        group_by: 集計の単位（カンマ区切り、office / project / month / item）
+        pivot: NG件数のクロス集計の行と列（例: "item,month"）
+        project: 案件名で絞り込む
+        office: 設計事務所で絞り込む
+        since: この日時以降（ISO 8601、例: 2026-07-01）
+        until: この日時より前（ISO 8601）
+    """
+    if not analytics.NUMPY_AVAILABLE:
+        raise HTTPException(status_code=503, detail="集計にはNumPyが必要です")
+    cache = get_analytics_cache()
+    if cache is None:
+        raise HTTPException(status_code=404, detail="チェック結果の保存は無効です（SOUKEN_RESULTS_DB）")
+    keys = [key.strip() for key in group_by.split(',') if key.strip()]
+    pivot_keys = [key.strip() for key in pivot.split(',')] if pivot else None
+    if any(key not in analytics.GROUP_KEYS for key in keys + (pivot_keys or [])) \
+            or (pivot_keys is not None and len(pivot_keys) != 2):
+        raise HTTPException(
+            status_code=400,
+            detail=f"group_by / pivot には {', '.join(analytics.GROUP_KEYS)} を指定してください"
+        )
+    try:
+        since_at = datetime.fromisoformat(since) if since else None
+        until_at = datetime.fromisoformat(until) if until else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="since / until はISO 8601形式で指定してください")
+    
+    def build() -> dict:
+        columns = cache.columns(since=since_at, until=until_at, project=project, office=office)
+        payload = analytics.dashboard(columns, keys)
+        if pivot_keys:
+            payload['pivot'] = analytics.pivot(columns, *pivot_keys)
+        return payload
+    
+    return await asyncio.to_thread(build)
+
+
+@app.get("/api/v1/reports")
+async def get_report(
+    format: str = "xlsx",
+    month: Optional[str] = None,
+    project: Optional[str] = None,
+    office: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None
+):
+    """
+    保存済みのチェック結果の報告書（Excel / PDF）
+    
+    結果は1件ずつ一時ファイルへ書き出し、そのファイルを返す（件数によらずメモリに載せない）
+    
+    Args:
+        format: xlsx または pdf
+        month: 対象の月（例: 2026-09、since / until より優先）
+        project: 案件名で絞り込む
+        office: 設計事務所で絞り込む
+        since: この日時以降（ISO 8601、例: 2026-07-01）
+        until: この日時より前（ISO 8601）
+    """
+    if format not in reports.REPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="formatは xlsx または pdf を指定してください")
+    store = get_result_store()
+    if store is None:
+        raise HTTPException(status_code=404, detail="チェック結果の保存は無効です（SOUKEN_RESULTS_DB）")
+    try:
+        if month:
+            since_at, until_at = reports.month_range(month)
+        else:
+            since_at = datetime.fromisoformat(since) if since else None
+            until_at = datetime.fromisoformat(until) if until else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="month はYYYY-MM、since / until はISO 8601形式で指定してください")
+    title = reports.report_title(since_at, until_at, month)
+    
+    with tempfile.NamedTemporaryFile(suffix=f".{format}", delete=False) as f:
+        path = f.name
+    
+    def build() -> None:
+        records = store.iter_records(since=since_at, until=until_at, project=project, office=office)
+        reports.write_report(records, path, format, title)
+    
+    try:
+        await asyncio.to_thread(build)
+    except RuntimeError as e:
+        os.unlink(path)
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception:
+        os.unlink(path)
+        raise
+    file_name = f"report-{month}.{format}" if month else f"report.{format}"
+    return FileResponse(path, media_type=reports.MEDIA_TYPES[format], filename=file_name,
+                        background=BackgroundTask(os.unlink, path))
+
+
 # Vercel用のハンドラー（Vercelデプロイ時のみ使用）
 # Mangumを使用してASGIアプリケーションをAWS Lambda形式に変換
 # VercelのPython Serverless Functionsは、この形式を期待しています
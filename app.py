@@ -4,19 +4,342 @@
 """
 
 import streamlit as st
+import os
 import sys
+import time
+import io
+import queue
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import Future
 from pathlib import Path
-import tempfile
-import os
 from datetime import datetime
+from typing import Dict, List
 
 # プロジェクトルートをパスに追加
 project_root = Path(__file__).parent
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
-from src.pdf_parser import PDFParser
 from src.checkers import CheckEngine, CheckStatus, Importance
+from src.rule_registry import get_default_registry
+from src.result_cache import ResultCache, hash_bytes
+from src.check_pool import CheckPool, PoolFullError, check_pdf_bytes_progress
+from src.results_store import CheckRecord
+from src import reports
+
+# セッションに保持するチェック済みファイルの数（古いものから破棄、図面一式の30ファイル程度を2セット分）
+MAX_SESSION_CHECKS = 64
+
+# 進捗バーを更新する間隔（秒）
+PROGRESS_INTERVAL = 0.2
+
+# 全体ステータスのアイコン
+STATUS_ICONS = {'PASS': '🟢', 'FAIL': '🔴'}
+
+
+@st.cache_resource
+def get_result_cache() -> ResultCache:
+    """解析・チェック結果のキャッシュ（全セッション共通、再実行のたびに作り直さない）"""
+    return ResultCache()
+
+
+@st.cache_resource
+def get_check_engine() -> CheckEngine:
+    """チェックエンジン（全セッション共通、ルール定義の更新は自動で反映される）"""
+    return CheckEngine(cache=get_result_cache())
+
+
+@st.cache_resource
+def get_check_pool() -> CheckPool:
+    """
+    解析・チェック用プロセスプール（全セッション共通）
+
+    ワーカー数は SOUKEN_POOL_WORKERS（既定はCPU数）、同時に受け付ける件数は
+    SOUKEN_MAX_IN_FLIGHT（既定はワーカー数の2倍）
+    """
+    workers = int(os.environ.get('SOUKEN_POOL_WORKERS', '0')) or os.cpu_count() or 1
+    max_in_flight = int(os.environ.get('SOUKEN_MAX_IN_FLIGHT', '0')) or workers * 2
+    cache_dir = get_result_cache().cache_dir
+    return CheckPool(workers=workers, max_in_flight=max_in_flight,
+                     cache_dir=str(cache_dir) if cache_dir else None)
+
+
+@st.cache_resource
+def get_progress_manager():
+    """ワーカーからページごとの進捗を受け取るキューの管理プロセス（全セッション共通）"""
+    return multiprocessing.Manager()
+
+
+def session_checks() -> "OrderedDict":
+    """このセッションのチェック結果（(PDFのSHA-256, ルールセットのバージョン) -> 結果）"""
+    if 'checks' not in st.session_state:
+        st.session_state['checks'] = OrderedDict()
+    return st.session_state['checks']
+
+
+def check_package(files: List[dict], checks: "OrderedDict") -> Dict[str, str]:
+    """
+    ファイルをプロセスプールで並列にチェックする
+
+    ファイルごとに進捗バーを表示し、終わったファイルから結果（ステータスと件数）を表示する。
+    結果は checks に保存する
+
+    Args:
+        files: チェックするファイル（name / content / key の辞書）
+        checks: セッションのチェック結果
+
+    Returns:
+        Dict[str, str]: ファイル名 -> エラーメッセージ（失敗したファイルのみ）
+    """
+    pool = get_check_pool()
+    progress_queue = get_progress_manager().Queue()
+    bars = [st.progress(0.0, text=f"⏳ {file['name']}: 待機中") for file in files]
+    pending = list(range(len(files)))
+    running: Dict[Future, int] = {}
+    finished = set()
+    errors = {}
+
+    while pending or running:
+        # 空きの分だけ投入する（枠は他のセッションと共有）
+        while pending:
+            index = pending[0]
+            try:
+                future = pool.try_submit(check_pdf_bytes_progress, files[index]['content'],
+                                         files[index]['name'], progress_queue, index)
+            except PoolFullError:
+                break
+            pending.pop(0)
+            running[future] = index
+            bars[index].progress(0.0, text=f"🔍 {files[index]['name']}: 解析中")
+
+        # ページごとの進捗
+        deadline = time.monotonic() + PROGRESS_INTERVAL
+        while True:
+            try:
+                index, page_number, num_pages = progress_queue.get(
+                    timeout=max(deadline - time.monotonic(), 0)
+                )
+            except queue.Empty:
+                break
+            if index not in finished and num_pages:
+                bars[index].progress(min(page_number / num_pages, 1.0),
+                                     text=f"🔍 {files[index]['name']}: {page_number}/{num_pages}ページ")
+
+        # 終わったファイルの結果
+        for future in [future for future in running if future.done()]:
+            index = running.pop(future)
+            finished.add(index)
+            file = files[index]
+            try:
+                results, summary, _, num_pages = future.result()
+            except Exception as e:
+                errors[file['name']] = f"{type(e).__name__}: {e}"
+                bars[index].progress(1.0, text=f"❌ {file['name']}: エラー（{errors[file['name']]}）")
+                continue
+            checks[file['key']] = {
+                'file_name': file['name'],
+                'num_pages': num_pages,
+                'results': results,
+                'summary': summary,
+                'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            }
+            while len(checks) > MAX_SESSION_CHECKS:
+                checks.popitem(last=False)
+            bars[index].progress(1.0, text=(
+                f"{STATUS_ICONS.get(summary['status'], '⚪')} {file['name']}: {summary['status']}"
+                f"（NG {summary['ng']}件・警告 {summary['warning']}件）"
+            ))
+    return errors
+
+
+def show_package_summary(checked: List[dict]) -> None:
+    """図面一式（複数ファイル）のサマリー"""
+    st.header("📦 図面一式のサマリー")
+    failed = sum(1 for entry in checked if entry['summary']['status'] == 'FAIL')
+    col1, col2, col3, col4, col5 = st.columns(5)
+    with col1:
+        st.metric("ファイル数", len(checked))
+    with col2:
+        st.metric("🟢 PASS", len(checked) - failed)
+    with col3:
+        st.metric("🔴 FAIL", failed)
+    with col4:
+        st.metric("✗ NG", sum(entry['summary']['ng'] for entry in checked))
+    with col5:
+        st.metric("⚠ 警告", sum(entry['summary']['warning'] for entry in checked))
+
+    st.dataframe([
+        {
+            'ファイル名': entry['file_name'],
+            'ページ数': entry['num_pages'],
+            'ステータス': entry['summary']['status'],
+            'NG': entry['summary']['ng'],
+            '警告': entry['summary']['warning'],
+            '必須項目NG': entry['summary']['required_ng'],
+        }
+        for entry in checked
+    ], use_container_width=True, hide_index=True)
+
+
+def show_results(entry: dict, key: str) -> None:
+    """
+    1ファイル分のチェック結果
+
+    Args:
+        entry: セッションのチェック結果
+        key: ウィジェットのキー（ファイルごとに一意）
+    """
+    results = entry['results']
+    summary = entry['summary']
+
+    if entry['num_pages'] is not None:
+        st.success(f"✓ PDF解析完了 ({entry['num_pages']}ページ)")
+    else:
+        st.success("✓ チェック済みの結果を表示しています")
+
+    # サマリー
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("総チェック数", summary['total'])
+    with col2:
+        st.metric("✓ OK", summary['ok'], delta=None)
+    with col3:
+        st.metric("✗ NG", summary['ng'], delta=None, delta_color="inverse")
+    with col4:
+        st.metric("⚠ 警告", summary['warning'], delta=None)
+
+    # 全体ステータス
+    status_emoji = STATUS_ICONS.get(summary['status'], '⚪')
+    st.markdown(f"### {status_emoji} 全体ステータス: {summary['status']}")
+
+    # 必須項目NGがある場合
+    if summary['required_ng'] > 0:
+        st.error(f"⚠️ **必須項目で{summary['required_ng']}件のNGがあります**")
+
+    # 結果の詳細
+    st.markdown("---")
+    st.subheader("📝 指摘事項")
+
+    # カテゴリごとにグループ化
+    by_category = {}
+    for result in results:
+        if result.status != CheckStatus.OK:
+            if result.category not in by_category:
+                by_category[result.category] = []
+            by_category[result.category].append(result)
+
+    if by_category:
+        for category, category_results in by_category.items():
+            with st.expander(f"📂 {category} ({len(category_results)}件)", expanded=True):
+                for i, result in enumerate(category_results, 1):
+                    # ステータスアイコン
+                    status_icon = "❌" if result.status == CheckStatus.NG else "⚠️"
+
+                    # 重要度アイコン
+                    if result.importance == Importance.REQUIRED:
+                        importance_badge = "🔴 **【必須】**"
+                    else:
+                        importance_badge = "🟡 **【推奨】**"
+
+                    st.markdown(f"""
+                    **{i}. {status_icon} {importance_badge} {result.item}**
+
+                    {result.message}
+                    """)
+
+                    if result.suggestion:
+                        st.info(f"💡 推奨: {result.suggestion}")
+
+                    if result.page_number:
+                        position = ""
+                        if result.location:
+                            position = f"（x={result.location[0]:.0f}, y={result.location[1]:.0f}pt）"
+                        st.caption(f"📄 ページ: {result.page_number}{position}")
+
+                    st.markdown("---")
+    else:
+        st.success("🎉 指摘事項はありませんでした！")
+
+    # OK項目の表示（オプション）
+    ok_results = [r for r in results if r.status == CheckStatus.OK]
+    if ok_results and st.checkbox("✓ OK項目も表示する", key=f"show_ok_{key}"):
+        st.markdown("---")
+        st.subheader("✅ チェック通過項目")
+        for result in ok_results:
+            st.markdown(f"✓ {result.item}")
+
+
+def report_bytes(checked: List[dict], fmt: str) -> bytes:
+    """
+    ダウンロード用の報告書（xlsx / pdf）
+
+    再実行のたびに作り直さないよう、表示中のチェック結果ごとにセッションに保存する
+    （形式ごとに最新の1件のみ）
+
+    Args:
+        checked: 表示中のチェック結果
+        fmt: 出力形式（xlsx / pdf）
+
+    Returns:
+        bytes: 報告書の内容
+    """
+    key = tuple((entry['widget_key'], entry['file_name'], entry['timestamp']) for entry in checked)
+    if 'reports' not in st.session_state:
+        st.session_state['reports'] = {}
+    cached = st.session_state['reports'].get(fmt)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    records = (
+        CheckRecord(file_name=entry['file_name'], results=entry['results'], summary=entry['summary'],
+                    file_hash=entry['file_hash'],
+                    checked_at=datetime.strptime(entry['timestamp'], "%Y-%m-%d %H:%M:%S"))
+        for entry in checked
+    )
+    buffer = io.BytesIO()
+    reports.write_report(records, buffer, fmt)
+    st.session_state['reports'][fmt] = (key, buffer.getvalue())
+    return st.session_state['reports'][fmt][1]
+
+
+def results_text(checked: List[dict]) -> str:
+    """ダウンロード用のテキスト（ファイルごとのサマリーと指摘事項）"""
+    text = """
+図面チェック結果レポート
+========================
+"""
+    for entry in checked:
+        summary = entry['summary']
+        text += f"""
+ファイル名: {entry['file_name']}
+チェック日時: {entry['timestamp']}
+
+サマリー
+--------
+総チェック数: {summary['total']}
+OK: {summary['ok']}
+NG: {summary['ng']}
+警告: {summary['warning']}
+必須項目NG: {summary['required_ng']}
+全体ステータス: {summary['status']}
+
+指摘事項
+--------
+"""
+        for result in entry['results']:
+            if result.status != CheckStatus.OK:
+                text += f"""
+【{result.category}】
+- {result.item}: {result.message}
+  重要度: {result.importance.value}
+"""
+                if result.suggestion:
+                    text += f"  推奨: {result.suggestion}\n"
+                if result.page_number:
+                    text += f"  ページ: {result.page_number}\n"
+    return text
+
 
 # ページ設定
 st.set_page_config(
@@ -35,220 +358,123 @@ with st.sidebar:
     st.header("📋 使い方")
     st.markdown("""
     1. **PDFファイルをアップロード**
-       - 図面PDFファイルを選択してください
-    
+       - 図面PDFファイルを選択してください（意匠・構造・設備など複数可）
+
     2. **チェック実行**
        - 「チェック実行」ボタンをクリック
-    
+       - 複数のファイルは並列にチェックされます
+
     3. **結果確認**
        - チェック結果が表示されます
        - 指摘事項を確認して修正してください
     """)
-    
+
     st.markdown("---")
     st.header("✅ チェック項目")
-    st.markdown("""
-    **必須記載事項**
-    - 図面番号
-    - 図面名
-    - 縮尺
-    - 作成日
-    - 作成者
-    
-    **創建特有項目**
-    - 外断熱仕様
-    - 第一種換気システム
-    - 釘ピッチ（150mm以下）
-    - 隠蔽部分の施工方法
-    """)
+    # ルール定義ファイルから生成（ファイルを更新すると次の再描画で反映される）
+    for category in get_default_registry().current.items():
+        st.markdown(f"**{category['name']}**\n" + "\n".join(
+            f"- {item['label']}" for item in category['items']
+        ))
 
 # ファイルアップロード
 st.header("📁 図面ファイルのアップロード")
-uploaded_file = st.file_uploader(
+uploaded_files = st.file_uploader(
     "PDFファイルを選択してください",
     type=['pdf'],
-    help="図面PDFファイルをアップロードしてください"
+    accept_multiple_files=True,
+    help="図面PDFファイルをアップロードしてください（図面一式をまとめて選択できます）"
 )
 
-if uploaded_file is not None:
+if uploaded_files:
     # ファイル情報を表示
-    st.info(f"📄 ファイル名: {uploaded_file.name}")
-    st.info(f"📊 ファイルサイズ: {uploaded_file.size / 1024:.2f} KB")
-    
+    total_size = sum(uploaded_file.size for uploaded_file in uploaded_files)
+    if len(uploaded_files) == 1:
+        st.info(f"📄 ファイル名: {uploaded_files[0].name}")
+    else:
+        st.info(f"📄 ファイル数: {len(uploaded_files)}")
+    st.info(f"📊 ファイルサイズ: {total_size / 1024:.2f} KB")
+
+    # 同じ内容のファイル・同じルールなら、ボタンを押した後の再実行（チェックボックスの操作など）では
+    # セッションに保持した結果をそのまま表示する
+    checks = session_checks()
+    ruleset_version = get_check_engine().ruleset_version
+    files = []
+    for uploaded_file in uploaded_files:
+        content = uploaded_file.getvalue()
+        files.append({
+            'name': uploaded_file.name,
+            'content': content,
+            'key': (hash_bytes(content), ruleset_version),
+        })
+
     # チェック実行ボタン
     if st.button("🔍 チェック実行", type="primary", use_container_width=True):
-        with st.spinner("図面を解析中..."):
-            # 一時ファイルに保存
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-                tmp_file.write(uploaded_file.read())
-                tmp_path = tmp_file.name
-            
-            try:
-                # PDF解析
-                parser = PDFParser()
-                drawing_data = parser.parse(tmp_path)
-                
-                st.success(f"✓ PDF解析完了 ({drawing_data.metadata.get('num_pages', 0)}ページ)")
-                
-                # チェック実行
-                with st.spinner("チェックを実行中..."):
-                    check_engine = CheckEngine()
-                    results = check_engine.check_all(drawing_data)
-                    summary = check_engine.get_summary(results)
-                
-                # 結果表示
-                st.markdown("---")
-                st.header("📊 チェック結果")
-                
-                # サマリー
-                col1, col2, col3, col4 = st.columns(4)
-                with col1:
-                    st.metric("総チェック数", summary['total'])
-                with col2:
-                    st.metric("✓ OK", summary['ok'], delta=None)
-                with col3:
-                    st.metric("✗ NG", summary['ng'], delta=None, delta_color="inverse")
-                with col4:
-                    st.metric("⚠ 警告", summary['warning'], delta=None)
-                
-                # 全体ステータス
-                status_color = {
-                    'OK': '🟢',
-                    'WARNING': '🟡',
-                    'NG': '🔴'
-                }
-                status_emoji = status_color.get(summary['status'], '⚪')
-                st.markdown(f"### {status_emoji} 全体ステータス: {summary['status']}")
-                
-                # 必須項目NGがある場合
-                if summary['required_ng'] > 0:
-                    st.error(f"⚠️ **必須項目で{summary['required_ng']}件のNGがあります**")
-                
-                # 結果の詳細
-                st.markdown("---")
-                st.header("📝 指摘事項")
-                
-                # カテゴリごとにグループ化
-                by_category = {}
-                for result in results:
-                    if result.status != CheckStatus.OK:
-                        if result.category not in by_category:
-                            by_category[result.category] = []
-                        by_category[result.category].append(result)
-                
-                if by_category:
-                    for category, category_results in by_category.items():
-                        with st.expander(f"📂 {category} ({len(category_results)}件)", expanded=True):
-                            for i, result in enumerate(category_results, 1):
-                                # ステータスアイコン
-                                if result.status == CheckStatus.NG:
-                                    status_icon = "❌"
-                                    status_color = "red"
-                                else:
-                                    status_icon = "⚠️"
-                                    status_color = "orange"
-                                
-                                # 重要度アイコン
-                                if result.importance == Importance.REQUIRED:
-                                    importance_badge = "🔴 **【必須】**"
-                                else:
-                                    importance_badge = "🟡 **【推奨】**"
-                                
-                                st.markdown(f"""
-                                **{i}. {status_icon} {importance_badge} {result.item}**
-                                
-                                {result.message}
-                                """)
-                                
-                                if result.suggestion:
-                                    st.info(f"💡 推奨: {result.suggestion}")
-                                
-                                if result.page_number:
-                                    st.caption(f"📄 ページ: {result.page_number}")
-                                
-                                st.markdown("---")
-                else:
-                    st.success("🎉 指摘事項はありませんでした！")
-                
-                # OK項目の表示（オプション）
-                ok_results = [r for r in results if r.status == CheckStatus.OK]
-                if ok_results and st.checkbox("✓ OK項目も表示する"):
-                    st.markdown("---")
-                    st.header("✅ チェック通過項目")
-                    for result in ok_results:
-                        st.markdown(f"✓ {result.item}")
-                
-                # 結果をセッションに保存（ダウンロード用）
-                st.session_state['check_results'] = {
-                    'file_name': uploaded_file.name,
-                    'summary': summary,
-                    'results': [
-                        {
-                            'category': r.category,
-                            'item': r.item,
-                            'status': r.status.value,
-                            'message': r.message,
-                            'importance': r.importance.value,
-                            'page_number': r.page_number,
-                            'suggestion': r.suggestion
-                        }
-                        for r in results
-                    ],
-                    'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                }
-                
-            except Exception as e:
-                st.error(f"❌ エラーが発生しました: {str(e)}")
-                st.exception(e)
-            
-            finally:
-                # 一時ファイルを削除
-                if os.path.exists(tmp_path):
-                    os.unlink(tmp_path)
-    
-    # 結果のダウンロード（結果がある場合）
-    if 'check_results' in st.session_state:
-        st.markdown("---")
-        st.header("💾 結果のダウンロード")
-        
-        # テキスト形式でダウンロード
-        results_text = f"""
-図面チェック結果レポート
-========================
+        # 同じ内容のファイルが複数アップロードされた場合は1回だけチェックする
+        unchecked = list({file['key']: file for file in files if file['key'] not in checks}.values())
+        if unchecked:
+            errors = check_package(unchecked, checks)
+            for file_name, message in errors.items():
+                st.error(f"❌ {file_name}: エラーが発生しました: {message}")
 
-ファイル名: {st.session_state['check_results']['file_name']}
-チェック日時: {st.session_state['check_results']['timestamp']}
+    checked = []
+    for index, file in enumerate(files):
+        entry = checks.get(file['key'])
+        if entry is not None:
+            checks.move_to_end(file['key'])
+            # 同じPDFを2回アップロードしてもウィジェットのキーが重複しないよう、順番も含める
+            checked.append({**entry, 'file_name': file['name'], 'file_hash': file['key'][0],
+                            'widget_key': f"{index}_{file['key'][0]}"})
 
-サマリー
---------
-総チェック数: {st.session_state['check_results']['summary']['total']}
-OK: {st.session_state['check_results']['summary']['ok']}
-NG: {st.session_state['check_results']['summary']['ng']}
-警告: {st.session_state['check_results']['summary']['warning']}
-必須項目NG: {st.session_state['check_results']['summary']['required_ng']}
-全体ステータス: {st.session_state['check_results']['summary']['status']}
+    if checked:
+        # 結果表示
+        st.markdown("---")
+        st.header("📊 チェック結果")
 
-指摘事項
---------
-"""
-        for result in st.session_state['check_results']['results']:
-            if result['status'] != 'OK':
-                results_text += f"""
-【{result['category']}】
-- {result['item']}: {result['message']}
-  重要度: {result['importance']}
-"""
-                if result['suggestion']:
-                    results_text += f"  推奨: {result['suggestion']}\n"
-                if result['page_number']:
-                    results_text += f"  ページ: {result['page_number']}\n"
-        
-        st.download_button(
-            label="📥 結果をテキスト形式でダウンロード",
-            data=results_text,
-            file_name=f"check_result_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
-            mime="text/plain"
-        )
+        if len(files) > 1:
+            show_package_summary(checked)
+            tabs = st.tabs([
+                f"{STATUS_ICONS.get(entry['summary']['status'], '⚪')} {entry['file_name']}"
+                for entry in checked
+            ])
+            for tab, entry in zip(tabs, checked):
+                with tab:
+                    show_results(entry, entry['widget_key'])
+        else:
+            show_results(checked[0], checked[0]['widget_key'])
+
+        # 結果のダウンロード
+        st.markdown("---")
+        st.header("💾 結果のダウンロード")
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        col_text, col_excel, col_pdf = st.columns(3)
+        with col_text:
+            st.download_button(
+                label="📥 テキスト形式",
+                data=results_text(checked),
+                file_name=f"check_result_{stamp}.txt",
+                mime="text/plain"
+            )
+        with col_excel:
+            if reports.OPENPYXL_AVAILABLE:
+                st.download_button(
+                    label="📥 Excel形式",
+                    data=report_bytes(checked, "xlsx"),
+                    file_name=f"check_result_{stamp}.xlsx",
+                    mime=reports.MEDIA_TYPES["xlsx"]
+                )
+            else:
+                st.caption("Excel形式にはopenpyxlが必要です")
+        with col_pdf:
+            if reports.REPORTLAB_AVAILABLE:
+                st.download_button(
+                    label="📥 PDF形式",
+                    data=report_bytes(checked, "pdf"),
+                    file_name=f"check_result_{stamp}.pdf",
+                    mime=reports.MEDIA_TYPES["pdf"]
+                )
+            else:
+                st.caption("PDF形式にはreportlabが必要です")
 
 else:
     st.info("👆 上記からPDFファイルをアップロードしてください")
@@ -260,4 +486,3 @@ st.markdown("""
     <small>図面チェックAIシステム v1.0.0 | 創建内部使用</small>
 </div>
 """, unsafe_allow_html=True)
-
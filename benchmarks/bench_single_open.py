@@ -0,0 +1,77 @@
+"""
+PDFを1回だけ開く解析パスのベンチマーク
+従来の解析パス（PyPDF2でメタデータを取得してから、pdfplumberで開き直して抽出する）を
+end-to-endで再現し、現在の解析パスとそれぞれ計測して比較する
+
+使い方:
+    python benchmarks/bench_single_open.py drawing1.pdf drawing2.pdf --repeat 5
+"""
+
+import sys
+import argparse
+import statistics
+import time
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+import PyPDF2
+
+from src.pdf_parser import REGION_SHEET, PDFParser, _build_metadata
+
+
+def legacy_metadata_pass(pdf_path: str) -> dict:
+    """従来のparseが抽出前に行っていたPyPDF2でのメタデータ取得"""
+    with open(pdf_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        return _build_metadata(pdf_reader.metadata, len(pdf_reader.pages), key_prefix='/')
+
+
+class LegacyPDFParser(PDFParser):
+    """従来の解析パス（PyPDF2でメタデータを取得した後、pdfplumberで開き直してテキストを抽出する）"""
+    
+    def _parse_uncached(self, source, file_path, worker_source, timings, region=REGION_SHEET):
+        metadata = legacy_metadata_pass(source)
+        drawing_data = super()._parse_uncached(source, file_path, worker_source, timings, region)
+        drawing_data.metadata.update(metadata)
+        return drawing_data
+
+
+def measure(funcs, pdf_path: str, repeat: int) -> list:
+    """
+    関数ごとの実行時間の中央値（秒）
+
+    負荷の変動が片方に偏らないよう、1回ごとに関数を交互に実行する
+    """
+    timings = [[] for _ in funcs]
+    for _ in range(repeat):
+        for func, samples in zip(funcs, timings):
+            start = time.perf_counter()
+            func(pdf_path)
+            samples.append(time.perf_counter() - start)
+    return [statistics.median(samples) for samples in timings]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='シングルオープン解析のベンチマーク')
+    parser.add_argument('pdf_paths', nargs='+', help='計測するPDFファイル')
+    parser.add_argument('--repeat', '-r', type=int, default=3, help='計測回数 (default: 3)')
+    args = parser.parse_args()
+    
+    pdf_parser = PDFParser()
+    legacy_parser = LegacyPDFParser()
+    print(f"{'ファイル':<40} {'解析(ms)':>10} {'従来(ms)':>10} {'削減(ms)':>10}")
+    print("-" * 74)
+    for pdf_path in args.pdf_paths:
+        # どちらもparse全体（ハッシュ計算・抽出・索引作成を含む）を計測する
+        parse_time, legacy_time = measure((pdf_parser.parse, legacy_parser.parse), pdf_path, args.repeat)
+        name = Path(pdf_path).name
+        print(f"{name:<40} {parse_time * 1000:>10.1f} {legacy_time * 1000:>10.1f} "
+              f"{(legacy_time - parse_time) * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+合成図面セットによる解析・チェックのスループットベンチマーク
+
+生成条件（ページ数・テキスト密度・日本語比率・ベクター密度）の組み合わせごとに
+- PDFParser.parse のページ/秒
+- CheckEngine.check_all の文書/秒
+- ピークRSS
+を計測し、最大ページ数の図面でワーカー数1〜Nのスケーリングを計測する。
+結果はJSONに保存し、--baseline で前回の結果と比較できる
+
+使い方:
+    python benchmarks/bench_throughput.py --output bench.json
+    python benchmarks/bench_throughput.py --pages 10 100 --japanese 0.0 1.0 --max-workers 8
+    python benchmarks/bench_throughput.py --output new.json --baseline bench.json --tolerance 0.15
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import tempfile
+import itertools
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from synthetic_drawings import DrawingSpec, generate_drawing_set
+from src.pdf_parser import PDFParser
+from src.checkers import CheckEngine
+
+
+def _peak_rss_mb() -> float:
+    """このプロセスと終了済みの子プロセスのピークRSS（MB）"""
+    per_mb = 1024 * 1024 if sys.platform == 'darwin' else 1024  # macOSはバイト、Linuxはキロバイト
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) / per_mb
+
+
+def measure_scenario(pdf_path: str, pages: int, repeat: int, workers: int = 1) -> dict:
+    """
+    1つの図面について解析・チェックを計測する（ピークRSSを分けるため子プロセスで実行）
+
+    Returns:
+        dict: 計測結果
+    """
+    pdf_parser = PDFParser(workers=workers)
+    check_engine = CheckEngine()
+
+    parse_times = []
+    drawing_data = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        drawing_data = pdf_parser.parse(pdf_path)
+        parse_times.append(time.perf_counter() - start)
+
+    check_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        check_engine.check_all(drawing_data)
+        check_times.append(time.perf_counter() - start)
+
+    parse_time = statistics.median(parse_times)
+    check_time = statistics.median(check_times)
+    return {
+        'parse_seconds': round(parse_time, 6),
+        'parse_pages_per_sec': round(pages / parse_time, 3),
+        'check_seconds': round(check_time, 6),
+        'check_docs_per_sec': round(1 / check_time, 3) if check_time > 0 else None,
+        'peak_rss_mb': round(_peak_rss_mb(), 1),
+    }
+
+
+def run_isolated(pdf_path: str, pages: int, repeat: int, workers: int = 1) -> dict:
+    """新しいプロセスで計測する（前の計測のメモリがピークRSSに混ざらないように）"""
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        return executor.submit(measure_scenario, pdf_path, pages, repeat, workers).result()
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> List[str]:
+    """
+    前回の結果と比較し、tolerance以上遅くなった指標を返す
+
+    Args:
+        current: 今回の結果
+        baseline: 比較対象の結果
+        tolerance: 許容する低下率（0.1 = 10%）
+
+    Returns:
+        List[str]: 退行の説明（なければ空）
+    """
+    regressions = []
+    baseline_scenarios = {json.dumps(s['spec'], sort_keys=True): s for s in baseline.get('scenarios', [])}
+    for scenario in current['scenarios']:
+        key = json.dumps(scenario['spec'], sort_keys=True)
+        before = baseline_scenarios.get(key)
+        if before is None:
+            continue
+        for metric in ('parse_pages_per_sec', 'check_docs_per_sec'):
+            old, new = before.get(metric), scenario.get(metric)
+            if old and new and new < old * (1 - tolerance):
+                regressions.append(f"{key} {metric}: {old} -> {new} ({(new / old - 1) * 100:+.1f}%)")
+    return regressions
+
+
+def worker_counts(max_workers: int) -> List[int]:
+    """1, 2, 4, ... max_workers"""
+    counts = []
+    count = 1
+    while count < max_workers:
+        counts.append(count)
+        count *= 2
+    counts.append(max_workers)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='合成図面セットによる解析・チェックのベンチマーク')
+    parser.add_argument('--pages', type=int, nargs='+', default=[5, 30], help='ページ数 (default: 5 30)')
+    parser.add_argument('--density', type=int, nargs='+', default=[60],
+                        help='1ページあたりのテキスト行数 (default: 60)')
+    parser.add_argument('--japanese', type=float, nargs='+', default=[0.0, 0.7],
+                        help='日本語の比率 (default: 0.0 0.7)')
+    parser.add_argument('--vectors', type=int, nargs='+', default=[0, 400],
+                        help='1ページあたりの線・矩形の数 (default: 0 400)')
+    parser.add_argument('--repeat', '-r', type=int, default=3, help='計測回数 (default: 3)')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1,
+                        help='スケーリング計測の最大ワーカー数 (default: CPU数)')
+    parser.add_argument('--output', '-o', type=str, default='bench_results.json',
+                        help='結果を保存するJSONファイル (default: bench_results.json)')
+    parser.add_argument('--baseline', type=str, help='比較する前回の結果JSON')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='退行とみなす低下率 (default: 0.1 = 10%%)')
+    parser.add_argument('--work-dir', type=str, help='合成PDFの保存先（省略時は一時ディレクトリ）')
+    args = parser.parse_args()
+
+    work_dir = Path(args.work_dir or tempfile.mkdtemp(prefix='souken_bench_'))
+    work_dir.mkdir(parents=True, exist_ok=True)
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'repeat': args.repeat,
+        'scenarios': [],
+        'scaling': None,
+    }
+
+    print(f"{'pages':>5} {'density':>7} {'ja':>4} {'vectors':>7} {'parse(p/s)':>11} "
+          f"{'check(doc/s)':>13} {'RSS(MB)':>8}")
+    print("-" * 62)
+    largest: Optional[tuple] = None
+    for pages, density, japanese, vectors in itertools.product(
+            args.pages, args.density, args.japanese, args.vectors):
+        spec = DrawingSpec(pages=pages, density=density, japanese=japanese, vectors=vectors)
+        pdf_path = work_dir / f"p{pages}_d{density}_ja{japanese}_v{vectors}.pdf"
+        if not pdf_path.exists():
+            generate_drawing_set(str(pdf_path), spec)
+        result = run_isolated(str(pdf_path), pages, args.repeat)
+        report['scenarios'].append({'spec': spec.to_dict(), **result})
+        print(f"{pages:>5} {density:>7} {japanese:>4} {vectors:>7} {result['parse_pages_per_sec']:>11.1f} "
+              f"{result['check_docs_per_sec']:>13.1f} {result['peak_rss_mb']:>8.1f}")
+        if largest is None or pages > largest[1]:
+            largest = (pdf_path, pages, spec)
+
+    # 最大ページ数の図面でワーカー数ごとの解析スループットを計測
+    pdf_path, pages, spec = largest
+    print(f"\nワーカー数スケーリング ({pages}ページ)")
+    print(f"{'workers':>7} {'parse(p/s)':>11} {'speedup':>8} {'RSS(MB)':>8}")
+    print("-" * 38)
+    scaling = {'spec': spec.to_dict(), 'results': []}
+    base_rate = None
+    for workers in worker_counts(args.max_workers):
+        result = run_isolated(str(pdf_path), pages, args.repeat, workers)
+        base_rate = base_rate or result['parse_pages_per_sec']
+        speedup = result['parse_pages_per_sec'] / base_rate
+        scaling['results'].append({'workers': workers, 'speedup': round(speedup, 3), **result})
+        print(f"{workers:>7} {result['parse_pages_per_sec']:>11.1f} {speedup:>7.2f}x {result['peak_rss_mb']:>8.1f}")
+    report['scaling'] = scaling
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n結果を保存しました: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\n性能低下を検出しました（許容 {args.tolerance * 100:.0f}%）:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\n前回の結果からの性能低下はありません（許容 {args.tolerance * 100:.0f}%）")
+
+
+if __name__ == "__main__":
+    main()
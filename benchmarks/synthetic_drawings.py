@@ -0,0 +1,180 @@
+"""
+ベンチマーク用の合成図面PDFを生成する
+ページ数・テキスト密度・日本語/英語の比率・ベクター図形の密度・スキャンページ数を指定できる
+
+使い方:
+    python benchmarks/synthetic_drawings.py out.pdf --pages 20 --density 80 --japanese 0.7 --vectors 400
+    python benchmarks/synthetic_drawings.py scan.pdf --pages 10 --scanned 4
+"""
+
+import random
+import argparse
+from dataclasses import dataclass, asdict
+
+from PIL import Image, ImageDraw
+from reportlab.lib.pagesizes import A3, landscape
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+from reportlab.pdfgen import canvas
+
+
+JAPANESE_FONT = 'HeiseiKakuGo-W5'
+ENGLISH_FONT = 'Helvetica'
+
+# 本文に散らばせる語句（チェック対象のキーワードを含む）
+JAPANESE_WORDS = [
+    '平面図', '立面図', '断面図', '基礎伏図', '床伏図', '小屋伏図', '矩計図', '展開図',
+    '外断熱', '付加断熱', '第一種換気', '熱交換換気', '隠蔽部', '構造用合板', '耐力壁',
+    '柱', '梁', '土台', '通気層', '防湿シート', '気密テープ', '仕上げ', '下地', '石膏ボード',
+    '釘ピッチ@150', 'N50釘', '外周部', '中通り', '金物', 'ホールダウン', '寸法', '通り芯',
+]
+ENGLISH_WORDS = [
+    'PLAN', 'SECTION', 'ELEVATION', 'DETAIL', 'WALL', 'BEAM', 'COLUMN', 'SLAB', 'ROOF',
+    'INSULATION', 'VENTILATION', 'PLYWOOD', 'ANCHOR BOLT', 'GRID', 'LEVEL', 'FINISH',
+    'NAIL PITCH 150', 'TYP.', 'SEE DETAIL', 'MIN.', 'MAX.', 'DIMENSION', 'OPENING',
+]
+
+
+@dataclass
+class DrawingSpec:
+    """合成図面の生成条件"""
+    pages: int = 10
+    density: int = 60  # 1ページあたりのテキスト行数
+    japanese: float = 0.5  # 日本語の語句の比率（0.0-1.0）
+    vectors: int = 200  # 1ページあたりの線・矩形の数
+    seed: int = 0
+    scanned: int = 0  # 末尾から何ページをテキストレイヤーのないスキャン画像にするか
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+_font_registered = False
+
+
+def _register_fonts() -> None:
+    global _font_registered
+    if not _font_registered:
+        pdfmetrics.registerFont(UnicodeCIDFont(JAPANESE_FONT))
+        _font_registered = True
+
+
+def _draw_title_block(pdf: canvas.Canvas, width: float, page_number: int, spec: DrawingSpec,
+                      rng: random.Random) -> None:
+    """図面枠と表題欄（チェック対象の必須記載事項）を描く"""
+    pdf.setLineWidth(1.5)
+    pdf.rect(20, 20, width - 40, A3[0] - 40)
+    left = width - 320
+    pdf.rect(left, 20, 300, 110)
+    for y in (42, 64, 86, 108):
+        pdf.line(left, y, left + 300, y)
+
+    use_japanese = rng.random() < spec.japanese
+    pdf.setFont(JAPANESE_FONT if use_japanese else ENGLISH_FONT, 9)
+    if use_japanese:
+        rows = [
+            f"図面番号: A-{page_number:03d}",
+            f"図面名: {rng.choice(JAPANESE_WORDS[:8])}",
+            "縮尺: 1/100",
+            "作成日: 2024年6月1日",
+            "作成者: 設計部",
+        ]
+    else:
+        rows = [
+            f"DWG NO. A-{page_number:03d}",
+            f"TITLE: {rng.choice(ENGLISH_WORDS[:4])}",
+            "SCALE 1:100",
+            "DATE: 2024/06/01",
+            "DRAWN BY: DESIGN",
+        ]
+    for index, row in enumerate(rows):
+        pdf.drawString(left + 8, 28 + 22 * index, row)
+
+
+def _draw_vectors(pdf: canvas.Canvas, width: float, height: float, count: int,
+                  rng: random.Random) -> None:
+    """線と矩形（壁・通り芯などを模したベクター図形）を描く"""
+    pdf.setLineWidth(0.3)
+    path = pdf.beginPath()
+    for _ in range(count):
+        x, y = rng.uniform(40, width - 360), rng.uniform(150, height - 40)
+        if rng.random() < 0.7:
+            path.moveTo(x, y)
+            path.lineTo(x + rng.uniform(-200, 200), y + rng.uniform(-200, 200))
+        else:
+            path.rect(x, y, rng.uniform(5, 120), rng.uniform(5, 120))
+    pdf.drawPath(path, stroke=1, fill=0)
+
+
+def _draw_text(pdf: canvas.Canvas, width: float, height: float, spec: DrawingSpec,
+               rng: random.Random) -> None:
+    """注記を模したテキスト行を散らばせる"""
+    for _ in range(spec.density):
+        use_japanese = rng.random() < spec.japanese
+        words = JAPANESE_WORDS if use_japanese else ENGLISH_WORDS
+        pdf.setFont(JAPANESE_FONT if use_japanese else ENGLISH_FONT, rng.choice((6, 7, 8, 10)))
+        line = (" " if not use_japanese else "　").join(rng.choice(words) for _ in range(rng.randint(2, 6)))
+        pdf.drawString(rng.uniform(40, width - 420), rng.uniform(150, height - 40), line)
+
+
+def _draw_scanned(pdf: canvas.Canvas, width: float, height: float, spec: DrawingSpec,
+                  rng: random.Random) -> None:
+    """スキャンした図面を模した画像だけのページ（テキストレイヤーなし）を描く"""
+    image = Image.new('L', (int(width), int(height)), 255)
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((20, 20, width - 20, height - 20), outline=0, width=2)
+    for _ in range(spec.vectors):
+        x, y = rng.uniform(40, width - 40), rng.uniform(40, height - 40)
+        draw.line((x, y, x + rng.uniform(-200, 200), y + rng.uniform(-200, 200)), fill=0)
+    pdf.drawImage(ImageReader(image), 0, 0, width, height)
+
+
+def generate_drawing_set(output_path: str, spec: DrawingSpec) -> str:
+    """
+    合成図面PDFを生成する
+
+    Args:
+        output_path: 出力するPDFのパス
+        spec: 生成条件（同じspecからは同じPDFが生成される）
+
+    Returns:
+        str: 出力したPDFのパス
+    """
+    _register_fonts()
+    rng = random.Random(spec.seed)
+    width, height = landscape(A3)
+    pdf = canvas.Canvas(output_path, pagesize=(width, height), invariant=1)
+    pdf.setTitle(f"synthetic drawing set ({spec.pages} pages)")
+    pdf.setAuthor("benchmark")
+    for page_number in range(1, spec.pages + 1):
+        if page_number > spec.pages - spec.scanned:
+            _draw_scanned(pdf, width, height, spec, rng)
+            pdf.showPage()
+            continue
+        _draw_vectors(pdf, width, height, spec.vectors, rng)
+        _draw_text(pdf, width, height, spec, rng)
+        _draw_title_block(pdf, width, page_number, spec, rng)
+        pdf.showPage()
+    pdf.save()
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ベンチマーク用の合成図面PDFを生成')
+    parser.add_argument('output', help='出力するPDFのパス')
+    parser.add_argument('--pages', type=int, default=10, help='ページ数 (default: 10)')
+    parser.add_argument('--density', type=int, default=60, help='1ページあたりのテキスト行数 (default: 60)')
+    parser.add_argument('--japanese', type=float, default=0.5, help='日本語の比率 0.0-1.0 (default: 0.5)')
+    parser.add_argument('--vectors', type=int, default=200, help='1ページあたりの線・矩形の数 (default: 200)')
+    parser.add_argument('--seed', type=int, default=0, help='乱数シード (default: 0)')
+    parser.add_argument('--scanned', type=int, default=0,
+                        help='末尾のスキャン画像（テキストレイヤーなし）のページ数 (default: 0)')
+    args = parser.parse_args()
+
+    spec = DrawingSpec(args.pages, args.density, args.japanese, args.vectors, args.seed, args.scanned)
+    print(f"生成しました: {generate_drawing_set(args.output, spec)}")
+
+
+if __name__ == "__main__":
+    main()
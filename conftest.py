@@ -0,0 +1,29 @@
+"""
+pytestの共通設定
+テスト用の図面PDFは benchmarks/synthetic_drawings.py で生成する
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# src・benchmarksのモジュールをインポートできるようにパスを追加
+ROOT = Path(__file__).parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+from synthetic_drawings import DrawingSpec, generate_drawing_set
+
+
+# 実際の図面PDFを引数に取るスクリプト（python3 test_check.py <PDF> で実行する）
+collect_ignore = ['test_check.py']
+
+
+@pytest.fixture
+def drawing_pdf(tmp_path):
+    """合成図面PDFを生成する関数（引数はDrawingSpecのフィールド）"""
+    def generate(**spec) -> str:
+        path = tmp_path / f"drawing_{len(list(tmp_path.glob('*.pdf')))}.pdf"
+        return generate_drawing_set(str(path), DrawingSpec(**spec))
+    return generate
@@ -0,0 +1,434 @@
+"""
+Analytics Module
+保存済みのチェック結果を列ごとのNumPy配列に読み込み、設計事務所・案件・チェック項目・月ごとの
+NG率などをベクトル演算で集計する（ダッシュボード用）
+"""
+
+import sys
+import json
+import argparse
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from . import results_store
+from .results_store import DEFAULT_RESULTS_DB, ResultStore
+
+
+# 指摘のステータス・重要度のコード（配列には位置を入れる）
+STATUS_CODES = ("OK", "NG", "WARNING")
+IMPORTANCE_CODES = ("必須", "推奨", "参考")
+
+# 集計の単位（office / project / month はチェック単位、item はチェック項目単位）
+GROUP_KEYS = ("office", "project", "month", "item")
+
+# 読み込み時に1回に取り出す行数
+_FETCH_ROWS = 10000
+
+
+@dataclass
+class ResultColumns:
+    """
+    保存済みのチェック結果の列データ
+
+    文字列の列はコード（labelsの位置）の整数配列として持つ。
+    指摘の配列はチェックの配列の位置（finding_check）で結び付ける
+    """
+    # チェック（1文書1回）ごとの列
+    check_ids: "np.ndarray"  # 昇順
+    check_office: "np.ndarray"
+    check_project: "np.ndarray"
+    check_month: "np.ndarray"
+    check_failed: "np.ndarray"  # bool
+    check_required_ng: "np.ndarray"
+    # 指摘ごとの列
+    finding_check: "np.ndarray"
+    finding_item: "np.ndarray"
+    finding_status: "np.ndarray"
+    finding_importance: "np.ndarray"
+    # キー -> コードに対応する値
+    labels: Dict[str, List[Optional[str]]]
+
+    @property
+    def check_count(self) -> int:
+        return len(self.check_ids)
+
+    @property
+    def finding_count(self) -> int:
+        return len(self.finding_check)
+
+    def check_codes(self, key: str) -> "np.ndarray":
+        """チェックごとの集計単位のコード（office / project / month）"""
+        return {'office': self.check_office, 'project': self.check_project,
+                'month': self.check_month}[key]
+
+    def finding_codes(self, key: str) -> "np.ndarray":
+        """指摘ごとの集計単位のコード"""
+        if key == 'item':
+            return self.finding_item
+        return self.check_codes(key)[self.finding_check]
+
+    @property
+    def last_check_id(self) -> Optional[int]:
+        """読み込んだ最新のチェックID"""
+        return int(self.check_ids[-1]) if len(self.check_ids) else None
+
+    def extend(self, newer: "ResultColumns") -> "ResultColumns":
+        """
+        後から保存されたチェックの列データを後ろにつなげる
+
+        ラベルは両方の値をまとめて昇順に振り直す
+
+        Args:
+            newer: last_check_id より後のチェックだけを読み込んだ列データ
+        """
+        labels, remapped = {}, {}
+        for key in GROUP_KEYS:
+            labels[key], (old, new) = _merge_labels(self.labels[key], newer.labels[key])
+            remapped[key] = old, new
+
+        def codes(key: str, attr: str) -> "np.ndarray":
+            old, new = remapped[key]
+            return np.concatenate([old[getattr(self, attr)], new[getattr(newer, attr)]])
+
+        return ResultColumns(
+            check_ids=np.concatenate([self.check_ids, newer.check_ids]),
+            check_office=codes('office', 'check_office'),
+            check_project=codes('project', 'check_project'),
+            check_month=codes('month', 'check_month'),
+            check_failed=np.concatenate([self.check_failed, newer.check_failed]),
+            check_required_ng=np.concatenate([self.check_required_ng, newer.check_required_ng]),
+            finding_check=np.concatenate([self.finding_check, newer.finding_check + self.check_count]),
+            finding_item=codes('item', 'finding_item'),
+            finding_status=np.concatenate([self.finding_status, newer.finding_status]),
+            finding_importance=np.concatenate([self.finding_importance, newer.finding_importance]),
+            labels=labels,
+        )
+
+
+def _require_numpy() -> None:
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError("NumPyがインストールされていません（pip install numpy）")
+
+
+def _check_key(key: str) -> None:
+    if key not in GROUP_KEYS:
+        raise ValueError(f"集計の単位は {GROUP_KEYS} のいずれかを指定してください: {key}")
+
+
+def _label_order(value) -> tuple:
+    """ラベルの並び順（値の昇順、Noneは最後）"""
+    return value is None, value if value is not None else ""
+
+
+def _merge_labels(old: list, new: list) -> Tuple[list, Tuple["np.ndarray", "np.ndarray"]]:
+    """2つのラベルをまとめ、それぞれの旧コード -> 新コードの対応表を返す"""
+    merged = sorted(set(old) | set(new), key=_label_order)
+    position = {value: i for i, value in enumerate(merged)}
+    return merged, (np.array([position[value] for value in old], dtype=np.int32),
+                    np.array([position[value] for value in new], dtype=np.int32))
+
+
+def _encode(values: list) -> Tuple[list, "np.ndarray"]:
+    """
+    値の列をコードの配列にする
+
+    Returns:
+        Tuple[list, np.ndarray]: 値の昇順（Noneは最後）のラベルと、各行のラベルの位置
+    """
+    first: Dict[object, int] = {}
+    raw = np.fromiter((first.setdefault(value, len(first)) for value in values),
+                      dtype=np.int32, count=len(values))
+    labels = sorted(first, key=_label_order)
+    remap = np.empty(len(labels), dtype=np.int32)
+    remap[[first[value] for value in labels]] = np.arange(len(labels), dtype=np.int32)
+    return labels, remap[raw] if len(raw) else raw
+
+
+def load_columns(store: ResultStore, since: Optional[datetime] = None,
+                 until: Optional[datetime] = None, project: Optional[str] = None,
+                 office: Optional[str] = None, after_id: Optional[int] = None) -> ResultColumns:
+    """
+    保存済みのチェック結果を列データとして読み込む（集計に必要な列だけを取り出す）
+
+    Args:
+        store: チェック結果の保存先
+        since: この日時以降のチェック（含む）
+        until: この日時より前のチェック（含まない）
+        project: 案件名で絞り込む
+        office: 設計事務所で絞り込む
+        after_id: このチェックIDより後に保存されたチェックだけを読み込む
+
+    Returns:
+        ResultColumns: 列データ
+
+    Raises:
+        RuntimeError: NumPyがインストールされていない場合
+    """
+    _require_numpy()
+    from sqlalchemy import select
+
+    c = results_store.checks_table
+    r = results_store.results_table
+    check_query = select(
+        c.c.id, c.c.office, c.c.project, c.c.checked_at, c.c.status, c.c.required_ng
+    ).order_by(c.c.id)
+    finding_query = select(r.c.check_id, r.c.item, r.c.status, r.c.importance)
+    for table in (c, r):
+        conditions = []
+        if since is not None:
+            conditions.append(table.c.checked_at >= since)
+        if until is not None:
+            conditions.append(table.c.checked_at < until)
+        if project is not None:
+            conditions.append(table.c.project == project)
+        if office is not None:
+            conditions.append(table.c.office == office)
+        if after_id is not None:
+            conditions.append((table.c.id if table is c else table.c.check_id) > after_id)
+        if table is c:
+            check_query = check_query.where(*conditions)
+        else:
+            finding_query = finding_query.where(*conditions)
+
+    check_columns: List[list] = [[] for _ in range(6)]
+    finding_columns: List[list] = [[] for _ in range(4)]
+    with store.engine.connect() as conn:
+        for query, target in ((check_query, check_columns), (finding_query, finding_columns)):
+            result = conn.execution_options(yield_per=_FETCH_ROWS).execute(query)
+            for rows in result.partitions():
+                for column, values in zip(target, zip(*rows)):
+                    column.extend(values)
+    ids, offices, projects, checked_at, check_status, required_ng = check_columns
+    check_ids, items, statuses, importances = finding_columns
+
+    labels: Dict[str, List[Optional[str]]] = {}
+    codes: Dict[str, "np.ndarray"] = {}
+    for key, values in (('office', offices), ('project', projects), ('item', items),
+                        ('month', [(at.year, at.month) for at in checked_at])):
+        labels[key], codes[key] = _encode(values)
+    labels['month'] = [f"{year:04d}-{month:02d}" for year, month in labels['month']]  # 昇順のまま
+    status_code = {status: i for i, status in enumerate(STATUS_CODES)}
+    importance_code = {importance: i for i, importance in enumerate(IMPORTANCE_CODES)}
+
+    check_id_array = np.array(ids, dtype=np.int64)
+    # 指摘をチェックの位置に結び付ける（チェックは昇順に読み込み済み）
+    finding_ids = np.array(check_ids, dtype=np.int64)
+    position = np.searchsorted(check_id_array, finding_ids)
+    valid = position < len(check_id_array)
+    valid[valid] = check_id_array[position[valid]] == finding_ids[valid]
+
+    return ResultColumns(
+        check_ids=check_id_array,
+        check_office=codes['office'],
+        check_project=codes['project'],
+        check_month=codes['month'],
+        check_failed=np.array([status == 'FAIL' for status in check_status], dtype=bool),
+        check_required_ng=np.array(required_ng, dtype=np.int32),
+        finding_check=position[valid].astype(np.int32),
+        finding_item=codes['item'][valid],
+        finding_status=np.array([status_code.get(v, -1) for v in statuses], dtype=np.int8)[valid],
+        finding_importance=np.array([importance_code.get(v, -1) for v in importances],
+                                    dtype=np.int8)[valid],
+        labels=labels,
+    )
+
+
+class ColumnCache:
+    """
+    条件ごとに読み込んだ列データを保持し、新しく保存されたチェックだけを読み足すキャッシュ
+
+    チェック結果は追記のみでIDが増えていくことを前提にする（保存済みの結果は変更・削除しない）
+    """
+
+    def __init__(self, store: ResultStore, max_entries: int = 8):
+        """
+        Args:
+            store: チェック結果の保存先
+            max_entries: 保持する条件の組み合わせの数
+        """
+        self.store = store
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, ResultColumns]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def columns(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                project: Optional[str] = None, office: Optional[str] = None) -> ResultColumns:
+        """最新の列データ（引数は load_columns() と同じ）"""
+        key = (since, until, project, office)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None:
+                cached = load_columns(self.store, since, until, project, office)
+            else:
+                after_id = cached.last_check_id
+                if after_id is None:
+                    cached = load_columns(self.store, since, until, project, office)
+                else:
+                    newer = load_columns(self.store, since, until, project, office, after_id)
+                    if newer.check_count:
+                        cached = cached.extend(newer)
+            self._entries[key] = cached
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return cached
+
+
+def _rate(numerator: "np.ndarray", denominator) -> "np.ndarray":
+    """割合（分母が0なら0）"""
+    denominator = np.asarray(denominator, dtype=np.float64)
+    return np.divide(numerator, denominator, out=np.zeros(np.shape(numerator)),
+                     where=denominator > 0)
+
+
+def summarize(columns: ResultColumns) -> dict:
+    """
+    全体の集計
+
+    Returns:
+        dict: チェック数・FAIL数・FAIL率と、ステータス別・重要度別の指摘数
+    """
+    checks = columns.check_count
+    failed = int(np.count_nonzero(columns.check_failed))
+    status_counts = np.bincount(columns.finding_status[columns.finding_status >= 0],
+                                minlength=len(STATUS_CODES))
+    importance_counts = np.bincount(columns.finding_importance[columns.finding_importance >= 0],
+                                    minlength=len(IMPORTANCE_CODES))
+    return {
+        'checks': checks,
+        'pass': checks - failed,
+        'fail': failed,
+        'fail_rate': round(failed / checks, 4) if checks else 0.0,
+        'findings': columns.finding_count,
+        'by_status': {status: int(count) for status, count in zip(STATUS_CODES, status_counts)},
+        'by_importance': {
+            importance: int(count) for importance, count in zip(IMPORTANCE_CODES, importance_counts)
+        },
+    }
+
+
+def group_by(columns: ResultColumns, key: str) -> List[dict]:
+    """
+    集計単位ごとの集計（キーの昇順）
+
+    office / project / month ではチェック数・FAIL率と指摘数を、item（チェック項目）では
+    その項目がNG・警告になったチェックの数と、全チェック数に対する割合を返す
+
+    Args:
+        columns: load_columns() の列データ
+        key: 集計の単位（GROUP_KEYS のいずれか）
+
+    Raises:
+        ValueError: 集計の単位が不正な場合
+    """
+    _check_key(key)
+    labels = columns.labels[key]
+    size = len(labels)
+    codes = columns.finding_codes(key)
+    ng = np.bincount(codes[columns.finding_status == STATUS_CODES.index("NG")], minlength=size)
+    warning = np.bincount(codes[columns.finding_status == STATUS_CODES.index("WARNING")], minlength=size)
+
+    if key == 'item':
+        # 1回のチェックで1項目の指摘は1件なので、指摘数がそのままNGになったチェック数
+        checks = columns.check_count
+        ng_rate, warning_rate = _rate(ng, checks), _rate(warning, checks)
+        return [
+            {'item': labels[i], 'checks': checks, 'ng': int(ng[i]), 'warning': int(warning[i]),
+             'ng_rate': round(float(ng_rate[i]), 4), 'warning_rate': round(float(warning_rate[i]), 4)}
+            for i in range(size)
+        ]
+
+    check_codes = columns.check_codes(key)
+    checks = np.bincount(check_codes, minlength=size)
+    failed = np.bincount(check_codes, weights=columns.check_failed, minlength=size).astype(np.int64)
+    required_ng = np.bincount(check_codes, weights=columns.check_required_ng,
+                              minlength=size).astype(np.int64)
+    fail_rate = _rate(failed, checks)
+    ng_per_check = _rate(ng, checks)
+    return [
+        {key: labels[i], 'checks': int(checks[i]), 'fail': int(failed[i]),
+         'fail_rate': round(float(fail_rate[i]), 4), 'ng': int(ng[i]), 'warning': int(warning[i]),
+         'required_ng': int(required_ng[i]), 'ng_per_check': round(float(ng_per_check[i]), 4)}
+        for i in range(size)
+    ]
+
+
+def pivot(columns: ResultColumns, rows: str, cols: str, status: str = "NG") -> dict:
+    """
+    2つの集計単位のクロス集計（例: チェック項目 × 月のNG件数）
+
+    Args:
+        columns: load_columns() の列データ
+        rows: 行の集計単位
+        cols: 列の集計単位
+        status: 数える指摘のステータス
+
+    Returns:
+        dict: rows / cols（ラベル）と counts（行 × 列の件数）
+
+    Raises:
+        ValueError: 集計の単位・ステータスが不正な場合
+    """
+    _check_key(rows)
+    _check_key(cols)
+    if status not in STATUS_CODES:
+        raise ValueError(f"ステータスは {STATUS_CODES} のいずれかを指定してください: {status}")
+    row_labels, col_labels = columns.labels[rows], columns.labels[cols]
+    selected = columns.finding_status == STATUS_CODES.index(status)
+    cells = (columns.finding_codes(rows)[selected].astype(np.int64) * len(col_labels)
+             + columns.finding_codes(cols)[selected])
+    counts = np.bincount(cells, minlength=len(row_labels) * len(col_labels))
+    return {
+        'rows': row_labels,
+        'cols': col_labels,
+        'status': status,
+        'counts': counts.reshape(len(row_labels), len(col_labels)).tolist(),
+    }
+
+
+def dashboard(columns: ResultColumns, keys: Sequence[str] = GROUP_KEYS) -> dict:
+    """全体の集計と、集計単位ごとの集計をまとめて返す"""
+    return {
+        'summary': summarize(columns),
+        'groups': {key: group_by(columns, key) for key in keys},
+    }
+
+
+def _parse_date(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """保存済みのチェック結果を集計してJSONで出力する"""
+    parser = argparse.ArgumentParser(description='保存済みのチェック結果を集計')
+    parser.add_argument('--db', default=DEFAULT_RESULTS_DB, help='データベースURL (default: SOUKEN_RESULTS_DB)')
+    parser.add_argument('--by', action='append', choices=GROUP_KEYS, default=None,
+                        help='集計の単位（複数指定可、省略時はすべて）')
+    parser.add_argument('--pivot', nargs=2, choices=GROUP_KEYS, metavar=('ROWS', 'COLS'),
+                        help='NG件数のクロス集計（例: --pivot item month）')
+    parser.add_argument('--project', help='案件名')
+    parser.add_argument('--office', help='設計事務所')
+    parser.add_argument('--since', type=_parse_date, help='この日時以降（例: 2026-07-01）')
+    parser.add_argument('--until', type=_parse_date, help='この日時より前（例: 2026-10-01）')
+    args = parser.parse_args(argv)
+
+    columns = load_columns(ResultStore(args.db), since=args.since, until=args.until,
+                           project=args.project, office=args.office)
+    output = dashboard(columns, args.by or GROUP_KEYS)
+    if args.pivot:
+        output['pivot'] = pivot(columns, *args.pivot)
+    json.dump(output, sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
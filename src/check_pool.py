@@ -0,0 +1,320 @@
+"""
+Check Pool Module
+CPUを使うPDF解析・チェックを、同時実行数に上限のあるプロセスプールで実行する
+"""
+
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, List, Optional, Tuple
+
+from .pdf_parser import PDFParser
+from .ocr import OcrEngine
+from .checkers import CheckEngine, CheckResult
+from .result_cache import DEFAULT_CACHE_DIR, ResultCache, hash_bytes, hash_file
+from .timings import StageTimings
+
+
+# ワーカープロセス内で使い回すパーサーとエンジン
+_worker_parser: Optional[PDFParser] = None
+_worker_engine: Optional[CheckEngine] = None
+
+
+def _init_worker(cache_dir: Optional[str], memory_limit_mb: Optional[float] = None,
+                 ocr_backend: Optional[str] = None) -> None:
+    """ワーカープロセスの初期化（プロセスごとに1回、ocr_backend省略時はSOUKEN_OCR_BACKEND）"""
+    global _worker_parser, _worker_engine
+    cache = ResultCache(cache_dir) if cache_dir else None
+    _worker_parser = PDFParser(cache=cache, memory_limit_mb=memory_limit_mb,
+                               ocr=OcrEngine.from_env(cache, ocr_backend))
+    _worker_engine = CheckEngine(cache=cache)
+
+
+def check_pdf_bytes(data: bytes, file_name: str, rules: Optional[List[str]] = None
+                    ) -> Tuple[List[CheckResult], dict, StageTimings]:
+    """
+    PDFのバイト列を解析・チェックする（ワーカーで実行）
+
+    Args:
+        rules: 対象とするルールID（省略時は全ルール）。表題欄だけで判定できるルールのみなら
+            表題欄だけを抽出する
+
+    Returns:
+        Tuple[List[CheckResult], dict, StageTimings]: チェック結果、サマリー、段階ごとの処理時間
+    """
+    timings = StageTimings()
+    region = _worker_engine.extraction_region(rules)
+    drawing_data = _worker_parser.parse_bytes(data, file_name, timings=timings, region=region)
+    results = _worker_engine.check_all(drawing_data, timings, rules)
+    return results, _worker_engine.get_summary(results, timings), timings
+
+
+def check_pdf_path(pdf_path: str, rules: Optional[List[str]] = None, lazy: bool = False,
+                   use_mmap: bool = False) -> Tuple[List[CheckResult], dict, StageTimings, str]:
+    """
+    PDFファイルを解析・チェックする（ワーカーで実行）
+
+    Args:
+        rules: 対象とするルールID（省略時は全ルール）
+        lazy: Trueなら全項目の判定が確定した時点でページの抽出をやめる（CheckEngine.check_lazy）
+        use_mmap: Trueならメモリマップして読み込む（PDFParser.parse_mmap、lazy時は使わない）
+
+    Returns:
+        Tuple[List[CheckResult], dict, StageTimings, str]: チェック結果、サマリー、段階ごとの処理時間、
+            PDFのSHA-256
+    """
+    timings = StageTimings()
+    region = _worker_engine.extraction_region(rules)
+    if lazy:
+        with timings.stage('hash'):
+            file_hash = hash_file(pdf_path)
+        metadata = {}
+        with timings.stage('lazy_check'):
+            results, _ = _worker_engine.check_lazy(
+                _worker_parser.iter_pages(pdf_path, metadata, region),
+                file_path=pdf_path, metadata=metadata, file_hash=file_hash, rules=rules,
+                parser_version=_worker_parser.version, region=region
+            )
+    else:
+        parse = _worker_parser.parse_mmap if use_mmap else _worker_parser.parse
+        drawing_data = parse(pdf_path, timings=timings, region=region)
+        file_hash = drawing_data.file_hash
+        results = _worker_engine.check_all(drawing_data, timings, rules)
+    return results, _worker_engine.get_summary(results, timings), timings, file_hash
+
+
+def _check_bytes_by_page(data: bytes, file_name: str,
+                         on_page: Callable[[int, Optional[int], List[CheckResult]], None]
+                         ) -> Tuple[List[CheckResult], dict, StageTimings, Optional[int]]:
+    """
+    PDFのバイト列をページごとに解析・チェックし、ページを処理するたびに on_page を呼ぶ（ワーカーで実行）
+
+    Args:
+        on_page: (ページ番号, 総ページ数, このページで確定した指摘) を受け取る関数
+            （例外を送出すると解析を中止する）
+    """
+    timings = StageTimings()
+    with timings.stage('hash'):
+        file_hash = hash_bytes(data)
+    if _worker_engine.cache is not None:
+        cached = _worker_engine.cached_results(file_hash, _worker_parser.version)
+        timings.cache['results'] = 'miss' if cached is None else 'hit'
+        if cached is not None:
+            return cached, _worker_engine.get_summary(cached, timings), timings, None
+
+    metadata = {}
+    session = _worker_engine.start(file_name, metadata, file_hash, parser_version=_worker_parser.version)
+    pages = _worker_parser.iter_pages(data, metadata)
+    try:
+        with timings.stage('lazy_check'):
+            for page in pages:
+                on_page(page.page_number, metadata.get('num_pages'), session.feed(page))
+            results = session.finish()
+    finally:
+        pages.close()
+    num_pages = metadata.get('num_pages', len(session.drawing_data.pages))
+    return results, _worker_engine.get_summary(results, timings), timings, num_pages
+
+
+def check_pdf_bytes_progress(data: bytes, file_name: str, progress: Any, task_id: Any
+                             ) -> Tuple[List[CheckResult], dict, StageTimings, Optional[int]]:
+    """
+    PDFのバイト列をページごとに解析・チェックし、ページを処理するたびに進捗を送る（ワーカーで実行）
+
+    ページ単位の逐次チェック（CheckEngine.start）で全ページを判定するため、
+    ページ境界をまたぐ記載を除き結果は check_pdf_bytes() と同じになる
+
+    Args:
+        progress: (task_id, 処理済みページ数, 総ページ数) を受け取るキュー
+            （プロセス間で共有できるもの、multiprocessing.Manager().Queue()など）
+        task_id: 進捗の送り先を見分けるID
+
+    Returns:
+        Tuple[List[CheckResult], dict, StageTimings, Optional[int]]:
+            チェック結果、サマリー、段階ごとの処理時間、ページ数（キャッシュした結果を返した場合はNone）
+    """
+    return _check_bytes_by_page(
+        data, file_name, lambda page_number, num_pages, _: progress.put((task_id, page_number, num_pages))
+    )
+
+
+def check_pdf_bytes_events(data: bytes, file_name: str, events: Any, cancel: Any
+                           ) -> Tuple[List[CheckResult], dict, StageTimings, Optional[int]]:
+    """
+    PDFのバイト列をページごとに解析・チェックし、ページとそのページで確定した指摘を送る（ワーカーで実行）
+
+    Args:
+        events: (ページ番号, 総ページ数, 確定した指摘のリスト) を受け取るキュー
+            （プロセス間で共有できるもの、multiprocessing.Manager().Queue()など）
+        cancel: セットされたら次のページで解析をやめるイベント（multiprocessing.Manager().Event()など）
+
+    Returns:
+        check_pdf_bytes_progress() と同じ
+
+    Raises:
+        CheckCancelled: cancelがセットされて解析をやめた場合
+    """
+    def on_page(page_number: int, num_pages: Optional[int], findings: List[CheckResult]) -> None:
+        if cancel.is_set():
+            raise CheckCancelled(f"{file_name}: {page_number}ページ目で中止しました")
+        events.put((page_number, num_pages, findings))
+
+    return _check_bytes_by_page(data, file_name, on_page)
+
+
+class CheckCancelled(Exception):
+    """呼び出し側の依頼（クライアントの切断など）で解析を中止した"""
+
+
+class PoolFullError(Exception):
+    """同時実行数の上限に達している"""
+
+
+class CheckPool:
+    """同時実行数に上限のある解析・チェック用プール"""
+
+    def __init__(self, workers: Optional[int] = None, max_in_flight: Optional[int] = None,
+                 cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+                 memory_limit_mb: Optional[float] = None, ocr_backend: Optional[str] = None):
+        """
+        Args:
+            workers: ワーカープロセス数（省略時はCPU数）
+            max_in_flight: 同時に受け付ける最大件数（実行中+待機中、省略時はworkers）
+            cache_dir: ワーカーが使うディスクキャッシュ（Noneならキャッシュなし）
+            memory_limit_mb: ワーカー1つあたりのRSSの上限（MB、超えた文書は MemoryLimitExceeded）
+            ocr_backend: スキャンページのOCRバックエンド名（省略時はSOUKEN_OCR_BACKEND）
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or self.workers
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._initargs = (cache_dir, memory_limit_mb, ocr_backend)
+        self._executor = self._create_executor(self._initargs)
+
+    def _create_executor(self, initargs: tuple, workers: Optional[int] = None) -> Executor:
+        """プロセスプールを作成（サーバーレス環境などで使えなければスレッドプール）"""
+        workers = workers or self.workers
+        try:
+            return ProcessPoolExecutor(max_workers=workers,
+                                       initializer=_init_worker, initargs=initargs)
+        except (OSError, NotImplementedError) as e:
+            print(f"プロセスプールを作成できません（スレッドで実行します）: {e}")
+            return ThreadPoolExecutor(max_workers=workers,
+                                      initializer=_init_worker, initargs=initargs)
+
+    @property
+    def in_flight(self) -> int:
+        """実行中・待機中の件数"""
+        return self._in_flight
+
+    def try_submit(self, fn: Callable, *args, retry: bool = True) -> Future:
+        """
+        空きがあれば投入する
+
+        Args:
+            retry: ワーカーの異常終了に巻き込まれて失敗した場合に再実行するか
+                （途中経過を外部に送る処理など、2回実行すると困る場合はFalse）
+
+        Raises:
+            PoolFullError: 同時実行数の上限に達している場合
+        """
+        self.reserve()
+        return self._submit(fn, args, retry)
+
+    def submit(self, fn: Callable, *args, retry: bool = True) -> Future:
+        """空きができるまで待ってから投入する（バックグラウンドジョブ用、retryはtry_submit()と同じ）"""
+        self.reserve(blocking=True)
+        return self._submit(fn, args, retry)
+
+    def reserve(self, blocking: bool = False) -> None:
+        """
+        プール外で実行する処理（ストリーミングなど）のために枠を1つ確保する
+        処理が終わったら必ず release() を呼ぶこと
+
+        Raises:
+            PoolFullError: blocking=Falseで同時実行数の上限に達している場合
+        """
+        if not self._slots.acquire(blocking=blocking):
+            raise PoolFullError(f"同時実行数の上限（{self.max_in_flight}件）に達しています")
+        with self._lock:
+            self._in_flight += 1
+
+    def release(self) -> None:
+        """reserve() で確保した枠を返す"""
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def _submit(self, fn: Callable, args: tuple, retry: bool) -> Future:
+        """
+        投入して、結果を受け取るFutureを返す（完了したら枠を返す）
+
+        ワーカーが異常終了するとプール全体が BrokenProcessPool になり、その時点で実行中・待機中の
+        文書もすべて失敗する。共有のプールは作り直し、失敗した文書はそれぞれ専用のワーカー1つで
+        再実行するので、再実行でも異常終了した文書（原因の文書）だけが BrokenProcessPool で失敗する
+        """
+        future = Future()
+        executor = self._executor
+        try:
+            try:
+                inner = executor.submit(fn, *args)
+            except BrokenProcessPool:
+                executor = self._rebuild(executor)
+                inner = executor.submit(fn, *args)
+        except Exception:
+            self.release()
+            raise
+        future.add_done_callback(lambda _: self.release())
+        inner.add_done_callback(lambda inner: self._settle(future, inner, executor, fn, args, retry))
+        return future
+
+    def _settle(self, future: Future, inner: Future, executor: Executor,
+                fn: Callable, args: tuple, retry: bool, isolated: bool = False) -> None:
+        """
+        プール側のFutureの結果を転送する（ワーカーの異常終了で失敗した場合は作り直して再実行する）
+
+        Args:
+            isolated: executor が再実行用の専用プールか（終わったら停止する）
+        """
+        if isolated:
+            executor.shutdown(wait=False)
+        if future.done():
+            return
+        if inner.cancelled():
+            future.cancel()
+            return
+        error = inner.exception()
+        if isinstance(error, BrokenProcessPool):
+            if not isolated:
+                self._rebuild(executor)
+            if retry:
+                retry_executor = self._create_executor(self._initargs, workers=1)
+                try:
+                    retried = retry_executor.submit(fn, *args)
+                except Exception as e:
+                    retry_executor.shutdown(wait=False)
+                    error = e
+                else:
+                    retried.add_done_callback(lambda retried: self._settle(
+                        future, retried, retry_executor, fn, args, retry=False, isolated=True
+                    ))
+                    return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(inner.result())
+
+    def _rebuild(self, broken: Executor) -> Executor:
+        """壊れたプールを同じ初期化引数で作り直す（他のスレッドが作り直し済みならそれを使う）"""
+        with self._lock:
+            if self._executor is broken:
+                print("ワーカープロセスが異常終了したため、プロセスプールを作り直します")
+                self._executor = self._create_executor(self._initargs)
+                broken.shutdown(wait=False, cancel_futures=True)
+            return self._executor
+
+    def shutdown(self) -> None:
+        """プールを停止する"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -3,12 +3,25 @@ Check Engine Modules
 各種チェック機能を実装
 """
 
-import re
-from typing import List, Optional, Tuple
-from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from dataclasses import dataclass, replace
 from enum import Enum
 
-from .pdf_parser import DrawingData
+from .pdf_parser import PARSER_VERSION, REGION_SHEET, DrawingData, PageData
+from .document import DocumentContext, NormalizedPage
+from .word_index import WordIndex
+from .result_cache import ResultCache
+from .timings import StageTimings
+from .rule_matcher import MatchResult, Rule, RuleHit, RuleMatcher
+from .scheduler import RuleScheduler, ScheduleRun
+from .rule_registry import (
+    FindingSpec, RuleCategory, RuleRegistry, Ruleset, RuleSpec, get_default_registry
+)
+
+
+# 判定ロジック（RuleCheckerの判定方法）を変更したら上げる
+# ルール定義ファイルの内容はダイジェストでバージョンに含まれる
+RULESET_VERSION = "4"
 
 
 class CheckStatus(Enum):
@@ -38,342 +51,669 @@ class CheckResult:
     suggestion: Optional[str] = None  # 修正提案
 
 
-class RequiredItemsChecker:
-    """必須記載事項チェッカー"""
+class RuleChecker:
+    """
+    ルール定義ファイルの1カテゴリ分を判定するチェッカー
+    
+    記載が見つからない項目は定義の missing の指摘を、しきい値のある項目は
+    最初のヒットから取り出した値が上限を超えた場合に threshold の指摘を返す
+    """
+    
+    # 担当するカテゴリのID（ルール定義ファイルのcategories[].id）
+    CATEGORY_ID: Optional[str] = None
+    
+    def __init__(self, category: Optional[RuleCategory] = None, ruleset: Optional[Ruleset] = None):
+        """
+        Args:
+            category: 判定するカテゴリ（省略時はrulesetからCATEGORY_IDのカテゴリを使う）
+            ruleset: カテゴリを含むルールセット（省略時は既定のレジストリの最新版）
+        """
+        if ruleset is None:
+            ruleset = get_default_registry().current
+        if category is None:
+            category = ruleset.category(self.CATEGORY_ID)
+        self.ruleset = ruleset
+        self.spec = category
+        self.category = category.name
+        self.rules: Tuple[Rule, ...] = tuple(rule.to_rule() for rule in category.rules)
+        # ルールID -> (チェック項目名, 重要度)
+        self.items: Dict[str, Tuple[str, Importance]] = {
+            rule.rule_id: (rule.item, Importance(rule.importance)) for rule in category.rules
+        }
+        # 最初のヒットの値で判定するルール（優先度最上位のパターンが見つかるまで確定しない）
+        self.value_rules: Tuple[str, ...] = tuple(
+            rule.rule_id for rule in category.rules if rule.threshold is not None
+        )
+        # 遅延評価モードでも全ページを見るまで確定させないルール
+        self.full_coverage_rules: Tuple[str, ...] = tuple(
+            rule.rule_id for rule in category.rules if rule.full_coverage
+        )
+        # 単体で check() を呼ぶ場合の判定順（他のカテゴリの前提ルールは満たされているものとする）
+        self.scheduler = RuleScheduler(category.rules)
     
-    def __init__(self):
-        self.category = "必須記載事項"
+    @property
+    def matcher(self) -> RuleMatcher:
+        """このカテゴリだけのマッチャー（単体で check() を呼ぶ場合に使う）"""
+        return self.ruleset.category_matcher(self.spec.category_id)
     
-    def check(self, drawing_data: DrawingData) -> List[CheckResult]:
+    def check(self, drawing_data: DrawingData, matches: Optional[MatchResult] = None,
+              context: Optional[DocumentContext] = None) -> List[CheckResult]:
         """
-        必須記載事項をチェック
+        カテゴリの全項目をチェック
         
         Args:
             drawing_data: 図面データ
+            matches: 走査済みのルールヒット（context.textの位置、省略時はこのチェッカーで走査する）
+            context: 正規化済みのテキスト（省略時は drawing_data から作る）
             
         Returns:
             List[CheckResult]: チェック結果のリスト
         """
-        results = []
-        all_text = self._get_all_text(drawing_data)
-        
-        # 図面番号チェック
-        if not self._has_drawing_number(all_text):
-            results.append(CheckResult(
-                category=self.category,
-                item="図面番号",
-                status=CheckStatus.NG,
-                message="図面番号が記載されていません",
-                importance=Importance.REQUIRED,
-                suggestion="図面番号を明記してください（例: A-001, S-001）"
-            ))
-        
-        # 図面名チェック
-        if not self._has_drawing_name(all_text):
-            results.append(CheckResult(
-                category=self.category,
-                item="図面名",
-                status=CheckStatus.NG,
-                message="図面名が記載されていません",
-                importance=Importance.REQUIRED,
-                suggestion="図面名を明記してください（例: 1階平面図、立面図）"
-            ))
-        
-        # 縮尺チェック
-        scale = self._extract_scale(all_text)
-        if not scale:
-            results.append(CheckResult(
-                category=self.category,
-                item="縮尺",
-                status=CheckStatus.NG,
-                message="縮尺が記載されていません",
-                importance=Importance.REQUIRED,
-                suggestion="縮尺を明記してください（例: 1/100, 1/50）"
-            ))
-        
-        # 作成日チェック
-        if not self._has_creation_date(all_text):
-            results.append(CheckResult(
-                category=self.category,
-                item="作成日",
-                status=CheckStatus.WARNING,
-                message="作成日が明示されていない可能性があります",
-                importance=Importance.RECOMMENDED,
-                suggestion="作成日を明記してください"
-            ))
-        
-        # 作成者チェック
-        if not self._has_creator(all_text):
-            results.append(CheckResult(
-                category=self.category,
-                item="作成者",
-                status=CheckStatus.WARNING,
-                message="作成者が明示されていない可能性があります",
-                importance=Importance.RECOMMENDED,
-                suggestion="作成者名を明記してください"
-            ))
+        if context is None:
+            context = DocumentContext.from_drawing(drawing_data)
+        if matches is None:
+            matches = self.matcher.scan(context.text, first_only=True, lowered=context.folded)
+        run = self.scheduler.run(lambda rule: self._evaluate(rule, matches, context))
+        return [run.results[rule.rule_id] for rule in self.spec.rules
+                if run.results.get(rule.rule_id) is not None]
+    
+    def _evaluate(self, rule: RuleSpec, matches: MatchResult,
+                  context: DocumentContext) -> Optional[CheckResult]:
+        """1項目を判定する（問題がなければNone、ヒットに基づく指摘にはその位置を付ける）"""
+        if rule.threshold is None:
+            return None if matches.has(rule.rule_id) else self._finding(rule, rule.missing)
         
-        return results
-    
-    def _get_all_text(self, drawing_data: DrawingData) -> str:
-        """全ページのテキストを結合"""
-        return "\n".join(drawing_data.extracted_text.values())
-    
-    def _has_drawing_number(self, text: str) -> bool:
-        """図面番号の存在チェック"""
-        patterns = [
-            r'図面番号[:：]\s*[A-Z0-9\-]+',
-            r'図番[:：]\s*[A-Z0-9\-]+',
-            r'DWG\s*NO[:：]\s*[A-Z0-9\-]+',
-            r'[A-Z]\-\d{3,}',  # A-001形式
-            r'S\-\d{3,}',  # S-001形式
-        ]
-        for pattern in patterns:
-            if re.search(pattern, text, re.IGNORECASE):
-                return True
-        return False
-    
-    def _has_drawing_name(self, text: str) -> bool:
-        """図面名の存在チェック"""
-        patterns = [
-            r'図面名[:：]',
-            r'平面図',
-            r'立面図',
-            r'断面図',
-            r'詳細図',
-            r'配置図',
-        ]
-        for pattern in patterns:
-            if re.search(pattern, text):
-                return True
-        return False
-    
-    def _extract_scale(self, text: str) -> Optional[str]:
-        """縮尺を抽出"""
-        patterns = [
-            r'縮尺[:：]\s*1[/／]\d+',
-            r'SCALE[:：]\s*1[/／]\d+',
-            r'1[/／]\d+',
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                return match.group(0)
+        hit = matches.first(rule.rule_id)
+        value = self._extract_value(rule, hit)
+        if value is None:
+            return self._finding(rule, rule.missing, position=context.locate(hit))
+        if value > rule.threshold.max:
+            return self._finding(rule, rule.threshold.finding, value, context.locate(hit))
         return None
     
-    def _has_creation_date(self, text: str) -> bool:
-        """作成日の存在チェック"""
-        patterns = [
-            r'作成日[:：]\s*\d{4}[/年]\d{1,2}[/月]\d{1,2}[日]?',
-            r'作成日[:：]\s*\d{4}[-/]\d{1,2}[-/]\d{1,2}',
-            r'DATE[:：]\s*\d{4}[-/]\d{1,2}[-/]\d{1,2}',
-        ]
-        for pattern in patterns:
-            if re.search(pattern, text):
-                return True
-        return False
-    
-    def _has_creator(self, text: str) -> bool:
-        """作成者の存在チェック"""
-        patterns = [
-            r'作成者[:：]',
-            r'作成[:：]',
-            r'設計者[:：]',
-            r'DRAWN\s*BY[:：]',
-        ]
-        for pattern in patterns:
-            if re.search(pattern, text):
-                return True
-        return False
+    def _extract_value(self, rule: RuleSpec, hit: Optional[RuleHit]) -> Optional[int]:
+        """
+        パターン優先度順で最初のヒットから数値を取り出す
+
+        グループが一致しなかった（省略可能なグループの）ヒットや数値でない場合はNone
+        （first_only の走査では最初のヒットしか記録しないため、後続のヒットは見ない）
+        """
+        if hit is None:
+            return None
+        group = hit.groups[rule.threshold.group - 1]
+        if group is None:
+            return None
+        try:
+            return int(group)
+        except ValueError:
+            return None
+    
+    def _finding(self, rule: RuleSpec, finding: FindingSpec, value: Optional[int] = None,
+                 position: Tuple[Optional[int], Optional[Tuple[float, float]]] = (None, None)
+                 ) -> CheckResult:
+        """定義された指摘からチェック結果を作る（position は DocumentContext.locate() の戻り値）"""
+        message, suggestion = finding.message, finding.suggestion
+        if rule.threshold is not None:
+            fields = rule.threshold.fields(value)
+            message = message.format(**fields)
+            suggestion = suggestion.format(**fields) if suggestion else suggestion
+        return CheckResult(
+            category=self.category,
+            item=rule.item,
+            status=CheckStatus(finding.status),
+            message=message,
+            importance=Importance(finding.importance or rule.importance),
+            location=position[1],
+            page_number=position[0],
+            suggestion=suggestion
+        )
 
 
-class SoukenSpecificChecker:
+class RequiredItemsChecker(RuleChecker):
+    """必須記載事項チェッカー"""
+    
+    CATEGORY_ID = "required"
+
+
+class SoukenSpecificChecker(RuleChecker):
     """創建特有項目チェッカー"""
     
-    def __init__(self):
-        self.category = "創建特有項目"
+    CATEGORY_ID = "souken_specific"
+
+
+# カテゴリID -> 専用のチェッカークラス（それ以外のカテゴリはRuleCheckerで判定する）
+CHECKER_CLASSES = {
+    checker_class.CATEGORY_ID: checker_class
+    for checker_class in (RequiredItemsChecker, SoukenSpecificChecker)
+}
+
+
+class _CompiledChecks:
+    """1つのルールセットから作ったチェッカー一式（ルールセットの更新時に丸ごと差し替える）"""
     
-    def check(self, drawing_data: DrawingData) -> List[CheckResult]:
+    def __init__(self, ruleset: Ruleset):
+        """
+        Args:
+            ruleset: ルールセット
         """
-        創建特有項目をチェック
+        self.ruleset = ruleset
+        self.checkers: Tuple[RuleChecker, ...] = tuple(
+            CHECKER_CLASSES.get(category.category_id, RuleChecker)(category, ruleset)
+            for category in ruleset.categories
+        )
+        # ルールID -> 判定するチェッカー
+        self.owners: Dict[str, RuleChecker] = {
+            rule_id: checker for checker in self.checkers for rule_id in checker.items
+        }
+        # 全カテゴリをまとめた判定順（カテゴリをまたぐ前提ルールもここで解決する）
+        self.scheduler = RuleScheduler(
+            rule for category in ruleset.categories for rule in category.rules
+        )
+        self.version = f"{RULESET_VERSION}-{ruleset.version}-{ruleset.digest[:12]}"
+    
+    def select(self, results: List[CheckResult], rule_ids: Iterable[str],
+               skipped: Optional[Dict[str, Tuple[str, ...]]] = None) -> List[CheckResult]:
+        """
+        対象ルールのチェック項目の結果だけを残す
+        
+        Args:
+            results: 全ルールのチェック結果
+            rule_ids: 対象ルールのID
+            skipped: ScheduleRun.skipped（渡した場合、対象ルールの判定を止めた対象外の前提ルールの指摘も残す）
+        """
+        rule_ids = set(rule_ids)
+        if skipped:
+            rule_ids |= self.blocking(rule_ids, skipped)
+        items = {
+            checker.items[rule_id][0]
+            for checker in self.checkers for rule_id in checker.items if rule_id in rule_ids
+        }
+        return [result for result in results if result.item in items]
+    
+    @staticmethod
+    def blocking(rule_ids: Iterable[str], skipped: Dict[str, Tuple[str, ...]]) -> set:
+        """
+        ルールの判定を止めた（指摘のあった）前提ルールのID
+        
+        前提ルール自体が判定されなかった場合は、さらにその前提ルールをたどる
+        
+        Args:
+            rule_ids: ルールID
+            skipped: ScheduleRun.skipped
+        """
+        blockers = set()
+        seen = set()
+        pending = [rule_id for rule_id in rule_ids if rule_id in skipped]
+        while pending:
+            rule_id = pending.pop()
+            if rule_id in seen:
+                continue
+            seen.add(rule_id)
+            for required in skipped[rule_id]:
+                if required in skipped:
+                    pending.append(required)
+                else:
+                    blockers.add(required)
+        return blockers
+
+
+class CheckEngine:
+    """チェックエンジン（統合）"""
+    
+    def __init__(self, cache: Optional[ResultCache] = None,
+                 registry: Optional[RuleRegistry] = None):
+        """
+        Args:
+            cache: チェック結果のキャッシュ（同じPDFの再チェックを省略する）
+            registry: ルールの読み込み元（省略時はSOUKEN_RULES_PATHを監視する既定のレジストリ）
+        """
+        self.registry = registry if registry is not None else get_default_registry()
+        self.cache = cache
+        self._compiled = _CompiledChecks(self.registry.current)
+    
+    def _current(self) -> _CompiledChecks:
+        """最新のルールセットのチェッカー一式（ルール定義ファイルが更新されていれば差し替える）"""
+        compiled = self._compiled
+        ruleset = self.registry.current
+        if compiled.ruleset is not ruleset:
+            compiled = _CompiledChecks(ruleset)
+            self._compiled = compiled
+        return compiled
+    
+    @property
+    def ruleset(self) -> Ruleset:
+        """現在のルールセット"""
+        return self._current().ruleset
+    
+    @property
+    def ruleset_version(self) -> str:
+        """ルール定義から決まるバージョン文字列（ルールを変えるとキャッシュが無効になる）"""
+        return self._current().version
+    
+    @property
+    def checkers(self) -> Tuple[RuleChecker, ...]:
+        """カテゴリごとのチェッカー"""
+        return self._current().checkers
+    
+    @property
+    def matcher(self) -> RuleMatcher:
+        """全カテゴリのルールをまとめたマッチャー（文書全体を1回だけ走査する）"""
+        return self._current().ruleset.matcher
+    
+    @property
+    def required_checker(self) -> RequiredItemsChecker:
+        """必須記載事項チェッカー"""
+        return self._checker(RequiredItemsChecker.CATEGORY_ID)
+    
+    @property
+    def souken_checker(self) -> SoukenSpecificChecker:
+        """創建特有項目チェッカー"""
+        return self._checker(SoukenSpecificChecker.CATEGORY_ID)
+    
+    def _checker(self, category_id: str) -> RuleChecker:
+        for checker in self.checkers:
+            if checker.spec.category_id == category_id:
+                return checker
+        raise KeyError(f"カテゴリ '{category_id}' はルール定義にありません")
+    
+    def extraction_region(self, rules: Optional[Iterable[str]] = None) -> str:
+        """
+        対象ルールの判定に必要なテキストの抽出範囲（PDFParser.parseのregionに渡す）
+        
+        Args:
+            rules: 対象とするルールID（省略時は全ルール）
+        """
+        return self.ruleset.region(rules)
+    
+    def check_all(self, drawing_data: DrawingData,
+                  timings: Optional[StageTimings] = None,
+                  rules: Optional[Iterable[str]] = None) -> List[CheckResult]:
+        """
+        すべてのチェックを実行
         
         Args:
             drawing_data: 図面データ
+            timings: 渡した場合、走査とチェッカーごとの処理時間を記録する
+            rules: 対象とするルールID（省略時は全ルール、一部のルールだけの結果はキャッシュしない）
             
         Returns:
-            List[CheckResult]: チェック結果のリスト
+            List[CheckResult]: すべてのチェック結果
+            
+        Raises:
+            ValueError: 表題欄だけを抽出した図面データを、図面全体が必要なルールで判定しようとした場合
         """
-        results = []
-        all_text = self._get_all_text(drawing_data)
+        if timings is None:
+            timings = StageTimings()
+        compiled = self._current()
+        if rules is not None:
+            rules = set(rules)
+        if drawing_data.region != REGION_SHEET and compiled.ruleset.region(rules) != drawing_data.region:
+            raise ValueError(
+                f"図面データの抽出範囲（{drawing_data.region}）では判定できないルールが含まれています"
+            )
+        cache_key = None
+        if self.cache is not None and drawing_data.file_hash and rules is None:
+            cache_key = ResultCache.results_key(drawing_data.file_hash, compiled.version,
+                                                drawing_data.parser_version, drawing_data.region)
+            cached = self.cache.get(cache_key)
+            timings.cache['results'] = 'miss' if cached is None else 'hit'
+            if cached is not None:
+                return list(cached)
         
-        # 外断熱チェック
-        if not self._has_external_insulation_spec(all_text):
-            results.append(CheckResult(
-                category=self.category,
-                item="外断熱仕様",
-                status=CheckStatus.NG,
-                message="外断熱仕様が記載されていません",
-                importance=Importance.REQUIRED,
-                suggestion="創建基準: 外断熱仕様を明記してください"
-            ))
+        context = self.context(drawing_data, timings)
+        matches = MatchResult()
         
-        # 第一種換気システムチェック
-        if not self._has_first_class_ventilation(all_text):
-            results.append(CheckResult(
-                category=self.category,
-                item="第一種換気システム",
-                status=CheckStatus.NG,
-                message="第一種換気システムの記載がありません",
-                importance=Importance.REQUIRED,
-                suggestion="創建基準: 第一種換気システムの仕様を明記してください"
-            ))
+        def scan(wave: List[RuleSpec]) -> None:
+            # 前提ルールの段ごとに、判定するルールのパターンだけを走査する
+            rule_ids = {rule.rule_id for rule in wave}
+            with timings.stage('scan'):
+                found = compiled.ruleset.matcher.scan(
+                    context.text, first_only=True, lowered=context.folded,
+                    rule_ids=None if len(rule_ids) == len(compiled.owners) else rule_ids
+                )
+            matches.hits.update(found.hits)
         
-        # 釘ピッチチェック
-        nail_pitch = self._extract_nail_pitch(all_text)
-        if nail_pitch:
-            if nail_pitch > 150:
-                results.append(CheckResult(
-                    category=self.category,
-                    item="釘ピッチ",
-                    status=CheckStatus.NG,
-                    message=f"釘ピッチが{nail_pitch}mmです。創建基準は150mm以下です。",
-                    importance=Importance.REQUIRED,
-                    suggestion="創建基準: 釘ピッチを150mm以下に修正してください"
-                ))
-        else:
-            results.append(CheckResult(
-                category=self.category,
-                item="釘ピッチ",
-                status=CheckStatus.WARNING,
-                message="釘ピッチの記載が見つかりません",
-                importance=Importance.RECOMMENDED,
-                suggestion="創建基準: 釘ピッチを明記してください（基準: 150mm以下）"
-            ))
+        run = self._schedule(drawing_data, matches, timings, compiled, context, rules, prepare=scan)
+        results = self._collect(compiled, run)
+        if rules is not None:
+            # 対象外の前提ルールの指摘で判定しなかったルールも、その指摘で報告する
+            results = compiled.select(results, rules, run.skipped)
         
-        # 隠蔽部分の施工方法チェック
-        if not self._has_hidden_part_construction_method(all_text):
-            results.append(CheckResult(
-                category=self.category,
-                item="隠蔽部分の施工方法",
-                status=CheckStatus.WARNING,
-                message="隠蔽部分の施工方法が明記されていない可能性があります",
-                importance=Importance.RECOMMENDED,
-                suggestion="創建基準: 隠蔽部分の施工方法を明記し、写真記録を指示してください"
-            ))
+        if cache_key is not None:
+            self.cache.put(cache_key, results)
+        return list(results)
+    
+    def context(self, drawing_data: DrawingData,
+                timings: Optional[StageTimings] = None) -> DocumentContext:
+        """
+        図面1件分の正規化済みテキストを作る（全チェッカーで共有する）
         
-        return results
-    
-    def _get_all_text(self, drawing_data: DrawingData) -> str:
-        """全ページのテキストを結合"""
-        return "\n".join(drawing_data.extracted_text.values())
-    
-    def _has_external_insulation_spec(self, text: str) -> bool:
-        """外断熱仕様の存在チェック"""
-        patterns = [
-            r'外断熱',
-            r'外部断熱',
-            r'外側断熱',
-            r'EXTERNAL\s*INSULATION',
-        ]
-        for pattern in patterns:
-            if re.search(pattern, text, re.IGNORECASE):
-                return True
-        return False
-    
-    def _has_first_class_ventilation(self, text: str) -> bool:
-        """第一種換気システムの存在チェック"""
-        patterns = [
-            r'第一種換気',
-            r'1種換気',
-            r'第一種',
-            r'1ST\s*CLASS\s*VENTILATION',
-        ]
-        for pattern in patterns:
-            if re.search(pattern, text, re.IGNORECASE):
-                return True
-        return False
-    
-    def _extract_nail_pitch(self, text: str) -> Optional[int]:
-        """釘ピッチを抽出"""
-        patterns = [
-            r'釘ピッチ[:：]\s*(\d+)\s*mm',
-            r'釘間隔[:：]\s*(\d+)\s*mm',
-            r'NAIL\s*PITCH[:：]\s*(\d+)\s*mm',
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                try:
-                    return int(match.group(1))
-                except ValueError:
-                    continue
-        return None
+        Args:
+            drawing_data: 図面データ
+            timings: 渡した場合、正規化と連結の処理時間を記録する
+        """
+        if timings is None:
+            timings = StageTimings()
+        with timings.stage('normalize'):
+            context = DocumentContext.from_drawing(drawing_data)
+            context.folded  # 走査前に連結・小文字化まで済ませる
+        return context
+    
+    def _schedule(self, drawing_data: DrawingData, matches: MatchResult,
+                  timings: Optional[StageTimings] = None,
+                  compiled: Optional[_CompiledChecks] = None,
+                  context: Optional[DocumentContext] = None,
+                  rules: Optional[Iterable[str]] = None,
+                  prepare: Optional[Callable[[List[RuleSpec]], None]] = None) -> ScheduleRun:
+        """
+        スケジューラの順でルールを判定する
+        
+        前提ルールに指摘があったルールは判定せず、ScheduleRun.skippedに記録する。
+        判定時間はカテゴリごとに checker.<カテゴリID> へ加算する
+        
+        Args:
+            matches: ルールヒット（prepareを渡す場合は、prepareが段ごとに書き足す）
+            rules: 対象とするルールID（省略時は全ルール、前提ルールも判定する）
+            prepare: 段ごとに判定するルールを受け取り、matchesにそのルールのヒットを用意する関数
+                （省略時はmatchesを走査済みとして扱う）
+        """
+        if timings is None:
+            timings = StageTimings()
+        if compiled is None:
+            compiled = self._current()
+        if context is None:
+            context = DocumentContext.from_drawing(drawing_data)
+        
+        def evaluate(rule: RuleSpec) -> Optional[CheckResult]:
+            owner = compiled.owners[rule.rule_id]
+            with timings.stage(f"checker.{owner.spec.category_id}"):
+                return owner._evaluate(rule, matches, context)
+        
+        run = compiled.scheduler.run(evaluate, rules, prepare)
+        for rule_id, blocked in run.skipped.items():
+            timings.skipped[rule_id] = list(blocked)
+        return run
     
-    def _has_hidden_part_construction_method(self, text: str) -> bool:
-        """隠蔽部分の施工方法の存在チェック"""
-        patterns = [
-            r'隠蔽',
-            r'写真記録',
-            r'写真撮影',
-            r'HIDDEN\s*PART',
+    @staticmethod
+    def _collect(compiled: _CompiledChecks, run: ScheduleRun) -> List[CheckResult]:
+        """判定結果を指摘だけ定義順に並べる（判定順によらず同じ並びにする）"""
+        return [
+            run.results[rule.rule_id]
+            for checker in compiled.checkers for rule in checker.spec.rules
+            if run.results.get(rule.rule_id) is not None
         ]
-        for pattern in patterns:
-            if re.search(pattern, text, re.IGNORECASE):
-                return True
-        return False
-
-
-class CheckEngine:
-    """チェックエンジン（統合）"""
     
-    def __init__(self):
-        self.required_checker = RequiredItemsChecker()
-        self.souken_checker = SoukenSpecificChecker()
+    def cached_results(self, file_hash: str, parser_version: str = PARSER_VERSION,
+                       region: str = REGION_SHEET) -> Optional[List[CheckResult]]:
+        """
+        キャッシュ済みの全ルールのチェック結果（なければNone）
+        
+        Args:
+            file_hash: PDFのSHA-256
+            parser_version: 解析に使うPDFParserの版（PDFParser.version、OCRの設定を含む）
+            region: テキストの抽出範囲
+        """
+        if self.cache is None:
+            return None
+        cached = self.cache.get(ResultCache.results_key(file_hash, self.ruleset_version, parser_version, region))
+        return list(cached) if cached is not None else None
     
-    def check_all(self, drawing_data: DrawingData) -> List[CheckResult]:
+    def start(self, file_path: str = "", metadata: Optional[dict] = None,
+              file_hash: Optional[str] = None, rules: Optional[Iterable[str]] = None,
+              full_coverage: Iterable[str] = (), parser_version: str = PARSER_VERSION,
+              region: str = REGION_SHEET) -> "IncrementalCheck":
         """
-        すべてのチェックを実行
+        ページ単位の逐次チェックを開始する
         
         Args:
-            drawing_data: 図面データ
+            file_path: 図面のファイル名
+            metadata: 図面のメタデータ
+            file_hash: PDFのSHA-256（指定するとfinish時に結果をキャッシュする）
+            rules: 対象とするルールID（省略時は全ルール）
+            full_coverage: 全ページを見るまで確定させないルールID
+                （各チェッカーのfull_coverage_rulesに追加される）
+            parser_version: ページを抽出するPDFParserの版（PDFParser.version、キャッシュキーに含める）
+            region: ページの抽出範囲
             
         Returns:
-            List[CheckResult]: すべてのチェック結果
+            IncrementalCheck: feed()でページを渡し、finish()で最終結果を得るセッション
+        """
+        return IncrementalCheck(self, file_path, metadata if metadata is not None else {},
+                                file_hash, rules, full_coverage, parser_version, region)
+    
+    def check_lazy(self, pages: Iterable[PageData], file_path: str = "",
+                   metadata: Optional[dict] = None, file_hash: Optional[str] = None,
+                   rules: Optional[Iterable[str]] = None,
+                   full_coverage: Iterable[str] = (), parser_version: str = PARSER_VERSION,
+                   region: str = REGION_SHEET) -> Tuple[List[CheckResult], DrawingData]:
         """
-        results = []
+        ページを必要な分だけ取り出してチェックする（遅延評価モード）
         
-        # 必須記載事項チェック
-        results.extend(self.required_checker.check(drawing_data))
+        対象ルールがすべて確定した時点でページの取り出しをやめる。
+        PDFParser.iter_pages()を渡すと、残りのページは抽出されない
         
-        # 創建特有項目チェック
-        results.extend(self.souken_checker.check(drawing_data))
+        Args:
+            pages: ページのイテレータ（PDFParser.iter_pages()など）
+            file_path: 図面のファイル名
+            metadata: 図面のメタデータ
+            file_hash: PDFのSHA-256（全ルール対象時のみキャッシュを使う）
+            rules: 対象とするルールID（省略時は全ルール）
+            full_coverage: 全ページを見るまで確定させないルールID
+            parser_version: ページを抽出したPDFParserの版（PDFParser.version、キャッシュキーに含める）
+            region: ページの抽出範囲
+            
+        Returns:
+            Tuple[List[CheckResult], DrawingData]: チェック結果と、実際に抽出したページだけの図面データ
+        """
+        if rules is not None:
+            file_hash = None  # 一部のルールだけの結果はキャッシュしない
+        if file_hash:
+            cached = self.cached_results(file_hash, parser_version, region)
+            if cached is not None:
+                return cached, DrawingData(file_path, [], metadata or {}, {}, file_hash, region,
+                                           parser_version=parser_version)
         
-        return results
+        session = self.start(file_path, metadata, file_hash, rules, full_coverage, parser_version, region)
+        page_iter = iter(pages)
+        try:
+            for page in page_iter:
+                session.feed(page)
+                if session.is_complete:
+                    break
+        finally:
+            close = getattr(page_iter, 'close', None)
+            if close is not None:
+                close()
+        return session.finish(), session.drawing_data
     
-    def get_summary(self, results: List[CheckResult]) -> dict:
+    def get_summary(self, results: List[CheckResult],
+                    timings: Optional[StageTimings] = None) -> dict:
         """
         チェック結果のサマリーを取得
         
         Args:
             results: チェック結果のリスト
+            timings: 渡した場合、集計の処理時間を記録する
             
         Returns:
             dict: サマリー情報
         """
-        total = len(results)
-        ok_count = sum(1 for r in results if r.status == CheckStatus.OK)
-        ng_count = sum(1 for r in results if r.status == CheckStatus.NG)
-        warning_count = sum(1 for r in results if r.status == CheckStatus.WARNING)
-        
-        required_ng = sum(1 for r in results 
-                         if r.status == CheckStatus.NG and r.importance == Importance.REQUIRED)
+        if timings is None:
+            return self._summarize(results)
+        with timings.stage('summary'):
+            return self._summarize(results)
+    
+    def _summarize(self, results: List[CheckResult]) -> dict:
+        """チェック結果を集計する（結果を1回だけ走査する）"""
+        counts = {status: 0 for status in CheckStatus}
+        required_ng = 0
+        for r in results:
+            counts[r.status] += 1
+            if r.status == CheckStatus.NG and r.importance == Importance.REQUIRED:
+                required_ng += 1
         
         return {
-            'total': total,
-            'ok': ok_count,
-            'ng': ng_count,
-            'warning': warning_count,
+            'total': len(results),
+            'ok': counts[CheckStatus.OK],
+            'ng': counts[CheckStatus.NG],
+            'warning': counts[CheckStatus.WARNING],
             'required_ng': required_ng,
             'status': 'PASS' if required_ng == 0 else 'FAIL'
         }
 
+
+
+class IncrementalCheck:
+    """
+    ページを受け取るたびにルールを走査する逐次チェックのセッション
+    
+    ページ境界をまたぐ記載を除き、finish()の結果はcheck_all()と一致する
+    """
+    
+    def __init__(self, engine: CheckEngine, file_path: str, metadata: dict,
+                 file_hash: Optional[str], rules: Optional[Iterable[str]] = None,
+                 full_coverage: Iterable[str] = (), parser_version: str = PARSER_VERSION,
+                 region: str = REGION_SHEET):
+        self.engine = engine
+        self.drawing_data = DrawingData(
+            file_path=file_path,
+            pages=[],
+            metadata=metadata,
+            extracted_text={},
+            file_hash=file_hash,
+            region=region,
+            word_index=WordIndex(),
+            parser_version=parser_version
+        )
+        self.matches = MatchResult()
+        self._pages: List[NormalizedPage] = []  # 受け取ったページの正規化済みテキスト
+        # ルールID -> 記録済みヒットの最小パターンインデックス
+        self._resolved: Dict[str, int] = {}
+        self._settled: Set[str] = set()
+        self._offset = 0
+        # セッション中にルール定義が更新されても、開始時のルールセットで最後まで判定する
+        self._compiled = engine._current()
+        self._checkers = self._compiled.checkers
+        self._specs = {rule.rule_id: rule for rule in self._compiled.scheduler.rules}
+        all_rules = {rule_id for checker in self._checkers for rule_id in checker.items}
+        self._active: Set[str] = set(rules) if rules is not None else all_rules
+        self._full_coverage: Set[str] = set(full_coverage).union(
+            *(checker.full_coverage_rules for checker in self._checkers)
+        )
+        self._filter_items = rules is not None
+    
+    @property
+    def is_complete(self) -> bool:
+        """対象ルールがすべて確定し、残りのページを見ても結果が変わらないか"""
+        return self._active <= self._settled
+    
+    def feed(self, page: PageData) -> List[CheckResult]:
+        """
+        1ページ分を走査する
+        
+        Args:
+            page: ページデータ
+            
+        Returns:
+            List[CheckResult]: このページで結果が確定したチェック項目
+                （記載を確認できた項目はOK、値で判定する項目はその判定）
+        """
+        if self.drawing_data.pages:
+            self._offset += 1  # check_allと同じく改行で連結した位置に合わせる
+        self.drawing_data.word_index.add_page(page.page_number, page.text, page.words)
+        self.drawing_data.pages.append(replace(page, words=None))
+        self.drawing_data.extracted_text[page.page_number] = page.text
+        normalized = NormalizedPage.from_text(page.page_number, page.text)
+        self._pages.append(normalized)
+        
+        page_matches = self._compiled.ruleset.matcher.scan(
+            normalized.text, first_only=True, resolved=self._resolved
+        )
+        for rule_id, hits in page_matches.hits.items():
+            self.matches.hits.setdefault(rule_id, []).extend(
+                replace(hit, start=hit.start + self._offset, end=hit.end + self._offset)
+                for hit in hits
+            )
+        self._offset += len(normalized.text)
+        
+        return self._newly_settled(page.page_number)
+    
+    def _context(self) -> DocumentContext:
+        """ここまでに受け取ったページの正規化済みテキスト"""
+        return DocumentContext(tuple(self._pages), self.drawing_data.word_index)
+    
+    def _is_final(self, rule_id: str) -> bool:
+        """ルールの判定が残りのページで変わらないか（前提ルールもすべて確定している場合のみ）"""
+        if rule_id not in self._resolved or rule_id in self._full_coverage:
+            return False
+        if rule_id in self._compiled.owners[rule_id].value_rules and self._resolved[rule_id] != 0:
+            return False
+        return all(self._is_final(required) for required in self._specs[rule_id].requires)
+    
+    def _newly_settled(self, page_number: int) -> List[CheckResult]:
+        """このページで確定したルールの結果を返す"""
+        settled = []
+        provisional = None
+        context = None
+        run = None
+        for checker in self._checkers:
+            for rule_id, (item, importance) in checker.items.items():
+                if rule_id in self._settled or rule_id not in self._active:
+                    continue
+                if not self._is_final(rule_id):
+                    continue
+                self._settled.add(rule_id)
+                
+                if provisional is None:
+                    context = self._context()
+                    run = self.engine._schedule(
+                        self.drawing_data, self.matches, compiled=self._compiled, context=context
+                    )
+                    provisional = self.engine._collect(self._compiled, run)
+                if rule_id in run.skipped:
+                    # 前提ルールに指摘があるため判定しない（前提ルール側の指摘で報告する）。
+                    # 前提ルールが対象外なら、ここでその指摘を返す
+                    for blocker in self._compiled.blocking((rule_id,), run.skipped) - self._settled:
+                        self._settled.add(blocker)
+                        blocker_item = self._compiled.owners[blocker].items[blocker][0]
+                        finding = next((r for r in provisional if r.item == blocker_item), None)
+                        if finding is not None:
+                            settled.append(replace(finding, page_number=finding.page_number or page_number))
+                    continue
+                finding = next((r for r in provisional if r.item == item), None)
+                if finding is not None:
+                    settled.append(replace(finding, page_number=finding.page_number or page_number))
+                else:
+                    hit_page, location = context.locate(self.matches.first(rule_id))
+                    settled.append(CheckResult(
+                        category=checker.category,
+                        item=item,
+                        status=CheckStatus.OK,
+                        message=f"{item}の記載を確認しました",
+                        importance=importance,
+                        location=location,
+                        page_number=hit_page or page_number
+                    ))
+        return settled
+    
+    def finish(self) -> List[CheckResult]:
+        """
+        全ページ受け取り後の最終結果を返す
+        
+        Returns:
+            List[CheckResult]: check_all()と同じ形式のチェック結果
+        """
+        run = self.engine._schedule(
+            self.drawing_data, self.matches, compiled=self._compiled, context=self._context(),
+            rules=self._active if self._filter_items else None
+        )
+        results = self.engine._collect(self._compiled, run)
+        if self._filter_items:
+            return self._compiled.select(results, self._active, run.skipped)
+        if self.engine.cache is not None and self.drawing_data.file_hash:
+            self.engine.cache.put(
+                ResultCache.results_key(self.drawing_data.file_hash, self._compiled.version,
+                                        self.drawing_data.parser_version, self.drawing_data.region),
+                results
+            )
+        return list(results)
@@ -0,0 +1,220 @@
+"""
+Document Context Module
+チェッカー全体で共有する、1図面分の正規化済みテキストとページ位置の対応表
+"""
+
+import re
+import unicodedata
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+from typing import Iterable, Optional, Tuple
+
+from .rule_matcher import RuleHit, fold_case
+from .word_index import WordIndex
+
+
+# テキストの正規化形式（全角英数字・記号を半角に、半角カナを全角にそろえる）
+NORMALIZATION_FORM = "NFKC"
+
+
+@lru_cache(maxsize=None)
+def _is_nonstarter(char: str) -> bool:
+    """正規化すると直前の文字と結合し得る文字か（半角カナの濁点・結合文字など）"""
+    normalized = unicodedata.normalize(NORMALIZATION_FORM, char)
+    return bool(normalized) and unicodedata.combining(normalized[0]) != 0
+
+
+@lru_cache(maxsize=1)
+def _unstable_chars() -> "re.Pattern":
+    """
+    正規化で変わり得る文字の文字クラス（初回に1度だけ作る）
+
+    基本多言語面は1文字ずつ判定し、それ以外の面はまとめて候補とする
+    """
+    ranges = []
+    for code in range(0x80, 0x10000):
+        char = chr(code)
+        if 0xD800 <= code <= 0xDFFF:
+            continue
+        if unicodedata.is_normalized(NORMALIZATION_FORM, char) and unicodedata.combining(char) == 0 \
+                and not 0x1160 <= code <= 0x11FF:  # ハングル字母は前の字母と合成される
+            continue
+        if ranges and ranges[-1][1] == code - 1:
+            ranges[-1][1] = code
+        else:
+            ranges.append([code, code])
+    parts = [re.escape(chr(start)) if start == end else f"{re.escape(chr(start))}-{re.escape(chr(end))}"
+             for start, end in ranges]
+    return re.compile("[" + "".join(parts) + "\U00010000-\U0010FFFF]")
+
+
+@dataclass(frozen=True)
+class NormalizedPage:
+    """
+    1ページ分の正規化済みテキスト
+
+    正規化で文字数が変わった箇所（"㎜" -> "mm"、"ｶﾞ" -> "ガ" など）だけを区間として持ち、
+    それ以外の位置は区間の前後の差分から元のテキストの位置に戻す
+    """
+    page_number: int
+    text: str
+    raw_length: int
+    # 文字数が変わった区間の、正規化後の [開始, 終了) と元テキストの [開始, 終了)
+    norm_starts: array
+    norm_ends: array
+    raw_starts: array
+    raw_ends: array
+
+    @classmethod
+    def from_text(cls, page_number: int, raw: str) -> "NormalizedPage":
+        """
+        ページのテキストを正規化する
+
+        正規化で変わり得る文字の周辺（結合する前後の文字を含む）だけを正規化し、
+        残りはそのまま連結する（ASCIIだけのページなどは走査もしない）
+        """
+        norm_starts, norm_ends = array('l'), array('l')
+        raw_starts, raw_ends = array('l'), array('l')
+        if raw.isascii() or unicodedata.is_normalized(NORMALIZATION_FORM, raw):
+            return cls(page_number, raw, len(raw), norm_starts, norm_ends, raw_starts, raw_ends)
+
+        pieces = []
+        position = 0  # 処理済みの元テキストの位置
+        length = 0  # 正規化後のテキストの長さ
+        for match in _unstable_chars().finditer(raw):
+            start = match.start()
+            if start < position:
+                continue  # 前の区間に含めた文字
+            while start > position and _is_nonstarter(raw[start]):
+                start -= 1  # 結合先の文字から正規化する
+            end = match.end()
+            while end < len(raw) and _is_nonstarter(raw[end]):
+                end += 1
+            pieces.append(raw[position:start])
+            length += start - position
+            normalized = unicodedata.normalize(NORMALIZATION_FORM, raw[start:end])
+            pieces.append(normalized)
+            if len(normalized) != end - start:
+                norm_starts.append(length)
+                norm_ends.append(length + len(normalized))
+                raw_starts.append(start)
+                raw_ends.append(end)
+            length += len(normalized)
+            position = end
+        pieces.append(raw[position:])
+        return cls(page_number, "".join(pieces), len(raw), norm_starts, norm_ends, raw_starts, raw_ends)
+
+    def raw_offset(self, offset: int, end: bool = False) -> int:
+        """
+        正規化後のページ内の位置を、元のテキストの位置に戻す
+
+        Args:
+            offset: 正規化後の位置
+            end: Trueなら範囲の終了位置として扱う（区間の途中なら区間の終わりに丸める）
+        """
+        if not self.norm_starts:
+            return offset
+        probe = offset - 1 if end else offset
+        index = bisect_right(self.norm_starts, probe) - 1
+        if index < 0:
+            return offset
+        if probe < self.norm_ends[index]:
+            return self.raw_ends[index] if end else self.raw_starts[index]
+        return self.raw_ends[index] + (offset - self.norm_ends[index])
+
+
+@dataclass(frozen=True)
+class DocumentContext:
+    """
+    1図面分のチェック用テキスト（作成後は変更しない）
+
+    ページの正規化済みテキストを改行で連結したものを全チェッカーで共有し、
+    ルールのヒット位置からページ番号・図面上の位置を二分探索で求める
+    """
+    pages: Tuple[NormalizedPage, ...]
+    word_index: Optional[WordIndex] = None
+
+    @classmethod
+    def from_texts(cls, texts: Iterable[Tuple[int, str]],
+                   word_index: Optional[WordIndex] = None) -> "DocumentContext":
+        """
+        ページ番号とテキストの並び（連結する順）から作る
+
+        Args:
+            texts: (ページ番号, 抽出したテキスト) の並び
+            word_index: 単語の位置索引（元のテキストの位置で引く）
+        """
+        return cls(tuple(NormalizedPage.from_text(number, text) for number, text in texts), word_index)
+
+    @classmethod
+    def from_drawing(cls, drawing_data) -> "DocumentContext":
+        """図面データ（extracted_textの順）から作る"""
+        return cls.from_texts(drawing_data.extracted_text.items(), drawing_data.word_index)
+
+    @cached_property
+    def text(self) -> str:
+        """正規化済みの全ページのテキスト（改行で連結）"""
+        return "\n".join(page.text for page in self.pages)
+
+    @cached_property
+    def folded(self) -> str:
+        """小文字化したテキスト（文字位置はtextと同じ、大文字小文字を区別しない照合用）"""
+        return fold_case(self.text)
+
+    @cached_property
+    def page_starts(self) -> array:
+        """各ページのtext内の開始位置"""
+        return self._starts(len(page.text) for page in self.pages)
+
+    @cached_property
+    def raw_page_starts(self) -> array:
+        """各ページの、元のテキストを改行で連結したもの（単語の位置索引の座標系）での開始位置"""
+        return self._starts(page.raw_length for page in self.pages)
+
+    @staticmethod
+    def _starts(lengths: Iterable[int]) -> array:
+        starts = array('l')
+        position = 0
+        for length in lengths:
+            starts.append(position)
+            position += length + 1
+        return starts
+
+    def _page_index(self, offset: int) -> int:
+        return max(bisect_right(self.page_starts, offset) - 1, 0)
+
+    def page_at(self, offset: int) -> Optional[int]:
+        """textの位置が含まれるページ番号（ページがなければNone）"""
+        if not self.pages:
+            return None
+        return self.pages[self._page_index(offset)].page_number
+
+    def raw_span(self, start: int, end: int) -> Tuple[int, int]:
+        """textの範囲 [start, end) を元のテキストの範囲に戻す"""
+        first = self._page_index(start)
+        last = self._page_index(max(end - 1, start))
+        raw_start = self.raw_page_starts[first] + \
+            self.pages[first].raw_offset(start - self.page_starts[first])
+        raw_end = self.raw_page_starts[last] + \
+            self.pages[last].raw_offset(end - self.page_starts[last], end=True)
+        return raw_start, raw_end
+
+    def locate(self, hit: Optional[RuleHit]
+               ) -> Tuple[Optional[int], Optional[Tuple[float, float]]]:
+        """
+        ルールのヒットのページと図面上の位置（左上、pt）
+
+        Returns:
+            Tuple[Optional[int], Optional[Tuple[float, float]]]: (ページ番号, (x, y))。
+                単語の位置情報がなければ位置はNone（ページ番号はテキストの位置から求める）
+        """
+        if hit is None or not self.pages:
+            return None, None
+        if self.word_index is not None:
+            located = self.word_index.locate(*self.raw_span(hit.start, hit.end))
+            if located is not None:
+                page_number, bbox = located
+                return page_number, (round(bbox[0], 2), round(bbox[1], 2))
+        return self.page_at(hit.start), None
@@ -0,0 +1,368 @@
+"""
+Job Queue Module
+図面チェックをジョブとして受け付け、バックグラウンドのワーカーで処理する
+ジョブの状態はSQLiteに保存する
+"""
+
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+import traceback
+from contextlib import contextmanager
+from pathlib import Path
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional
+from dataclasses import dataclass
+
+from .user_dirs import USER_DATA_DIR, prepare_private_dir
+
+
+# ジョブ保存ディレクトリの既定値（環境変数で変更可能、既定はユーザーごとのデータディレクトリ）
+DEFAULT_JOBS_DIR = os.environ.get('SOUKEN_JOBS_DIR', os.path.join(USER_DATA_DIR, 'jobs'))
+
+# 実行中のジョブの生存通知（heartbeat_at の更新）の間隔（秒）
+HEARTBEAT_INTERVAL = 10.0
+
+# この秒数だけ生存通知のない実行中ジョブは、処理していたプロセスが落ちたものとして待機中に戻す
+STALE_AFTER = 60.0
+
+
+class JobStatus:
+    """ジョブのステータス"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+@dataclass
+class Job:
+    """ジョブ1件"""
+    job_id: str
+    file_name: str
+    pdf_path: str  # アップロードされたPDFの保存先
+    status: str
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        """APIレスポンス用の辞書"""
+        return {
+            'job_id': self.job_id,
+            'file_name': self.file_name,
+            'status': self.status,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'result': self.result,
+            'error': self.error,
+        }
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec='seconds')
+
+
+def _new_owner_id() -> str:
+    """ジョブを実行するプロセスのID（ホスト名:PID:乱数）"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def _owner_is_dead(owner: Optional[str]) -> bool:
+    """ジョブの所有者が同じホストの終了したプロセスか（他のホストは生存通知で判断する）"""
+    if not owner:
+        return False
+    host, _, rest = owner.partition(':')
+    pid = rest.partition(':')[0]
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    if int(pid) == os.getpid():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        return False  # 権限がない（別ユーザーのプロセス）場合は生きている
+    return False
+
+
+class JobStore:
+    """
+    SQLiteに保存するジョブストア
+
+    同じデータベースを複数のプロセス（uvicornのワーカーなど）で共有できる。
+    ジョブの取り出しは BEGIN IMMEDIATE のトランザクションで行い、実行中のジョブには
+    取り出したプロセス（owner）と最終生存通知時刻（heartbeat_at）を記録する
+    """
+
+    def __init__(self, jobs_dir: str = DEFAULT_JOBS_DIR, owner_id: Optional[str] = None):
+        """
+        Args:
+            jobs_dir: データベースとアップロードファイルの保存ディレクトリ
+                （アップロードされた図面を置くため、自分だけが使えるディレクトリにする）
+            owner_id: このプロセスのID（省略時はホスト名・PIDから作る）
+
+        Raises:
+            PermissionError: jobs_dir またはアップロード用のディレクトリを他のユーザーが所有している、
+                または書き込める場合
+        """
+        self.owner_id = owner_id or _new_owner_id()
+        self.jobs_dir = Path(jobs_dir)
+        self.uploads_dir = self.jobs_dir / 'uploads'
+        prepare_private_dir(self.jobs_dir)
+        prepare_private_dir(self.uploads_dir)
+        self.db_path = self.jobs_dir / 'jobs.sqlite3'
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    file_name TEXT NOT NULL,
+                    pdf_path TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    started_at TEXT,
+                    finished_at TEXT,
+                    result TEXT,
+                    error TEXT,
+                    owner TEXT,
+                    heartbeat_at REAL
+                )
+            """)
+            # 以前の版で作ったテーブルには所有者と生存通知の列を追加する
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, column_type in (('owner', 'TEXT'), ('heartbeat_at', 'REAL')):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """トランザクション付きの接続（ブロックを抜けるとコミットして閉じる）"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def new_upload_path(self) -> str:
+        """アップロードファイルの保存先を払い出す"""
+        return str(self.uploads_dir / f"{uuid.uuid4().hex}.pdf")
+
+    def create(self, file_name: str, pdf_path: str) -> Job:
+        """
+        ジョブを登録する
+
+        Args:
+            file_name: 元のファイル名
+            pdf_path: 保存済みPDFのパス
+
+        Returns:
+            Job: 登録されたジョブ
+        """
+        job = Job(
+            job_id=uuid.uuid4().hex,
+            file_name=file_name,
+            pdf_path=pdf_path,
+            status=JobStatus.QUEUED,
+            created_at=_now()
+        )
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (job_id, file_name, pdf_path, status, created_at) VALUES (?, ?, ?, ?, ?)",
+                (job.job_id, job.file_name, job.pdf_path, job.status, job.created_at)
+            )
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """ジョブを取得する（なければNone）"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._to_job(row) if row else None
+
+    def claim_next(self) -> Optional[Job]:
+        """
+        待機中で最も古いジョブを実行中にして返す（なければNone）
+
+        書き込みロックを先に取る（BEGIN IMMEDIATE）ため、複数のプロセスが同時に呼んでも
+        同じジョブを取り出すことはない
+        """
+        with self._lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+                (JobStatus.QUEUED,)
+            ).fetchone()
+            if row is None:
+                return None
+            started_at = _now()
+            conn.execute(
+                "UPDATE jobs SET status = ?, started_at = ?, owner = ?, heartbeat_at = ? "
+                "WHERE job_id = ? AND status = ?",
+                (JobStatus.RUNNING, started_at, self.owner_id, time.time(), row['job_id'], JobStatus.QUEUED)
+            )
+        job = self._to_job(row)
+        job.status = JobStatus.RUNNING
+        job.started_at = started_at
+        return job
+
+    def complete(self, job_id: str, result: dict) -> None:
+        """ジョブを完了にする（他のプロセスに引き継がれたジョブは更新しない）"""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, result = ? "
+                "WHERE job_id = ? AND status = ? AND owner = ?",
+                (JobStatus.COMPLETED, _now(), json.dumps(result, ensure_ascii=False),
+                 job_id, JobStatus.RUNNING, self.owner_id)
+            )
+
+    def fail(self, job_id: str, error: str) -> None:
+        """ジョブを失敗にする（他のプロセスに引き継がれたジョブは更新しない）"""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, error = ? "
+                "WHERE job_id = ? AND status = ? AND owner = ?",
+                (JobStatus.FAILED, _now(), error, job_id, JobStatus.RUNNING, self.owner_id)
+            )
+
+    def heartbeat(self) -> None:
+        """このプロセスが実行中のジョブの生存通知時刻を更新する"""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE status = ? AND owner = ?",
+                (time.time(), JobStatus.RUNNING, self.owner_id)
+            )
+
+    def requeue_abandoned(self, stale_after: float = STALE_AFTER) -> int:
+        """
+        処理していたプロセスが終了した実行中ジョブを待機中に戻す
+
+        所有者が同じホストの終了したプロセスのジョブと、stale_after秒以上生存通知のないジョブ
+        （所有者の記録がない以前の版のジョブを含む）が対象。他のプロセスが処理中のジョブはそのまま
+
+        Returns:
+            int: 待機中に戻したジョブ数
+        """
+        deadline = time.time() - stale_after
+        with self._lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT job_id, owner, heartbeat_at FROM jobs WHERE status = ? AND owner IS NOT ?",
+                (JobStatus.RUNNING, self.owner_id)
+            ).fetchall()
+            abandoned = [
+                row['job_id'] for row in rows
+                if row['heartbeat_at'] is None or row['heartbeat_at'] < deadline or _owner_is_dead(row['owner'])
+            ]
+            conn.executemany(
+                "UPDATE jobs SET status = ?, started_at = NULL, owner = NULL, heartbeat_at = NULL "
+                "WHERE job_id = ? AND status = ?",
+                [(JobStatus.QUEUED, job_id, JobStatus.RUNNING) for job_id in abandoned]
+            )
+        return len(abandoned)
+
+    def count_by_status(self) -> Dict[str, int]:
+        """ステータスごとのジョブ件数"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def _to_job(self, row: sqlite3.Row) -> Job:
+        return Job(
+            job_id=row['job_id'],
+            file_name=row['file_name'],
+            pdf_path=row['pdf_path'],
+            status=row['status'],
+            created_at=row['created_at'],
+            started_at=row['started_at'],
+            finished_at=row['finished_at'],
+            result=json.loads(row['result']) if row['result'] else None,
+            error=row['error']
+        )
+
+
+class JobRunner:
+    """ジョブストアから順にジョブを取り出して処理するワーカー群"""
+
+    def __init__(self, store: JobStore, process: Callable[[Job], dict],
+                 workers: int = 2, poll_interval: float = 0.5,
+                 heartbeat_interval: float = HEARTBEAT_INTERVAL):
+        """
+        Args:
+            store: ジョブストア
+            process: ジョブを処理して結果の辞書を返す関数
+            workers: ワーカースレッド数（同時に処理するジョブ数）
+            poll_interval: 待機中ジョブがないときのポーリング間隔（秒）
+            heartbeat_interval: 実行中ジョブの生存通知と、中断されたジョブの確認の間隔（秒）
+        """
+        self.store = store
+        self.process = process
+        self.workers = max(1, workers)
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+
+    def start(self) -> None:
+        """ワーカーを起動する（処理していたプロセスが終了したジョブは待機中に戻す）"""
+        if self._threads:
+            return
+        self.store.requeue_abandoned()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        thread = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """ワーカーを停止する"""
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def notify(self) -> None:
+        """新しいジョブが登録されたことをワーカーに知らせる"""
+        self._wakeup.set()
+
+    def _heartbeat(self) -> None:
+        """実行中ジョブの生存通知を送り、他のプロセスが中断したジョブを待機中に戻す"""
+        while not self._stop.wait(self.heartbeat_interval):
+            try:
+                self.store.heartbeat()
+                if self.store.requeue_abandoned():
+                    self._wakeup.set()
+            except Exception as e:
+                print(f"ジョブの生存通知エラー: {e}")
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            job = self.store.claim_next()
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            try:
+                self.store.complete(job.job_id, self.process(job))
+            except Exception as e:
+                print(f"ジョブ処理エラー ({job.job_id}): {e}\n{traceback.format_exc()}")
+                self.store.fail(job.job_id, str(e))
+            finally:
+                try:
+                    os.unlink(job.pdf_path)
+                except OSError:
+                    pass
@@ -3,13 +3,29 @@
 コマンドラインから実行可能
 """
 
+import os
 import sys
+import glob
 import argparse
 import json
+import time
+from concurrent.futures import as_completed
 from pathlib import Path
+from typing import List, Optional
 
-from .pdf_parser import PDFParser
-from .checkers import CheckEngine, CheckStatus, Importance
+from .pdf_parser import REGION_TITLE_BLOCK, PDFParser
+from .checkers import CheckEngine, CheckResult, CheckStatus, Importance
+from .result_cache import DEFAULT_CACHE_DIR, ResultCache, hash_file
+from .check_pool import CheckPool, check_pdf_path
+from .timings import StageTimings
+from .ocr import BACKENDS, OcrEngine
+from .rule_registry import get_default_registry
+from .results_store import CheckRecord, ResultStore, DEFAULT_RESULTS_DB
+from .reports import ReportWriter, open_report
+
+
+# 一括チェックで結果をまとめて保存するファイル数
+_STORE_BATCH = 100
 
 
 def format_result(result) -> dict:
@@ -21,45 +37,331 @@ def format_result(result) -> dict:
         'message': result.message,
         'importance': result.importance.value,
         'page_number': result.page_number,
+        'location': list(result.location) if result.location else None,
         'suggestion': result.suggestion
     }
 
 
+def format_location(result: CheckResult) -> str:
+    """指摘のページと図面上の位置（左上からのpt）を表示用の文字列にする"""
+    if result.location is None:
+        return f"{result.page_number}ページ"
+    return f"{result.page_number}ページ (x={result.location[0]:.0f}, y={result.location[1]:.0f})"
+
+
+def expand_inputs(inputs: List[str]) -> List[Path]:
+    """
+    コマンドライン引数（ファイル・ディレクトリ・globパターン）をPDFファイルの一覧に展開
+    
+    Args:
+        inputs: コマンドラインで指定されたパスやパターン
+        
+    Returns:
+        List[Path]: 重複を除いたPDFファイルのパス（指定順）
+    """
+    paths = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            paths.extend(sorted(p for p in path.rglob('*') if p.suffix.lower() == '.pdf'))
+        elif path.exists():
+            paths.append(path)
+        elif glob.has_magic(item):
+            for match in sorted(glob.glob(item, recursive=True)):
+                match_path = Path(match)
+                if match_path.is_dir():
+                    paths.extend(sorted(p for p in match_path.rglob('*') if p.suffix.lower() == '.pdf'))
+                elif match_path.suffix.lower() == '.pdf':
+                    paths.append(match_path)
+        else:
+            print(f"警告: ファイルが見つかりません: {item}", file=sys.stderr)
+    
+    unique = {}
+    for path in paths:
+        unique.setdefault(path.resolve(), path)
+    return list(unique.values())
+
+
+def run_batch(pdf_paths: List[Path], jobs: int, output_path: Optional[str] = None,
+              use_cache: bool = True, include_timings: bool = False,
+              memory_limit_mb: Optional[float] = None,
+              rules: Optional[List[str]] = None, ocr_backend: Optional[str] = None,
+              store: Optional[ResultStore] = None, project: Optional[str] = None,
+              office: Optional[str] = None, report: Optional[ReportWriter] = None,
+              lazy: bool = False, use_mmap: bool = False) -> int:
+    """
+    複数のPDFをプロセスプールでチェックし、1ファイル1行のJSONを出力する
+    
+    1ファイルの失敗（破損PDFなど）はそのファイルのエラー行として記録し、処理を続ける
+    
+    Args:
+        pdf_paths: チェックするPDFファイル
+        jobs: 並列に処理するプロセス数
+        output_path: JSON Linesの保存先（省略時は標準出力）
+        use_cache: 結果キャッシュを使うか
+        include_timings: 各行に段階ごとの処理時間（timings）を含めるか
+        memory_limit_mb: ワーカー1つあたりのRSSの上限（MB、超えたファイルはエラー行になる）
+        rules: 対象とするルールID（省略時は全ルール）
+        ocr_backend: スキャンページのOCRバックエンド名（省略時はSOUKEN_OCR_BACKEND）
+        store: 渡した場合、チェック結果を_STORE_BATCH件ずつまとめて保存する
+        project: 保存する結果に付ける案件名
+        office: 保存する結果に付ける設計事務所
+        report: 渡した場合、完了したファイルから順に報告書へ書き出す（閉じるのは呼び出し側）
+        lazy: 全項目の判定が確定した時点でページの抽出をやめるか
+        use_mmap: PDFをメモリマップして読み込むか
+        
+    Returns:
+        int: 終了コード（失敗したファイルがあれば1）
+    """
+    totals = {'files': len(pdf_paths), 'pass': 0, 'fail': 0, 'error': 0,
+              'ok': 0, 'ng': 0, 'warning': 0, 'required_ng': 0}
+    out = open(output_path, 'w', encoding='utf-8') if output_path else sys.stdout
+    ruleset_version = CheckEngine().ruleset_version if store is not None else None
+    unsaved: List[CheckRecord] = []
+    
+    def flush_store() -> None:
+        if unsaved:
+            store.save_many(unsaved)
+            unsaved.clear()
+    
+    def write_line(pdf_path: Path, future=None, error: Exception = None) -> None:
+        if error is None:
+            error = future.exception()
+        if error is not None:
+            totals['error'] += 1
+            record = {'file_path': str(pdf_path), 'error': f"{type(error).__name__}: {error}"}
+            if report is not None:
+                report.add_error(str(pdf_path), record['error'])
+        else:
+            results, summary, timings, file_hash = future.result()
+            totals['pass' if summary['status'] == 'PASS' else 'fail'] += 1
+            for key in ('ok', 'ng', 'warning', 'required_ng'):
+                totals[key] += summary[key]
+            record = {
+                'file_path': str(pdf_path),
+                'summary': summary,
+                'results': [format_result(r) for r in results]
+            }
+            if include_timings:
+                record['timings'] = timings.to_dict()
+            if store is not None:
+                unsaved.append(CheckRecord(
+                    file_name=str(pdf_path), results=results, summary=summary,
+                    file_hash=file_hash, project=project, office=office,
+                    ruleset_version=ruleset_version
+                ))
+                if len(unsaved) >= _STORE_BATCH:
+                    flush_store()
+            if report is not None:
+                report.add(CheckRecord(file_name=str(pdf_path), results=results, summary=summary,
+                                       project=project, office=office))
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+    
+    start_time = time.perf_counter()
+    # 待機中のファイルをjobs件までに抑え、結果は完了順に書き出す
+    pool = CheckPool(workers=jobs, max_in_flight=jobs * 2,
+                     cache_dir=DEFAULT_CACHE_DIR if use_cache else None,
+                     memory_limit_mb=memory_limit_mb, ocr_backend=ocr_backend)
+    pending = {}
+    try:
+        for pdf_path in pdf_paths:
+            try:
+                pending[pool.submit(check_pdf_path, str(pdf_path), rules, lazy, use_mmap)] = pdf_path
+            except Exception as e:
+                write_line(pdf_path, error=e)
+            for future in [f for f in pending if f.done()]:
+                write_line(pending.pop(future), future)
+        for future in as_completed(list(pending)):
+            write_line(pending.pop(future), future)
+    finally:
+        pool.shutdown()
+        if store is not None:
+            flush_store()
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - start_time
+    
+    # 集計はJSON Linesと混ざらないよう標準エラーへ
+    print("=" * 80, file=sys.stderr)
+    print("一括チェック結果サマリー", file=sys.stderr)
+    print("=" * 80, file=sys.stderr)
+    print(f"ファイル数: {totals['files']} ({elapsed:.1f}秒, {jobs}プロセス)", file=sys.stderr)
+    print(f"  PASS: {totals['pass']}", file=sys.stderr)
+    print(f"  FAIL: {totals['fail']}", file=sys.stderr)
+    print(f"  エラー: {totals['error']}", file=sys.stderr)
+    print(f"  指摘: NG {totals['ng']} / 警告 {totals['warning']} (必須項目NG {totals['required_ng']})",
+          file=sys.stderr)
+    print("=" * 80, file=sys.stderr)
+    if output_path:
+        print(f"結果を保存しました: {output_path}", file=sys.stderr)
+    return 1 if totals['error'] else 0
+
+
 def main():
     parser = argparse.ArgumentParser(description='図面チェックAIシステム')
-    parser.add_argument('pdf_path', type=str, help='チェックするPDFファイルのパス')
+    parser.add_argument('pdf_paths', type=str, nargs='+',
+                       help='チェックするPDFファイル・ディレクトリ・globパターン（複数指定で一括チェック）')
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                       help='一括チェックで並列に処理するプロセス数 (default: CPU数)')
     parser.add_argument('--output', '-o', type=str, help='結果を保存するJSONファイルのパス')
-    parser.add_argument('--format', '-f', choices=['json', 'text'], default='text',
-                       help='出力形式 (default: text)')
+    parser.add_argument('--format', '-f', choices=['json', 'text'], default=None,
+                       help='出力形式 (default: text、一括チェックは常にJSON Lines)')
+    parser.add_argument('--workers', '-w', type=int, default=None,
+                       help='テキスト抽出に使うプロセス数 (default: 1、一括チェックでは --jobs を使う)')
+    parser.add_argument('--mmap', action='store_true',
+                       help='PDFをメモリマップして読み込む（大きな図面セット向け）')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='結果キャッシュを使わずに毎回解析・チェックする')
+    parser.add_argument('--lazy', action='store_true',
+                       help='全項目の判定が確定した時点でページの抽出をやめる')
+    parser.add_argument('--category', '-c', action='append', default=None, metavar='ID',
+                       help='チェックするカテゴリID（複数指定可、例: required）。'
+                            '表題欄だけで判定できるカテゴリのみなら表題欄だけを抽出する')
+    parser.add_argument('--memory-limit', type=float, default=None, metavar='MB',
+                       help='解析中のRSSの上限（MB）。超えた図面は解析を中止する')
+    parser.add_argument('--ocr', choices=['none', *BACKENDS], default=None,
+                       help='テキストレイヤーのないページのOCR (default: 環境変数SOUKEN_OCR_BACKEND、未設定ならnone)')
+    parser.add_argument('--store', action='store_true',
+                       help='チェック結果をデータベース（SOUKEN_RESULTS_DB、既定はSQLite）に保存する')
+    parser.add_argument('--project', type=str, default=None,
+                       help='保存する結果・報告書に付ける案件名（--store / --report と併用）')
+    parser.add_argument('--office', type=str, default=None,
+                       help='保存する結果・報告書に付ける設計事務所（--store / --report と併用）')
+    parser.add_argument('--report', type=str, default=None, metavar='PATH',
+                       help='チェック結果の報告書を保存する（拡張子 .xlsx / .pdf で形式を決める）')
+    parser.add_argument('--timings', action='store_true',
+                       help='段階ごとの処理時間を表示する（JSON出力ではtimingsブロックを追加）')
     
     args = parser.parse_args()
     
+    # 対象カテゴリのルールID（省略時は全ルール）
+    rules = None
+    if args.category:
+        try:
+            rules = get_default_registry().current.rule_ids(args.category)
+        except KeyError as e:
+            print(f"エラー: {e.args[0]}", file=sys.stderr)
+            sys.exit(1)
+    
+    report = None
+    if args.report:
+        try:
+            report = open_report(args.report)
+        except (ValueError, RuntimeError) as e:
+            print(f"エラー: 報告書を作成できません: {e}", file=sys.stderr)
+            sys.exit(1)
+    
+    store = None
+    if args.store:
+        try:
+            store = ResultStore(DEFAULT_RESULTS_DB)
+        except Exception as e:
+            print(f"エラー: 結果の保存先を開けません: {e}", file=sys.stderr)
+            sys.exit(1)
+    
+    # 複数ファイル・ディレクトリ・globパターンは一括チェック
+    first = Path(args.pdf_paths[0])
+    is_batch = (args.jobs is not None or len(args.pdf_paths) > 1 or first.is_dir()
+                or (not first.exists() and glob.has_magic(args.pdf_paths[0])))
+    if is_batch:
+        if args.format == 'text':
+            parser.error("一括チェックの出力はJSON Linesのみです（--format text は単一ファイルで指定してください）")
+        if args.workers is not None:
+            parser.error("一括チェックでは --workers は使えません（ファイル単位の並列数は --jobs で指定してください）")
+        pdf_paths = expand_inputs(args.pdf_paths)
+        if not pdf_paths:
+            print("エラー: チェックするPDFファイルがありません", file=sys.stderr)
+            sys.exit(1)
+        jobs = args.jobs or os.cpu_count() or 1
+        try:
+            exit_code = run_batch(pdf_paths, jobs, args.output, use_cache=not args.no_cache,
+                                  include_timings=args.timings, memory_limit_mb=args.memory_limit,
+                                  rules=rules, ocr_backend=args.ocr, store=store, project=args.project,
+                                  office=args.office, report=report, lazy=args.lazy, use_mmap=args.mmap)
+        finally:
+            if report is not None:
+                report.close()
+        if report is not None:
+            print(f"報告書を保存しました: {args.report}", file=sys.stderr)
+        sys.exit(exit_code)
+    
     # PDFファイルの存在確認
-    pdf_path = Path(args.pdf_path)
+    pdf_path = first
     if not pdf_path.exists():
         print(f"エラー: ファイルが見つかりません: {pdf_path}", file=sys.stderr)
         sys.exit(1)
     
     print(f"図面を読み込んでいます: {pdf_path}")
     
-    # PDF解析
-    pdf_parser = PDFParser()
-    try:
-        drawing_data = pdf_parser.parse(str(pdf_path))
-        print(f"✓ PDF解析完了 ({drawing_data.metadata.get('num_pages', 0)}ページ)")
-    except Exception as e:
-        print(f"エラー: PDF解析に失敗しました: {e}", file=sys.stderr)
-        sys.exit(1)
+    cache = None if args.no_cache else ResultCache()
+    pdf_parser = PDFParser(workers=args.workers or 1, cache=cache, memory_limit_mb=args.memory_limit,
+                           ocr=OcrEngine.from_env(cache, args.ocr))
+    check_engine = CheckEngine(cache=cache)
+    region = check_engine.extraction_region(rules)
+    timings = StageTimings()
     
-    # チェック実行
-    print("チェックを実行しています...")
-    check_engine = CheckEngine()
-    try:
-        results = check_engine.check_all(drawing_data)
-        summary = check_engine.get_summary(results)
-    except Exception as e:
-        print(f"エラー: チェック実行に失敗しました: {e}", file=sys.stderr)
-        sys.exit(1)
+    if args.lazy:
+        # 解析とチェックを並行して行い、判定に必要なページだけ抽出する
+        try:
+            metadata = {}
+            file_hash = hash_file(str(pdf_path)) if cache is not None else None
+            with timings.stage('lazy_check'):
+                results, drawing_data = check_engine.check_lazy(
+                    pdf_parser.iter_pages(str(pdf_path), metadata, region),
+                    file_path=str(pdf_path), metadata=metadata, file_hash=file_hash, rules=rules,
+                    parser_version=pdf_parser.version, region=region
+                )
+            summary = check_engine.get_summary(results, timings)
+        except Exception as e:
+            print(f"エラー: チェック実行に失敗しました: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"✓ チェック完了 ({len(drawing_data.pages)}/{metadata.get('num_pages', 0)}ページを抽出)")
+    else:
+        # PDF解析
+        try:
+            if args.mmap:
+                drawing_data = pdf_parser.parse_mmap(str(pdf_path), timings, region)
+            else:
+                drawing_data = pdf_parser.parse(str(pdf_path), timings, region)
+            scope = "、表題欄のみ" if drawing_data.region == REGION_TITLE_BLOCK else ""
+            print(f"✓ PDF解析完了 ({drawing_data.metadata.get('num_pages', 0)}ページ{scope})")
+            changed = drawing_data.metadata.get('changed_pages')
+            if changed is not None and len(changed) < drawing_data.metadata.get('num_pages', 0):
+                reused = drawing_data.metadata['num_pages'] - len(changed)
+                print(f"  変更・追加されたページ: {', '.join(map(str, changed)) or 'なし'}"
+                      f"（他{reused}ページは抽出済みの結果を再利用）")
+            if drawing_data.metadata.get('ocr_pages'):
+                print(f"  OCR: {len(drawing_data.metadata['ocr_pages'])}ページ")
+        except Exception as e:
+            print(f"エラー: PDF解析に失敗しました: {e}", file=sys.stderr)
+            sys.exit(1)
+        
+        # チェック実行
+        print("チェックを実行しています...")
+        try:
+            results = check_engine.check_all(drawing_data, timings, rules)
+            summary = check_engine.get_summary(results, timings)
+        except Exception as e:
+            print(f"エラー: チェック実行に失敗しました: {e}", file=sys.stderr)
+            sys.exit(1)
+    
+    if store is not None:
+        try:
+            store.save(CheckRecord(
+                file_name=str(pdf_path), results=results, summary=summary,
+                file_hash=hash_file(str(pdf_path)), project=args.project, office=args.office,
+                ruleset_version=check_engine.ruleset_version
+            ))
+        except Exception as e:
+            print(f"エラー: チェック結果を保存できません: {e}", file=sys.stderr)
+            sys.exit(1)
+    
+    if report is not None:
+        with report:
+            report.add(CheckRecord(file_name=str(pdf_path), results=results, summary=summary,
+                                   project=args.project, office=args.office))
+        print(f"報告書を保存しました: {args.report}")
     
     # 結果出力
     if args.format == 'json':
@@ -68,6 +370,8 @@ def main():
             'summary': summary,
             'results': [format_result(r) for r in results]
         }
+        if args.timings:
+            output_data['timings'] = timings.to_dict()
         
         if args.output:
             with open(args.output, 'w', encoding='utf-8') as f:
@@ -88,6 +392,19 @@ def main():
         print(f"  全体ステータス: {summary['status']}")
         print("="*80)
         
+        if args.timings:
+            print(f"\n処理時間: {timings.total * 1000:.1f}ms")
+            for stage, seconds in timings.stages.items():
+                print(f"  {stage}: {seconds * 1000:.1f}ms")
+            if timings.memory.get('peak_mb') is not None:
+                print(f"  ピークメモリ: {timings.memory['peak_mb']:.1f}MB")
+            if timings.pages:
+                slowest = max(range(len(timings.pages)), key=timings.pages.__getitem__)
+                print(f"  ページあたり平均: {sum(timings.pages) / len(timings.pages) * 1000:.1f}ms "
+                      f"(最大 {timings.pages[slowest] * 1000:.1f}ms: {slowest + 1}ページ目)")
+            for rule_id, blocked in timings.skipped.items():
+                print(f"  判定省略: {rule_id}（前提ルール {', '.join(blocked)} に指摘あり）")
+        
         if results:
             print("\n指摘事項:")
             print("-"*80)
@@ -109,6 +426,8 @@ def main():
                     print(f"     {result.message}")
                     if result.suggestion:
                         print(f"     → {result.suggestion}")
+                    if result.page_number:
+                        print(f"     位置: {format_location(result)}")
                     print()
         else:
             print("\n指摘事項はありませんでした。")
@@ -139,6 +458,8 @@ def main():
                             f.write(f"     {result.message}\n")
                             if result.suggestion:
                                 f.write(f"     → {result.suggestion}\n")
+                            if result.page_number:
+                                f.write(f"     位置: {format_location(result)}\n")
                             f.write("\n")
             
             print(f"\n結果を保存しました: {args.output}")
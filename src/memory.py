@@ -0,0 +1,83 @@
+"""
+Memory Module
+プロセスのメモリ使用量（RSS）を計測し、上限を超えた処理を打ち切る
+"""
+
+import gc
+import os
+import sys
+from typing import Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+class MemoryLimitExceeded(MemoryError):
+    """メモリ使用量が設定された上限を超えた"""
+
+
+def current_rss_mb() -> Optional[float]:
+    """
+    現在のRSS（MB）
+
+    /proc が使えない環境ではプロセス開始以降のピークRSSで代用する（取得できなければNone）
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is not None:
+        per_mb = 1024 * 1024 if sys.platform == 'darwin' else 1024  # macOSはバイト、Linuxはキロバイト
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / per_mb
+    return None
+
+
+class MemoryMonitor:
+    """1文書の処理中のRSSを記録し、上限を超えたら例外を送出する"""
+
+    def __init__(self, limit_mb: Optional[float] = None):
+        """
+        Args:
+            limit_mb: RSSの上限（MB、Noneなら上限なし）
+        """
+        self.limit_mb = limit_mb
+        self.start_mb = current_rss_mb()
+        self.peak_mb = self.start_mb
+
+    def sample(self) -> Optional[float]:
+        """
+        現在のRSSを記録し、上限を確認する
+
+        上限を超えていればガベージコレクションしてから測り直し、
+        それでも超えていれば MemoryLimitExceeded を送出する
+
+        Returns:
+            Optional[float]: 現在のRSS（MB）
+        """
+        rss = current_rss_mb()
+        if rss is None:
+            return None
+        if self.limit_mb is not None and rss > self.limit_mb:
+            gc.collect()
+            rss = current_rss_mb()
+        if self.peak_mb is None or rss > self.peak_mb:
+            self.peak_mb = rss
+        if self.limit_mb is not None and rss > self.limit_mb:
+            raise MemoryLimitExceeded(
+                f"メモリ使用量が上限を超えました（{rss:.0f}MB > {self.limit_mb:.0f}MB）"
+            )
+        return rss
+
+    def to_dict(self) -> dict:
+        """結果の `timings` ブロック用の辞書"""
+        return {
+            'start_mb': round(self.start_mb, 1) if self.start_mb is not None else None,
+            'peak_mb': round(self.peak_mb, 1) if self.peak_mb is not None else None,
+            'limit_mb': self.limit_mb,
+        }
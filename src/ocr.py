@@ -0,0 +1,403 @@
+"""
+OCR Module
+テキストレイヤーのない（スキャンした）ページだけを検出し、プロセスプールで文字認識する
+"""
+
+import io
+import os
+import re
+import time
+import hashlib
+from array import array
+from concurrent.futures import ProcessPoolExecutor, TimeoutError, as_completed
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+import pdfplumber
+from pdfminer.pdftypes import PDFStream, resolve1
+
+from .result_cache import ResultCache
+
+try:
+    import pytesseract
+    TESSERACT_AVAILABLE = True
+except ImportError:
+    TESSERACT_AVAILABLE = False
+
+
+# 抽出したテキストがこの文字数未満で、画像を描いているページをOCRする
+DEFAULT_MIN_CHARS = 20
+# OCR用にページを描画する解像度（dpi）
+DEFAULT_RESOLUTION = 300
+# 1文書のOCRにかける時間の上限（秒）。超えたページはテキストなしのまま返す
+DEFAULT_TIMEOUT = 120.0
+# 1文書でOCRする最大ページ数
+DEFAULT_MAX_PAGES = 200
+
+# 入れ子のForm XObjectをたどる深さの上限
+_MAX_FORM_DEPTH = 3
+# 「/名前 Do」（XObjectの描画）とインライン画像（BI ... ID ... EI）
+_DO_OPERATOR = re.compile(rb"/([^\s/\[\]()<>{}%]+)\s+Do\b")
+_INLINE_IMAGE = re.compile(rb"(?:^|\s)BI\s")
+
+
+class OcrUnavailable(RuntimeError):
+    """OCRエンジンが使えない（ライブラリ未インストールなど）"""
+
+
+@dataclass
+class OcrText:
+    """1ページ分のOCR結果"""
+    text: str
+    words: Optional[array] = None  # PageData.wordsと同じ形式（座標はpt）
+
+
+class OcrBackend:
+    """
+    OCRエンジンの共通インターフェース
+
+    プロセスプールのワーカーに渡すため、pickleできる属性だけを持つこと
+    """
+
+    name = "base"
+    needs_image = True  # Falseならページを描画せず image=None で recognize() を呼ぶ
+
+    @property
+    def cache_id(self) -> str:
+        """OCR結果のキャッシュキーに含める識別子（設定で結果が変わるなら設定も含める）"""
+        return self.name
+
+    def recognize(self, image, scale: float) -> OcrText:
+        """
+        ページ画像の文字を認識する
+
+        Args:
+            image: ページ画像（PIL.Image）
+            scale: 画像の1ピクセルあたりのpt（単語の座標の変換用）
+
+        Returns:
+            OcrText: 認識したテキストと単語の位置
+        """
+        raise NotImplementedError
+
+
+class StubBackend(OcrBackend):
+    """テスト・ベンチマーク用: 画像を見ずに決まったテキストを返す"""
+
+    name = "stub"
+    needs_image = False
+
+    def __init__(self, text: str = "", delay: float = 0.0):
+        """
+        Args:
+            text: 全ページに返すテキスト
+            delay: 1ページあたりの待ち時間（秒、OCRの重さを模す）
+        """
+        self.text = text
+        self.delay = delay
+
+    @property
+    def cache_id(self) -> str:
+        return f"stub-{hashlib.sha256(self.text.encode('utf-8')).hexdigest()[:12]}"
+
+    def recognize(self, image, scale: float) -> OcrText:
+        if self.delay:
+            time.sleep(self.delay)
+        return OcrText(self.text)
+
+
+class TesseractBackend(OcrBackend):
+    """Tesseract（pytesseract）によるOCR"""
+
+    name = "tesseract"
+
+    def __init__(self, lang: str = "jpn+eng"):
+        """
+        Args:
+            lang: Tesseractの言語（例: "jpn+eng"）
+
+        Raises:
+            OcrUnavailable: pytesseractがインストールされていない場合
+        """
+        if not TESSERACT_AVAILABLE:
+            raise OcrUnavailable("pytesseractがインストールされていません（pip install pytesseract）")
+        self.lang = lang
+
+    @property
+    def cache_id(self) -> str:
+        return f"tesseract-{self.lang}"
+
+    def recognize(self, image, scale: float) -> OcrText:
+        data = pytesseract.image_to_data(image, lang=self.lang, output_type=pytesseract.Output.DICT)
+        parts = []
+        words = array('d')
+        position = 0
+        previous_line = None
+        for index, text in enumerate(data['text']):
+            text = text.strip()
+            if not text:
+                continue
+            line = (data['block_num'][index], data['par_num'][index], data['line_num'][index])
+            if previous_line is not None:
+                if line != previous_line:
+                    separator = "\n"
+                elif parts[-1][-1].isascii() or text[0].isascii():
+                    separator = " "
+                else:
+                    separator = ""  # 日本語は1文字ずつ返るので詰めて連結する
+                parts.append(separator)
+                position += len(separator)
+            previous_line = line
+            left, top = data['left'][index], data['top'][index]
+            words.extend((position, position + len(text), left * scale, top * scale,
+                          (left + data['width'][index]) * scale, (top + data['height'][index]) * scale))
+            parts.append(text)
+            position += len(text)
+        return OcrText("".join(parts), words)
+
+
+# バックエンド名 -> クラス（SOUKEN_OCR_BACKENDで選ぶ）
+BACKENDS = {
+    StubBackend.name: StubBackend,
+    TesseractBackend.name: TesseractBackend,
+}
+
+
+def create_backend(name: str) -> Optional[OcrBackend]:
+    """
+    名前からOCRバックエンドを作る（"none"や空ならNone）
+
+    Raises:
+        ValueError: 未知のバックエンド名の場合
+        OcrUnavailable: バックエンドのライブラリが使えない場合
+    """
+    if not name or name == "none":
+        return None
+    if name not in BACKENDS:
+        raise ValueError(f"OCRバックエンド '{name}' はありません（{', '.join(BACKENDS)}）")
+    if name == StubBackend.name:
+        return StubBackend(os.environ.get('SOUKEN_OCR_STUB_TEXT', ''))
+    if name == TesseractBackend.name:
+        return TesseractBackend(os.environ.get('SOUKEN_OCR_LANG', 'jpn+eng'))
+    return BACKENDS[name]()
+
+
+def _content_data(obj) -> bytes:
+    """ページまたはForm XObjectの描画命令（デコード済み）"""
+    contents = resolve1(obj)
+    if isinstance(contents, PDFStream):
+        return contents.get_data()
+    return b"\n".join(resolve1(stream).get_data() for stream in contents or ())
+
+
+def _painted_images(content: bytes, resources, depth: int = 0) -> List[PDFStream]:
+    """描画命令が描く画像XObject（Form XObjectの中も含む）"""
+    xobjects = resolve1((resolve1(resources) or {}).get('XObject')) or {}
+    images = []
+    for name in dict.fromkeys(_DO_OPERATOR.findall(content)):
+        xobject = resolve1(xobjects.get(name.decode('latin-1')))
+        if not isinstance(xobject, PDFStream):
+            continue
+        subtype = getattr(xobject.get('Subtype'), 'name', None)
+        if subtype == 'Image':
+            images.append(xobject)
+        elif subtype == 'Form' and depth < _MAX_FORM_DEPTH:
+            images.extend(_painted_images(xobject.get_data(), xobject.get('Resources'), depth + 1))
+    return images
+
+
+def page_signature(page_obj) -> Tuple[bool, str]:
+    """
+    ページの描画命令から、画像を描いているかとページのハッシュを求める（テキスト抽出なし）
+
+    ハッシュは描画命令と描画する画像の生データから計算するため、
+    別のPDFに含まれる同じスキャン画像のページも同じ値になる
+
+    Args:
+        page_obj: pdfminerのページ（pdfplumberの page.page_obj）
+
+    Returns:
+        Tuple[bool, str]: (画像を描いているか, ページのSHA-256)
+    """
+    content = _content_data(page_obj.contents)
+    images = _painted_images(content, page_obj.resources)
+    digest = hashlib.sha256(content)
+    for image in images:
+        digest.update(image.get_rawdata() or b"")
+    return bool(images) or bool(_INLINE_IMAGE.search(content)), digest.hexdigest()
+
+
+def _recognize(page: "pdfplumber.page.Page", backend: OcrBackend, resolution: int) -> OcrText:
+    """開いているページを描画して文字認識する"""
+    image = page.to_image(resolution=resolution).original if backend.needs_image else None
+    return backend.recognize(image, 72.0 / resolution)
+
+
+def _recognize_page(source: Union[str, bytes], page_number: int, backend: OcrBackend,
+                    resolution: int) -> OcrText:
+    """1ページを開いて文字認識する（プロセスプールのワーカー用）"""
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    with pdfplumber.open(source, pages=[page_number]) as pdf:
+        return _recognize(pdf.pages[0], backend, resolution)
+
+
+class OcrEngine:
+    """
+    スキャンページのOCR（候補の検出・ページハッシュでのキャッシュ・プロセスプールでの実行）
+
+    テキストレイヤーのあるページは抽出済みテキストの文字数を見るだけで対象外になる
+    """
+
+    def __init__(self, backend: OcrBackend, workers: int = 1, cache: Optional[ResultCache] = None,
+                 timeout: float = DEFAULT_TIMEOUT, max_pages: int = DEFAULT_MAX_PAGES,
+                 resolution: int = DEFAULT_RESOLUTION, min_chars: int = DEFAULT_MIN_CHARS):
+        """
+        Args:
+            backend: OCRエンジン
+            workers: OCRに使うプロセス数
+            cache: ページハッシュをキーにしたOCR結果のキャッシュ
+            timeout: 1文書のOCRにかける時間の上限（秒）
+            max_pages: 1文書でOCRする最大ページ数
+            resolution: ページを描画する解像度（dpi）
+            min_chars: 抽出したテキストがこの文字数未満のページをOCRの候補にする
+        """
+        self.backend = backend
+        self.workers = max(1, workers)
+        self.cache = cache
+        self.timeout = timeout
+        self.max_pages = max_pages
+        self.resolution = resolution
+        self.min_chars = min_chars
+
+    @classmethod
+    def from_env(cls, cache: Optional[ResultCache] = None,
+                 backend: Optional[str] = None) -> Optional["OcrEngine"]:
+        """
+        環境変数の設定でOCRエンジンを作る（SOUKEN_OCR_BACKENDが未設定・noneならNone）
+
+        - SOUKEN_OCR_BACKEND: none / tesseract / stub
+        - SOUKEN_OCR_WORKERS: プロセス数（既定2）
+        - SOUKEN_OCR_TIMEOUT: 1文書の上限秒数（既定120）
+        - SOUKEN_OCR_MAX_PAGES: 1文書の最大ページ数（既定200）
+
+        Args:
+            cache: OCR結果のキャッシュ
+            backend: バックエンド名（省略時はSOUKEN_OCR_BACKEND）
+        """
+        name = backend if backend is not None else os.environ.get('SOUKEN_OCR_BACKEND', 'none')
+        try:
+            ocr_backend = create_backend(name)
+        except OcrUnavailable as e:
+            print(f"OCRを無効にします: {e}")
+            return None
+        if ocr_backend is None:
+            return None
+        return cls(
+            ocr_backend,
+            workers=int(os.environ.get('SOUKEN_OCR_WORKERS', '2')),
+            cache=cache,
+            timeout=float(os.environ.get('SOUKEN_OCR_TIMEOUT', str(DEFAULT_TIMEOUT))),
+            max_pages=int(os.environ.get('SOUKEN_OCR_MAX_PAGES', str(DEFAULT_MAX_PAGES))),
+        )
+
+    @property
+    def cache_id(self) -> str:
+        """OCR結果を左右する設定（解析結果のキャッシュキーにも含める）"""
+        return f"{self.backend.cache_id}-{self.resolution}dpi"
+
+    def candidate(self, page: "pdfplumber.page.Page", text: str) -> Optional[str]:
+        """
+        OCRが必要なページならページハッシュを返す
+
+        抽出したテキストが十分にあるページは描画命令も読まずにNoneを返す
+
+        Args:
+            page: pdfplumberのページ
+            text: 抽出済みのテキスト
+        """
+        if len(text.strip()) >= self.min_chars:
+            return None
+        try:
+            has_image, page_hash = page_signature(page.page_obj)
+        except Exception as e:
+            print(f"ページ{page.page_number}の描画命令を読めません（OCRしません）: {e}")
+            return None
+        return page_hash if has_image else None
+
+    def recognize_page(self, page: "pdfplumber.page.Page", page_hash: str) -> Optional[OcrText]:
+        """
+        1ページをこのプロセスで文字認識する（逐次抽出用、キャッシュを使う）
+
+        Returns:
+            Optional[OcrText]: 認識結果（失敗した場合はNone）
+        """
+        key = ResultCache.ocr_key(page_hash, self.cache_id)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        try:
+            result = _recognize(page, self.backend, self.resolution)
+        except Exception as e:
+            print(f"OCRエラー（ページ{page.page_number}）: {e}")
+            return None
+        if self.cache is not None:
+            self.cache.put(key, result)
+        return result
+
+    def recognize_pages(self, source: Union[str, bytes], candidates: Dict[int, str]
+                        ) -> Tuple[Dict[int, OcrText], List[int]]:
+        """
+        候補ページをプロセスプールで文字認識する
+
+        キャッシュ済みのページは再認識しない。max_pagesを超えた分と、
+        timeout秒以内に終わらなかったページはOCRせずに返す
+
+        Args:
+            source: 各ワーカーが開くPDFのパスまたはバイト列
+            candidates: ページ番号 -> ページハッシュ
+
+        Returns:
+            Tuple[Dict[int, OcrText], List[int]]: ページ番号 -> 認識結果、OCRできなかったページ番号
+        """
+        deadline = time.monotonic() + self.timeout
+        results: Dict[int, OcrText] = {}
+        pending: List[int] = []
+        for page_number, page_hash in sorted(candidates.items()):
+            cached = self.cache.get(ResultCache.ocr_key(page_hash, self.cache_id)) \
+                if self.cache is not None else None
+            if cached is not None:
+                results[page_number] = cached
+            else:
+                pending.append(page_number)
+        skipped: Set[int] = set(pending[self.max_pages:])
+        pending = pending[:self.max_pages]
+        if not pending:
+            return results, sorted(skipped)
+
+        executor = ProcessPoolExecutor(max_workers=min(self.workers, len(pending)))
+        futures = {
+            executor.submit(_recognize_page, source, page_number, self.backend, self.resolution): page_number
+            for page_number in pending
+        }
+        try:
+            for future in as_completed(futures, timeout=max(0.0, deadline - time.monotonic())):
+                page_number = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"OCRエラー（ページ{page_number}）: {e}")
+                    skipped.add(page_number)
+                    continue
+                results[page_number] = result
+                if self.cache is not None:
+                    self.cache.put(ResultCache.ocr_key(candidates[page_number], self.cache_id), result)
+        except TimeoutError:
+            unfinished = [number for future, number in futures.items() if number not in results]
+            print(f"OCRが{self.timeout:.0f}秒以内に終わらなかったページを読み飛ばします: {unfinished}")
+            skipped.update(unfinished)
+        finally:
+            # 実行中のページは待たずに返す（ワーカーは現在のページを終えると終了する）
+            executor.shutdown(wait=False, cancel_futures=True)
+        return results, sorted(skipped - set(results))
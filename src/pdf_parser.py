@@ -3,10 +3,43 @@ PDF Parser Module
 図面PDFを読み込み、テキストやメタデータを抽出する
 """
 
+import io
+import mmap
+import time
+import hashlib
+from array import array
 import PyPDF2
 import pdfplumber
-from typing import Dict, List, Optional
-from dataclasses import dataclass
+from pdfplumber.utils.text import TextMap, chars_to_textmap
+from pdfminer.layout import LTChar, LTContainer, LTCurve, LTRect
+from pdfminer.pdftypes import PDFObjRef, PDFStream, resolve1
+from pdfminer.psparser import PSKeyword, PSLiteral
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from dataclasses import dataclass, replace
+
+from .result_cache import ResultCache, hash_bytes, hash_file, hash_stream
+from .timings import StageTimings
+from .memory import MemoryLimitExceeded, MemoryMonitor
+from .word_index import WordIndex
+from .ocr import OcrEngine
+
+
+# 解析結果（DrawingData）の形式を変更したら上げる（解析結果のキャッシュのキーに含まれる）
+PARSER_VERSION = "3"
+
+# テキストを抽出する範囲（DrawingData.region）
+REGION_SHEET = "sheet"  # 図面全体
+REGION_TITLE_BLOCK = "title_block"  # 表題欄のみ（見つからないページは図面全体）
+
+# 図面枠・表題欄の線の位置を比べるときの誤差（pt）
+_EDGE_TOLERANCE = 3.0
+# 表題欄とみなす領域の上限（図面枠の面積に対する比率）
+_TITLE_BLOCK_MAX_AREA = 0.4
+# 表題欄の左端とみなす縦線の位置の下限（図面枠の左端からの比率）
+_TITLE_BLOCK_MIN_X = 0.3
+# ページのフィンガープリントでたどるリソースの入れ子の深さの上限
+_MAX_FINGERPRINT_DEPTH = 16
 
 
 @dataclass
@@ -16,6 +49,12 @@ class PageData:
     text: str
     width: float
     height: float
+    # 表題欄の範囲 (x0, top, x1, bottom)（表題欄だけを抽出した場合のみ）
+    title_block: Optional[Tuple[float, float, float, float]] = None
+    # 単語ごとの (text内の開始位置, 終了位置, x0, top, x1, bottom) を平たく並べた配列
+    # （DrawingData.word_indexに移した後はNone）
+    words: Optional[array] = None
+    ocr: bool = False  # テキストレイヤーがなく、OCRで読み取ったページ
 
 
 @dataclass
@@ -25,82 +64,711 @@ class DrawingData:
     pages: List[PageData]
     metadata: Dict[str, any]
     extracted_text: Dict[int, str]  # page_num -> text
+    file_hash: Optional[str] = None  # PDFバイト列のSHA-256
+    region: str = REGION_SHEET  # extracted_textの抽出範囲
+    word_index: Optional[WordIndex] = None  # 単語のページと座標（ルールのヒット位置の特定用）
+    parser_version: str = PARSER_VERSION  # 解析したPDFParserの版（OCRの設定を含む）
+
+
+# DrawingData.metadataのキー -> PDF文書情報辞書のキー
+_METADATA_KEYS = {
+    'title': 'Title',
+    'author': 'Author',
+    'creator': 'Creator',
+    'producer': 'Producer',
+    'creation_date': 'CreationDate',
+    'modification_date': 'ModDate',
+}
+
+
+def _build_metadata(info: Optional[dict], num_pages: int, key_prefix: str) -> Dict[str, any]:
+    """
+    PDF文書情報辞書からメタデータを組み立てる
+    
+    Args:
+        info: 文書情報辞書（pdfplumberはキーに'/'なし、PyPDF2は'/'付き）
+        num_pages: ページ数
+        key_prefix: 文書情報辞書のキーの接頭辞
+    """
+    metadata = {
+        name: (info.get(key_prefix + key, '') if info else '')
+        for name, key in _METADATA_KEYS.items()
+    }
+    metadata['num_pages'] = num_pages
+    return metadata
+
+
+def _iter_layout(objects: Iterable) -> Iterator:
+    """レイアウトオブジェクトを図形（Form XObject）の中まで展開して返す"""
+    for obj in objects:
+        if isinstance(obj, LTContainer):
+            yield from _iter_layout(obj)
+        else:
+            yield obj
+
+
+def locate_title_block(layout: Iterable) -> Optional[Tuple[float, float, float, float]]:
+    """
+    図面枠と罫線から表題欄（図面枠の右下に接する枠）の範囲を求める
+    
+    図面枠の下辺から立ち上がる縦線のうち、上端で右辺まで届く横線と交わるもの
+    （または図面枠の上辺まで届くもの）を表題欄の左辺とみなし、最も左のものを採る
+    
+    Args:
+        layout: pdfminerのレイアウト（pdfplumberの page.layout）
+        
+    Returns:
+        Optional[Tuple[float, float, float, float]]: (x0, y0, x1, y1)（PDF座標、下が原点）。
+            見つからなければNone
+    """
+    tol = _EDGE_TOLERANCE
+    frame = None
+    horizontal = []  # (x0, x1, y)
+    vertical = []  # (y0, y1, x)
+    for obj in _iter_layout(layout):
+        if not isinstance(obj, LTCurve):
+            continue
+        points = list(obj.pts)
+        if isinstance(obj, LTRect):
+            points.append(points[0])
+            area = obj.width * obj.height
+            if frame is None or area > (frame[2] - frame[0]) * (frame[3] - frame[1]):
+                frame = obj.bbox
+        for (ax, ay), (bx, by) in zip(points, points[1:]):
+            if abs(ay - by) <= tol:
+                horizontal.append((min(ax, bx), max(ax, bx), (ay + by) / 2))
+            elif abs(ax - bx) <= tol:
+                vertical.append((min(ay, by), max(ay, by), (ax + bx) / 2))
+    
+    page_width, page_height = layout.width, layout.height
+    if frame is None or (frame[2] - frame[0]) * (frame[3] - frame[1]) < page_width * page_height / 2:
+        frame = layout.bbox  # 図面枠の矩形がなければ用紙の端を枠とみなす
+    fx0, fy0, fx1, fy1 = frame
+    max_area = (fx1 - fx0) * (fy1 - fy0) * _TITLE_BLOCK_MAX_AREA
+    min_x = fx0 + (fx1 - fx0) * _TITLE_BLOCK_MIN_X
+    
+    best = None
+    for y0, y1, x in vertical:
+        if abs(y0 - fy0) > tol or not min_x < x < fx1 - tol:
+            continue
+        top = min(y1, fy1)
+        closed = top >= fy1 - tol or any(
+            abs(y - top) <= tol and hx0 <= x + tol and hx1 >= fx1 - tol
+            for hx0, hx1, y in horizontal
+        )
+        if not closed or (fx1 - x) * (top - fy0) > max_area:
+            continue
+        if best is None or x < best[0]:
+            best = (x, fy0, fx1, top)
+    return best
+
+
+def _digest_object(obj, digest: "hashlib._Hash", memo: Dict[int, bytes], depth: int = 0) -> None:
+    """
+    PDFオブジェクトを（参照先・ストリームの生データも含めて）ハッシュに加える
+    
+    参照先のハッシュは memo（オブジェクト番号 -> ダイジェスト）に記録し、
+    複数のページで共有するフォントや画像は1文書につき1回だけ読む
+    """
+    if depth > _MAX_FINGERPRINT_DEPTH:
+        return
+    if isinstance(obj, PDFObjRef):
+        sub = memo.get(obj.objid)
+        if sub is None:
+            memo[obj.objid] = b"cycle"  # 循環参照の番兵
+            inner = hashlib.sha256()
+            _digest_object(resolve1(obj), inner, memo, depth + 1)
+            sub = memo[obj.objid] = inner.digest()
+        digest.update(b"R" + sub)
+    elif isinstance(obj, PDFStream):
+        _digest_object(obj.attrs, digest, memo, depth + 1)
+        digest.update(b"S" + (obj.get_rawdata() or b""))
+    elif isinstance(obj, dict):
+        digest.update(b"{")
+        for key in sorted(obj):
+            if key == 'Parent':
+                continue  # ページツリーへ戻る参照
+            digest.update(str(key).encode('utf-8', 'replace') + b"=")
+            _digest_object(obj[key], digest, memo, depth + 1)
+        digest.update(b"}")
+    elif isinstance(obj, (list, tuple)):
+        digest.update(b"[")
+        for item in obj:
+            _digest_object(item, digest, memo, depth + 1)
+        digest.update(b"]")
+    elif isinstance(obj, bytes):
+        digest.update(b"b" + obj)
+    elif isinstance(obj, (PSLiteral, PSKeyword)):
+        digest.update(b"/" + str(obj.name).encode('utf-8', 'replace'))
+    else:
+        digest.update(repr(obj).encode('utf-8', 'replace'))
+
+
+def page_fingerprint(page_obj, memo: Optional[Dict[int, bytes]] = None) -> str:
+    """
+    ページの内容のフィンガープリント（テキストを抽出せずに計算する）
+    
+    描画命令・リソース（フォント・画像・Form XObject）・用紙の大きさと向きから計算するため、
+    版の異なる図面セットでも変更のないページは同じ値になる
+    
+    Args:
+        page_obj: pdfminerのページ（pdfplumberの page.page_obj）
+        memo: 同じ文書のページ間で共有する参照先のハッシュ（省略時はページごと）
+        
+    Returns:
+        str: SHA-256（16進文字列）
+    """
+    if memo is None:
+        memo = {}
+    digest = hashlib.sha256()
+    digest.update(repr((page_obj.mediabox, page_obj.cropbox, page_obj.rotate)).encode())
+    _digest_object(page_obj.attrs.get('Contents'), digest, memo)
+    _digest_object(page_obj.resources, digest, memo)
+    return digest.hexdigest()
+
+
+def _textmap_words(textmap: TextMap) -> array:
+    """
+    テキストマップから単語ごとのテキスト位置と座標を取り出す
+    
+    テキストマップは出力文字ごとに元の文字オブジェクトを持つ（区切りの空白・改行はNone）ため、
+    文字オブジェクトが続く範囲を1単語とし、その外接矩形を記録する
+    
+    Returns:
+        array: (開始位置, 終了位置, x0, top, x1, bottom) を単語順に平たく並べた配列
+    """
+    words = array('d')
+    if textmap.line_dir_render != 'ttb' or textmap.char_dir_render != 'ltr':
+        return words  # 並べ替えて出力する向きでは文字位置が対応しない
+    start = None
+    x0 = top = x1 = bottom = 0.0
+    for position, (_, char) in enumerate(textmap.tuples):
+        if char is None:
+            if start is not None:
+                words.extend((start, position, x0, top, x1, bottom))
+                start = None
+            continue
+        if start is None:
+            start = position
+            x0, top, x1, bottom = char['x0'], char['top'], char['x1'], char['bottom']
+        else:
+            x0, top = min(x0, char['x0']), min(top, char['top'])
+            x1, bottom = max(x1, char['x1']), max(bottom, char['bottom'])
+    if start is not None:
+        words.extend((start, len(textmap.tuples), x0, top, x1, bottom))
+    return words
+
+
+def _extract_page_text(page: "pdfplumber.page.Page", region: str
+                       ) -> Tuple[str, Optional[Tuple[float, float, float, float]], array]:
+    """
+    1ページのテキストと単語の位置を抽出する
+    
+    表題欄のみの場合は、pdfplumberの全オブジェクト変換を行わず、
+    表題欄の範囲内の文字だけを変換して並べる（表題欄が見つからないか、
+    範囲内に文字がなければ図面全体を抽出する）
+    
+    Returns:
+        Tuple[str, Optional[Tuple[float, float, float, float]], array]:
+            テキスト、表題欄の範囲 (x0, top, x1, bottom)（図面全体を抽出した場合はNone）、
+            単語の位置（PageData.words）
+    """
+    if region == REGION_TITLE_BLOCK:
+        layout = page.layout
+        bbox = locate_title_block(layout)
+        if bbox is not None:
+            x0, y0, x1, y1 = (bbox[0] - _EDGE_TOLERANCE, bbox[1] - _EDGE_TOLERANCE,
+                              bbox[2] + _EDGE_TOLERANCE, bbox[3] + _EDGE_TOLERANCE)
+            chars = [
+                page.process_object(obj) for obj in _iter_layout(layout)
+                if isinstance(obj, LTChar)
+                and x0 <= (obj.x0 + obj.x1) / 2 <= x1 and y0 <= (obj.y0 + obj.y1) / 2 <= y1
+            ]
+            if chars:
+                # pdfplumberの座標（上が原点、MediaBoxの原点を加味）に合わせる
+                mb_x0, mb_top = page.mediabox[:2]
+                title_block = (bbox[0] + mb_x0, page.height - bbox[3] + mb_top,
+                               bbox[2] + mb_x0, page.height - bbox[1] + mb_top)
+                textmap = chars_to_textmap(chars)
+                return textmap.as_string, title_block, _textmap_words(textmap)
+    # page.extract_text() と同じテキストマップから、文字列と単語の位置を同時に得る
+    textmap = page.get_textmap()
+    return textmap.as_string, None, _textmap_words(textmap)
+
+
+def _extract_pages(source: Union[str, bytes], page_numbers: List[int],
+                   memory_limit_mb: Optional[float] = None, region: str = REGION_SHEET
+                   ) -> List[Tuple[int, str, float, float, float, Optional[tuple], array]]:
+    """
+    指定したページからテキストを抽出する（プロセスプールのワーカー用）
+    
+    Args:
+        source: PDFファイルのパス、またはPDFのバイト列
+        page_numbers: 抽出するページ番号（1始まり、昇順）
+        memory_limit_mb: ワーカーのRSSの上限（MB）
+        region: 抽出範囲（REGION_SHEET / REGION_TITLE_BLOCK）
+        
+    Returns:
+        List[Tuple[int, str, float, float, float, Optional[tuple], array]]:
+            (ページ番号, テキスト, 幅, 高さ, 抽出時間, 表題欄の範囲, 単語の位置) のリスト
+    """
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    pages = []
+    monitor = MemoryMonitor(memory_limit_mb)
+    with pdfplumber.open(source, pages=page_numbers) as pdf:
+        for page in pdf.pages:
+            page_start = time.perf_counter()
+            text, title_block, words = _extract_page_text(page, region)
+            pages.append((page.page_number, text, page.width, page.height,
+                          time.perf_counter() - page_start, title_block, words))
+            page.close()
+            monitor.sample()
+    return pages
+
+
+def _read_all(stream: BinaryIO) -> bytes:
+    """ストリームの内容全体を読み出す（読み出し位置は元に戻す）"""
+    position = stream.tell()
+    stream.seek(0)
+    data = stream.read()
+    stream.seek(position)
+    return data
 
 
 class PDFParser:
     """PDF解析クラス"""
     
-    def __init__(self):
+    def __init__(self, workers: int = 1, cache: Optional[ResultCache] = None,
+                 memory_limit_mb: Optional[float] = None, ocr: Optional[OcrEngine] = None):
+        """
+        Args:
+            workers: テキスト抽出に使うプロセス数（1ならシリアル実行）
+            cache: 解析結果のキャッシュ（同じPDFの再解析を省略する）
+            memory_limit_mb: RSSの上限（MB）。ページを抽出するたびに確認し、
+                超えた文書は MemoryLimitExceeded で打ち切る（Noneなら上限なし）
+            ocr: テキストレイヤーのないページを読み取るOCRエンジン（NoneならOCRしない）
+        """
         self.supported_formats = ['.pdf']
+        self.workers = max(1, workers)
+        self.cache = cache
+        self.memory_limit_mb = memory_limit_mb
+        self.ocr = ocr
     
-    def parse(self, pdf_path: str) -> DrawingData:
+    @property
+    def version(self) -> str:
+        """解析結果のキャッシュキーに含める版（OCRの有無・設定で結果が変わる）"""
+        if self.ocr is None:
+            return PARSER_VERSION
+        return f"{PARSER_VERSION}-ocr-{self.ocr.cache_id}"
+    
+    def parse(self, pdf_path: str, timings: Optional[StageTimings] = None,
+              region: str = REGION_SHEET) -> DrawingData:
         """
         PDFを解析してDrawingDataを返す
         
         Args:
             pdf_path: PDFファイルのパス
+            timings: 渡した場合、段階ごとの処理時間を記録する
+            region: テキストの抽出範囲（REGION_TITLE_BLOCKなら各ページの表題欄のみ）
             
         Returns:
             DrawingData: 解析された図面データ
         """
-        pages = []
-        extracted_text = {}
-        metadata = {}
+        return self._parse_source(pdf_path, pdf_path, pdf_path,
+                                  lambda: hash_file(pdf_path), timings, region)
+    
+    def parse_bytes(self, data: bytes, file_name: str = "<bytes>",
+                    timings: Optional[StageTimings] = None,
+                    region: str = REGION_SHEET) -> DrawingData:
+        """
+        メモリ上のPDFバイト列を解析する（一時ファイル不要）
+        
+        Args:
+            data: PDFのバイト列
+            file_name: DrawingData.file_pathに記録する名前
+            timings: 渡した場合、段階ごとの処理時間を記録する
+            region: テキストの抽出範囲（REGION_TITLE_BLOCKなら各ページの表題欄のみ）
+            
+        Returns:
+            DrawingData: 解析された図面データ
+        """
+        return self._parse_source(io.BytesIO(data), file_name, data,
+                                  lambda: hash_bytes(data), timings, region)
+    
+    def parse_stream(self, stream: BinaryIO, file_name: Optional[str] = None,
+                     timings: Optional[StageTimings] = None,
+                     region: str = REGION_SHEET) -> DrawingData:
+        """
+        シーク可能なファイルオブジェクト（BytesIO、open()したファイルなど）を解析する
+        
+        Args:
+            stream: PDFを読み出せるバイナリストリーム
+            file_name: DrawingData.file_pathに記録する名前（省略時はstream.name）
+            timings: 渡した場合、段階ごとの処理時間を記録する
+            region: テキストの抽出範囲（REGION_TITLE_BLOCKなら各ページの表題欄のみ）
+            
+        Returns:
+            DrawingData: 解析された図面データ
+        """
+        if file_name is None:
+            file_name = str(getattr(stream, 'name', '<stream>'))
+        return self._parse_source(stream, file_name, None,
+                                  lambda: hash_stream(stream), timings, region)
+    
+    def parse_mmap(self, pdf_path: str, timings: Optional[StageTimings] = None,
+                   region: str = REGION_SHEET) -> DrawingData:
+        """
+        ローカルファイルをメモリマップして解析する（大きな図面セット向け）
+        
+        Args:
+            pdf_path: PDFファイルのパス
+            timings: 渡した場合、段階ごとの処理時間を記録する
+            region: テキストの抽出範囲（REGION_TITLE_BLOCKなら各ページの表題欄のみ）
+            
+        Returns:
+            DrawingData: 解析された図面データ
+        """
+        with open(pdf_path, 'rb') as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return self._parse_source(mapped, pdf_path, pdf_path,
+                                          lambda: hash_bytes(mapped), timings, region)
+    
+    def iter_pages(self, source: Union[str, bytes, BinaryIO],
+                   metadata: Optional[Dict[str, any]] = None,
+                   region: str = REGION_SHEET) -> Iterator[PageData]:
+        """
+        ページを抽出した順に1ページずつ返す（ストリーミング処理用、ページ単位のキャッシュのみ使う）
+        
+        Args:
+            source: PDFファイルのパス、バイト列、またはバイナリストリーム
+            metadata: 渡した場合、最初のページを返す前にメタデータ（num_pages含む）を書き込む
+            region: テキストの抽出範囲（REGION_TITLE_BLOCKなら各ページの表題欄のみ）
+            
+        Yields:
+            PageData: 1ページ分のデータ
+            
+        Raises:
+            MemoryLimitExceeded: RSSがmemory_limit_mbを超えた場合
+        """
+        if isinstance(source, bytes):
+            source = io.BytesIO(source)
+        if metadata is None:
+            metadata = {}
         
-        # PyPDF2でメタデータを取得
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                metadata = {
-                    'title': pdf_reader.metadata.get('/Title', '') if pdf_reader.metadata else '',
-                    'author': pdf_reader.metadata.get('/Author', '') if pdf_reader.metadata else '',
-                    'creator': pdf_reader.metadata.get('/Creator', '') if pdf_reader.metadata else '',
-                    'producer': pdf_reader.metadata.get('/Producer', '') if pdf_reader.metadata else '',
-                    'creation_date': pdf_reader.metadata.get('/CreationDate', '') if pdf_reader.metadata else '',
-                    'modification_date': pdf_reader.metadata.get('/ModDate', '') if pdf_reader.metadata else '',
-                    'num_pages': len(pdf_reader.pages)
-                }
+            pdf = pdfplumber.open(source)
         except Exception as e:
-            print(f"メタデータ取得エラー: {e}")
+            print(f"テキスト抽出エラー: {e}")
+            # フォールバック: PyPDF2を使用
+            fallback = self._parse_with_pypdf2(source, '', {})
+            metadata.update(fallback.metadata)
+            yield from fallback.pages
+            return
         
-        # pdfplumberでテキスト抽出（より精度が高い）
-        try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for page_num, page in enumerate(pdf.pages, start=1):
-                    text = page.extract_text() or ""
-                    extracted_text[page_num] = text
-                    
+        monitor = MemoryMonitor(self.memory_limit_mb)
+        with pdf:
+            metadata.update(_build_metadata(pdf.metadata, len(pdf.pages), key_prefix=''))
+            memo = {}
+            for page_num, page in enumerate(pdf.pages, start=1):
+                page_key = cached = None
+                if self.cache is not None:
+                    page_key = ResultCache.page_key(page_fingerprint(page.page_obj, memo),
+                                                    region, PARSER_VERSION)
+                    cached = self.cache.get(page_key)
+                if cached is not None:
+                    page_data = replace(cached, page_number=page_num)
+                else:
+                    text, title_block, words = _extract_page_text(page, region)
                     page_data = PageData(
                         page_number=page_num,
                         text=text,
                         width=page.width,
-                        height=page.height
+                        height=page.height,
+                        title_block=title_block,
+                        words=words
                     )
-                    pages.append(page_data)
+                    if page_key is not None:
+                        self.cache.put(page_key, replace(page_data))
+                page_hash = self.ocr.candidate(page, page_data.text) \
+                    if self.ocr is not None and page_data.title_block is None else None
+                if page_hash is not None:
+                    result = self.ocr.recognize_page(page, page_hash)
+                    if result is not None:
+                        page_data.text, page_data.words, page_data.ocr = result.text, result.words, True
+                # テキストを取り出したらページのレイアウトキャッシュを解放する
+                page.close()
+                monitor.sample()
+                yield page_data
+    
+    def _parse_source(self, source: Union[str, BinaryIO], file_path: str,
+                      worker_source: Optional[Union[str, bytes]],
+                      compute_hash: Callable[[], str],
+                      timings: Optional[StageTimings] = None,
+                      region: str = REGION_SHEET) -> DrawingData:
+        """
+        パスまたはストリームからPDFを解析する（キャッシュがあれば再利用する）
+        
+        Args:
+            source: pdfplumberに渡すパスまたはストリーム
+            file_path: DrawingData.file_pathに記録する値
+            worker_source: 並列抽出時に各ワーカーが開くパスまたはバイト列
+                （Noneなら必要時にストリームから読み出す）
+            compute_hash: PDFバイト列のSHA-256を計算する関数
+            timings: 段階ごとの処理時間の記録先
+            region: テキストの抽出範囲（抽出範囲ごとに別々にキャッシュする）
+        """
+        if timings is None:
+            timings = StageTimings()
+        with timings.stage('hash'):
+            file_hash = compute_hash()
+        cache_key = ResultCache.drawing_key(file_hash, region, self.version)
+        if self.cache is not None:
+            cached = self.cache.get(cache_key)
+            timings.cache['drawing'] = 'miss' if cached is None else 'hit'
+            if cached is not None:
+                return replace(cached, file_path=file_path, parser_version=self.version)
+        
+        drawing_data = self._parse_uncached(source, file_path, worker_source, timings, region)
+        drawing_data.file_hash = file_hash
+        drawing_data.parser_version = self.version
+        if self.cache is not None:
+            self.cache.put(cache_key, drawing_data)
+        return drawing_data
+    
+    def _parse_uncached(self, source: Union[str, BinaryIO], file_path: str,
+                        worker_source: Optional[Union[str, bytes]],
+                        timings: StageTimings, region: str = REGION_SHEET) -> DrawingData:
+        """
+        解析結果のキャッシュを使わずにPDFを解析する
+        
+        キャッシュがあれば、フィンガープリントが同じページ（前の版から変更のないページ）は
+        保存済みの抽出結果を使い、変更・追加されたページだけを抽出する。
+        ページごとのレイアウトキャッシュはテキスト取得後すぐに解放するため、
+        メモリ使用量はページ数ではなく最も重いページで決まる。
+        解析中のRSSのピークを timings.memory に記録する（並列抽出時はこのプロセス分）
+        
+        Raises:
+            MemoryLimitExceeded: RSSがmemory_limit_mbを超えた場合
+        """
+        pages = []
+        extracted_text = {}
+        metadata = {}
+        monitor = MemoryMonitor(self.memory_limit_mb)
+        
+        # pdfplumberで1度だけ開き、同じハンドルからメタデータとテキストを取得する
+        try:
+            with timings.stage('metadata'):
+                pdf = pdfplumber.open(source)
+            with pdf:
+                with timings.stage('metadata'):
+                    metadata = _build_metadata(pdf.metadata, len(pdf.pages), key_prefix='')
+                num_pages = metadata['num_pages']
+                # 前の版などで抽出済みのページ（フィンガープリントが同じページ）は抽出しない
+                reused, page_keys = self._cached_pages(pdf, region, timings)
+                missing = [number for number in range(1, num_pages + 1) if number not in reused]
+                with timings.stage('extraction'):
+                    if self.workers > 1 and len(missing) > 1:
+                        if worker_source is None:
+                            worker_source = _read_all(source)
+                        extracted = []
+                        for page_num, text, width, height, seconds, title_block, words in \
+                                self._extract_parallel(worker_source, missing, region):
+                            monitor.sample()
+                            timings.pages.append(seconds)
+                            extracted.append(PageData(
+                                page_number=page_num,
+                                text=text,
+                                width=width,
+                                height=height,
+                                title_block=title_block,
+                                words=words
+                            ))
+                    else:
+                        extracted = self._extract_serial(pdf, missing, timings, monitor, region)
+                if page_keys:
+                    # OCRや索引作成で書き換える前の抽出結果を保存する
+                    self.cache.put_many({page_keys[page.page_number]: replace(page) for page in extracted})
+                    metadata['changed_pages'] = missing
+                pages = sorted(extracted + list(reused.values()), key=lambda page: page.page_number)
+                extracted_text = {page.page_number: page.text for page in pages}
+                if self.ocr is not None:
+                    with timings.stage('ocr'):
+                        self._apply_ocr(pdf, source, worker_source, pages, extracted_text, metadata)
+        except MemoryLimitExceeded:
+            timings.memory = monitor.to_dict()
+            raise
         except Exception as e:
             print(f"テキスト抽出エラー: {e}")
-            # フォールバック: PyPDF2を使用
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page_num, page in enumerate(pdf_reader.pages, start=1):
-                    text = page.extract_text() or ""
-                    extracted_text[page_num] = text
-                    
-                    page_data = PageData(
-                        page_number=page_num,
-                        text=text,
-                        width=0.0,
-                        height=0.0
-                    )
-                    pages.append(page_data)
+            # フォールバック: PyPDF2を使用（pdfplumberで失敗した場合のみ開く）
+            timings.pages.clear()
+            with timings.stage('fallback'):
+                drawing_data = self._parse_with_pypdf2(source, file_path, metadata)
+            monitor.sample()
+            timings.memory = monitor.to_dict()
+            return drawing_data
         
+        timings.memory = monitor.to_dict()
+        with timings.stage('word_index'):
+            word_index = WordIndex.from_pages(pages)
+        for page in pages:
+            page.words = None  # 索引に移したのでページ側の配列は手放す
         return DrawingData(
-            file_path=pdf_path,
+            file_path=file_path,
+            pages=pages,
+            metadata=metadata,
+            extracted_text=extracted_text,
+            region=region,
+            word_index=word_index
+        )
+    
+    def _parse_with_pypdf2(self, source: Union[str, BinaryIO], file_path: str,
+                           metadata: Dict[str, any]) -> DrawingData:
+        """PyPDF2でメタデータとテキストを取得する（フォールバック）"""
+        if isinstance(source, str):
+            with open(source, 'rb') as file:
+                return self._read_with_pypdf2(file, file_path, metadata)
+        source.seek(0)
+        return self._read_with_pypdf2(source, file_path, metadata)
+    
+    def _read_with_pypdf2(self, stream: BinaryIO, file_path: str,
+                          metadata: Dict[str, any]) -> DrawingData:
+        """開いているストリームをPyPDF2で読む"""
+        pages = []
+        extracted_text = {}
+        pdf_reader = PyPDF2.PdfReader(stream)
+        if not metadata:
+            try:
+                metadata = _build_metadata(pdf_reader.metadata, len(pdf_reader.pages), key_prefix='/')
+            except Exception as e:
+                print(f"メタデータ取得エラー: {e}")
+        for page_num, page in enumerate(pdf_reader.pages, start=1):
+            text = page.extract_text() or ""
+            extracted_text[page_num] = text
+            
+            page_data = PageData(
+                page_number=page_num,
+                text=text,
+                width=0.0,
+                height=0.0
+            )
+            pages.append(page_data)
+        
+        return DrawingData(
+            file_path=file_path,
             pages=pages,
             metadata=metadata,
             extracted_text=extracted_text
         )
     
+    def _cached_pages(self, pdf: "pdfplumber.PDF", region: str, timings: StageTimings
+                      ) -> Tuple[Dict[int, PageData], Dict[int, str]]:
+        """
+        ページのフィンガープリントで、抽出済みのページをキャッシュから取り出す
+        
+        Returns:
+            Tuple[Dict[int, PageData], Dict[int, str]]: ページ番号 -> キャッシュにあったページ、
+                ページ番号 -> ページのキャッシュキー（キャッシュを使わない場合はどちらも空）
+        """
+        if self.cache is None:
+            return {}, {}
+        with timings.stage('fingerprint'):
+            memo = {}
+            page_keys = {
+                page.page_number: ResultCache.page_key(page_fingerprint(page.page_obj, memo),
+                                                       region, PARSER_VERSION)
+                for page in pdf.pages
+            }
+            reused = {}
+            for page_number, key in page_keys.items():
+                cached = self.cache.get(key)
+                if cached is not None:
+                    reused[page_number] = replace(cached, page_number=page_number)
+        timings.cache['pages'] = ('hit' if len(reused) == len(page_keys)
+                                  else 'partial' if reused else 'miss')
+        return reused, page_keys
+    
+    def _extract_serial(self, pdf: "pdfplumber.PDF", page_numbers: List[int],
+                        timings: StageTimings, monitor: MemoryMonitor,
+                        region: str = REGION_SHEET) -> List[PageData]:
+        """開いているPDFの指定ページを順に抽出する（抽出したページのキャッシュはすぐに解放する）"""
+        pages = []
+        for page_num in page_numbers:
+            page = pdf.pages[page_num - 1]
+            page_start = time.perf_counter()
+            text, title_block, words = _extract_page_text(page, region)
+            timings.pages.append(time.perf_counter() - page_start)
+            # pdfplumberがページごとに保持する文字・線・矩形のキャッシュを解放する
+            page.close()
+            monitor.sample()
+            
+            page_data = PageData(
+                page_number=page_num,
+                text=text,
+                width=page.width,
+                height=page.height,
+                title_block=title_block,
+                words=words
+            )
+            pages.append(page_data)
+        return pages
+    
+    def _apply_ocr(self, pdf: "pdfplumber.PDF", source: Union[str, BinaryIO],
+                   worker_source: Optional[Union[str, bytes]], pages: List[PageData],
+                   extracted_text: Dict[int, str], metadata: Dict[str, any]) -> None:
+        """
+        テキストレイヤーのないページをOCRしてテキストと単語の位置を置き換える
+        
+        テキストが十分にあるページは文字数の確認だけで済ませる。OCRしたページ番号を
+        metadata['ocr_pages']、時間・ページ数の上限でOCRできなかったページ番号を
+        metadata['ocr_skipped'] に記録する
+        """
+        candidates = {}
+        for page in pages:
+            if page.title_block is not None:
+                continue  # 表題欄から文字を抽出できたページ
+            page_hash = self.ocr.candidate(pdf.pages[page.page_number - 1], page.text)
+            if page_hash is not None:
+                candidates[page.page_number] = page_hash
+        if not candidates:
+            return
+        
+        if worker_source is None:
+            worker_source = _read_all(source)
+        results, skipped = self.ocr.recognize_pages(worker_source, candidates)
+        for page in pages:
+            result = results.get(page.page_number)
+            if result is None:
+                continue
+            page.text, page.words, page.ocr = result.text, result.words, True
+            extracted_text[page.page_number] = result.text
+        metadata['ocr_pages'] = sorted(results)
+        metadata['ocr_skipped'] = skipped
+        if skipped:
+            print(f"警告: OCRできなかったページがあります（テキストなしでチェックします）: {skipped}")
+    
+    def _extract_parallel(self, source: Union[str, bytes], page_numbers: List[int],
+                          region: str = REGION_SHEET
+                          ) -> List[Tuple[int, str, float, float, float, Optional[tuple], array]]:
+        """
+        指定ページをプロセスプールに分散して抽出する
+        
+        各ワーカーがファイルを自分で開き、結果はページ順に並べ直して返す
+        """
+        workers = min(self.workers, len(page_numbers))
+        # ページごとの重さの偏りをならすため、ワーカー数の2倍に分割する
+        chunk = max(1, -(-len(page_numbers) // (workers * 2)))
+        chunks = [page_numbers[start:start + chunk] for start in range(0, len(page_numbers), chunk)]
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_extract_pages, source, numbers,
+                                       self.memory_limit_mb, region)
+                       for numbers in chunks]
+            results = []
+            for future in futures:
+                results.extend(future.result())
+        return results
+    
     def extract_text(self, pdf_path: str) -> Dict[int, str]:
         """
         各ページからテキストを抽出
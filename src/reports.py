@@ -0,0 +1,487 @@
+"""
+Reports Module
+チェック結果をExcel（openpyxlの書き込み専用モード）とPDF（reportlab）の報告書に書き出す。
+文書を1件受け取るたびにその行を書き出して手放すため、数千枚分の月次報告でも文書数に比例して
+メモリを使わない（PDFのみ、保存までページごとの描画命令を保持する）
+"""
+
+import os
+import sys
+import argparse
+from datetime import datetime
+from dataclasses import dataclass
+from typing import BinaryIO, Iterable, List, Optional, Sequence, Tuple, Union
+
+try:
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+
+try:
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.utils import simpleSplit
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+    from reportlab.pdfgen import canvas
+    REPORTLAB_AVAILABLE = True
+except ImportError:
+    REPORTLAB_AVAILABLE = False
+
+from .checkers import CheckResult, CheckStatus
+from .results_store import CheckRecord, DEFAULT_RESULTS_DB, ResultStore
+
+
+# 報告書の形式（拡張子）
+REPORT_FORMATS = ("xlsx", "pdf")
+
+# 報告書の既定の表題
+DEFAULT_TITLE = "図面チェック報告書"
+
+# PDFの日本語フォント（reportlab組み込みのCIDフォント、フォントファイル不要）
+PDF_FONT = "HeiseiKakuGo-W5"
+
+# 各形式のMIMEタイプ
+MEDIA_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "pdf": "application/pdf",
+}
+
+Output = Union[str, os.PathLike, BinaryIO]
+
+
+@dataclass
+class ReportTotals:
+    """報告書に含めた文書の集計"""
+    files: int = 0
+    passed: int = 0
+    failed: int = 0
+    errors: int = 0
+    ok: int = 0
+    ng: int = 0
+    warning: int = 0
+    required_ng: int = 0
+
+    def add(self, summary: dict) -> None:
+        """1文書分のサマリーを加える"""
+        self.files += 1
+        if summary['status'] == 'PASS':
+            self.passed += 1
+        else:
+            self.failed += 1
+        self.ok += summary['ok']
+        self.ng += summary['ng']
+        self.warning += summary['warning']
+        self.required_ng += summary['required_ng']
+
+    def rows(self) -> List[Tuple[str, int]]:
+        """表示用の（見出し, 値）"""
+        return [
+            ("文書数", self.files),
+            ("合格", self.passed),
+            ("不合格", self.failed),
+            ("エラー", self.errors),
+            ("OK", self.ok),
+            ("NG", self.ng),
+            ("警告", self.warning),
+            ("必須項目NG", self.required_ng),
+        ]
+
+
+def _findings(record: CheckRecord) -> List[CheckResult]:
+    """報告書に載せる指摘（OK以外）"""
+    return [result for result in record.results if result.status != CheckStatus.OK]
+
+
+def _format_location(result: CheckResult) -> str:
+    if result.location is None:
+        return ""
+    return f"x={result.location[0]:.0f}, y={result.location[1]:.0f}"
+
+
+def _format_checked_at(checked_at: datetime) -> str:
+    return checked_at.strftime('%Y-%m-%d %H:%M')
+
+
+class ReportWriter:
+    """
+    報告書の書き出し（形式ごとのサブクラスで実装）
+
+    add() / add_error() で文書を1件ずつ渡し、最後に close() で集計を書いて保存する。
+    with文で使うと抜けるときに close() する
+    """
+
+    format = ""
+
+    def __init__(self, output: Output, title: str = DEFAULT_TITLE):
+        """
+        Args:
+            output: 保存先のパス、またはバイナリのファイルオブジェクト
+            title: 報告書の表題
+        """
+        self.output = output
+        self.title = title
+        self.totals = ReportTotals()
+        self._closed = False
+
+    def add(self, record: CheckRecord) -> None:
+        """1文書分のチェック結果を書き出す"""
+        self.totals.add(record.summary)
+        self._write_record(record)
+
+    def add_error(self, file_name: str, error: str) -> None:
+        """チェックできなかった文書を書き出す"""
+        self.totals.files += 1
+        self.totals.errors += 1
+        self._write_error(file_name, error)
+
+    def close(self) -> ReportTotals:
+        """
+        集計を書き出して保存する
+
+        Returns:
+            ReportTotals: 報告書に含めた文書の集計
+        """
+        if not self._closed:
+            self._closed = True
+            self._finish()
+        return self.totals
+
+    def __enter__(self) -> "ReportWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _write_record(self, record: CheckRecord) -> None:
+        raise NotImplementedError
+
+    def _write_error(self, file_name: str, error: str) -> None:
+        raise NotImplementedError
+
+    def _finish(self) -> None:
+        raise NotImplementedError
+
+
+class ExcelReportWriter(ReportWriter):
+    """
+    Excelの報告書
+
+    シートは「集計」「文書」（1文書1行）「指摘事項」（OK以外の結果1件1行）。
+    書き込み専用のブックに行を追記するため、書いた行はメモリに残らない
+    """
+
+    format = "xlsx"
+
+    DOCUMENT_HEADER = ("チェック日時", "ファイル", "案件", "設計事務所", "判定",
+                       "総数", "OK", "NG", "警告", "必須項目NG", "エラー")
+    FINDING_HEADER = ("チェック日時", "ファイル", "案件", "設計事務所", "カテゴリ", "項目",
+                      "状態", "重要度", "内容", "ページ", "位置", "修正提案")
+
+    def __init__(self, output: Output, title: str = DEFAULT_TITLE):
+        """
+        Raises:
+            RuntimeError: openpyxlがインストールされていない場合
+        """
+        if not OPENPYXL_AVAILABLE:
+            raise RuntimeError("openpyxlがインストールされていません（pip install openpyxl）")
+        super().__init__(output, title)
+        self._bold = Font(bold=True)
+        self._workbook = Workbook(write_only=True)
+        # 集計は最後に書くが、先頭のシートにしておく
+        self._totals_sheet = self._workbook.create_sheet("集計")
+        self._documents = self._sheet("文書", self.DOCUMENT_HEADER,
+                                      (18, 40, 16, 16, 8, 8, 8, 8, 8, 10, 40))
+        self._findings = self._sheet("指摘事項", self.FINDING_HEADER,
+                                     (18, 40, 16, 16, 16, 20, 10, 8, 60, 8, 16, 40))
+
+    def _sheet(self, name: str, header: Sequence[str], widths: Sequence[float]):
+        sheet = self._workbook.create_sheet(name)
+        for column, width in zip("ABCDEFGHIJKLMNOPQRSTUVWXYZ", widths):
+            sheet.column_dimensions[column].width = width
+        sheet.freeze_panes = "A2"
+        sheet.append([self._cell(sheet, value, self._bold) for value in header])
+        return sheet
+
+    @staticmethod
+    def _cell(sheet, value, font: "Font") -> "WriteOnlyCell":
+        cell = WriteOnlyCell(sheet, value=value)
+        cell.font = font
+        return cell
+
+    def _write_record(self, record: CheckRecord) -> None:
+        summary = record.summary
+        self._documents.append([
+            record.checked_at, record.file_name, record.project, record.office, summary['status'],
+            summary['total'], summary['ok'], summary['ng'], summary['warning'], summary['required_ng'], None,
+        ])
+        for result in _findings(record):
+            self._findings.append([
+                record.checked_at, record.file_name, record.project, record.office,
+                result.category, result.item, result.status.value, result.importance.value,
+                result.message, result.page_number, _format_location(result), result.suggestion,
+            ])
+
+    def _write_error(self, file_name: str, error: str) -> None:
+        self._documents.append([None, file_name, None, None, "ERROR",
+                                None, None, None, None, None, error])
+
+    def _finish(self) -> None:
+        sheet = self._totals_sheet
+        sheet.column_dimensions["A"].width = 16
+        sheet.column_dimensions["B"].width = 20
+        sheet.append([self._cell(sheet, self.title, Font(bold=True, size=14))])
+        sheet.append(["作成日時", _format_checked_at(datetime.now())])
+        sheet.append([])
+        for label, value in self.totals.rows():
+            sheet.append([label, value])
+        self._workbook.save(self.output)
+
+
+class PdfReportWriter(ReportWriter):
+    """
+    PDFの報告書（A4横）
+
+    文書ごとに見出し行と指摘事項の表を描き、ページが埋まるたびに改ページする。
+    集計は最後のページに載せる（文書を受け取りながら書くため、先頭には置けない）。
+    reportlabは保存するまで各ページの描画命令（1ページ20KB程度）を持つため、
+    メモリ使用量はページ数に比例する（月1500文書・約180ページで4MB程度）
+    """
+
+    format = "pdf"
+
+    PAGE_SIZE = landscape(A4) if REPORTLAB_AVAILABLE else (841.89, 595.28)
+    MARGIN = 36
+    FONT_SIZE = 8
+    LINE_HEIGHT = 11
+    # 指摘事項の表の列（見出し, 幅pt）
+    COLUMNS = (("カテゴリ", 90), ("項目", 100), ("状態", 50), ("重要度", 40),
+               ("内容", 300), ("ページ", 36), ("修正提案", 150))
+
+    def __init__(self, output: Output, title: str = DEFAULT_TITLE):
+        """
+        Raises:
+            RuntimeError: reportlabがインストールされていない場合
+        """
+        if not REPORTLAB_AVAILABLE:
+            raise RuntimeError("reportlabがインストールされていません（pip install reportlab）")
+        super().__init__(output, title)
+        if PDF_FONT not in pdfmetrics.getRegisteredFontNames():
+            pdfmetrics.registerFont(UnicodeCIDFont(PDF_FONT))
+        self._canvas = canvas.Canvas(output, pagesize=self.PAGE_SIZE, pageCompression=1)
+        self._canvas.setTitle(title)
+        self._page = 0
+        self._start_page()
+
+    def _start_page(self) -> None:
+        self._page += 1
+        width, height = self.PAGE_SIZE
+        c = self._canvas
+        c.setFont(PDF_FONT, self.FONT_SIZE)
+        c.drawString(self.MARGIN, self.MARGIN / 2, self.title)
+        c.drawRightString(width - self.MARGIN, self.MARGIN / 2, f"{self._page}ページ")
+        self._y = height - self.MARGIN
+        if self._page == 1:
+            c.setFont(PDF_FONT, 16)
+            c.drawString(self.MARGIN, self._y - 16, self.title)
+            c.setFont(PDF_FONT, self.FONT_SIZE)
+            c.drawString(self.MARGIN, self._y - 30, f"作成日時: {_format_checked_at(datetime.now())}")
+            self._y -= 48
+
+    def _ensure_space(self, lines: int) -> None:
+        """lines行分の余白がなければ改ページする"""
+        if self._y - lines * self.LINE_HEIGHT < self.MARGIN:
+            self._canvas.showPage()
+            self._start_page()
+
+    def _line(self, text: str, x: float = 0, size: Optional[float] = None) -> None:
+        c = self._canvas
+        c.setFont(PDF_FONT, size or self.FONT_SIZE)
+        c.drawString(self.MARGIN + x, self._y - self.LINE_HEIGHT + 2, text)
+        self._y -= self.LINE_HEIGHT
+
+    def _rule(self) -> None:
+        width, _ = self.PAGE_SIZE
+        self._canvas.line(self.MARGIN, self._y, width - self.MARGIN, self._y)
+
+    def _table_row(self, cells: Sequence[str]) -> None:
+        """指摘事項の表の1行（長い値は列幅で折り返す）"""
+        wrapped = [
+            simpleSplit(cell or "", PDF_FONT, self.FONT_SIZE, width - 4) or [""]
+            for cell, (_, width) in zip(cells, self.COLUMNS)
+        ]
+        lines = max(len(cell) for cell in wrapped)
+        self._ensure_space(lines)
+        c = self._canvas
+        c.setFont(PDF_FONT, self.FONT_SIZE)
+        x = self.MARGIN + 12
+        for cell, (_, width) in zip(wrapped, self.COLUMNS):
+            for i, text in enumerate(cell):
+                c.drawString(x, self._y - (i + 1) * self.LINE_HEIGHT + 2, text)
+            x += width
+        self._y -= lines * self.LINE_HEIGHT
+
+    def _document_header(self, file_name: str, detail: str) -> None:
+        self._ensure_space(3)
+        self._y -= 4
+        self._rule()
+        self._line(file_name, size=self.FONT_SIZE + 1)
+        self._line(detail, x=12)
+
+    def _write_record(self, record: CheckRecord) -> None:
+        summary = record.summary
+        detail = (f"{_format_checked_at(record.checked_at)}  判定: {summary['status']}  "
+                  f"OK: {summary['ok']}  NG: {summary['ng']}  警告: {summary['warning']}  "
+                  f"必須項目NG: {summary['required_ng']}")
+        for label, value in (("案件", record.project), ("設計事務所", record.office)):
+            if value:
+                detail += f"  {label}: {value}"
+        self._document_header(record.file_name, detail)
+        findings = _findings(record)
+        if not findings:
+            return
+        self._table_row([name for name, _ in self.COLUMNS])
+        for result in findings:
+            self._table_row([
+                result.category, result.item, result.status.value, result.importance.value,
+                result.message, str(result.page_number or ""), result.suggestion or "",
+            ])
+
+    def _write_error(self, file_name: str, error: str) -> None:
+        self._document_header(file_name, f"判定: ERROR  {error}")
+
+    def _finish(self) -> None:
+        rows = self.totals.rows()
+        self._ensure_space(len(rows) + 3)
+        self._y -= 8
+        self._rule()
+        self._line("集計", size=self.FONT_SIZE + 4)
+        self._y -= 4
+        for label, value in rows:
+            self._line(f"{label}: {value}", x=12)
+        self._canvas.save()
+
+
+_WRITERS = {
+    "xlsx": ExcelReportWriter,
+    "pdf": PdfReportWriter,
+}
+
+
+def report_format(output: Output, fmt: Optional[str] = None) -> str:
+    """
+    報告書の形式（fmtを省略した場合は保存先の拡張子から決める）
+
+    Raises:
+        ValueError: 形式が xlsx / pdf のどちらでもない場合
+    """
+    if fmt is None and isinstance(output, (str, os.PathLike)):
+        fmt = os.path.splitext(os.fspath(output))[1].lstrip('.')
+    fmt = (fmt or "").lower()
+    if fmt not in _WRITERS:
+        raise ValueError(f"報告書の形式は {' / '.join(REPORT_FORMATS)} を指定してください: {fmt or '(なし)'}")
+    return fmt
+
+
+def open_report(output: Output, fmt: Optional[str] = None, title: str = DEFAULT_TITLE) -> ReportWriter:
+    """
+    報告書を書き始める
+
+    Args:
+        output: 保存先のパス、またはバイナリのファイルオブジェクト
+        fmt: xlsx / pdf（省略時は保存先の拡張子から決める）
+        title: 報告書の表題
+
+    Raises:
+        ValueError: 形式が不明な場合
+        RuntimeError: 形式に必要なライブラリがインストールされていない場合
+    """
+    return _WRITERS[report_format(output, fmt)](output, title)
+
+
+def write_report(records: Iterable[CheckRecord], output: Output, fmt: Optional[str] = None,
+                 title: str = DEFAULT_TITLE) -> ReportTotals:
+    """
+    チェック結果を報告書に書き出す
+
+    Args:
+        records: チェック結果（ResultStore.iter_records などのイテレータを渡せば1件ずつ書き出す）
+        output: 保存先のパス、またはバイナリのファイルオブジェクト
+        fmt: xlsx / pdf（省略時は保存先の拡張子から決める）
+        title: 報告書の表題
+
+    Returns:
+        ReportTotals: 報告書に含めた文書の集計
+    """
+    with open_report(output, fmt, title) as report:
+        for record in records:
+            report.add(record)
+    return report.totals
+
+
+def month_range(month: str) -> Tuple[datetime, datetime]:
+    """
+    月（例: "2026-09"）の期間
+
+    Returns:
+        Tuple[datetime, datetime]: （月初, 翌月初）
+
+    Raises:
+        ValueError: YYYY-MM形式でない場合
+    """
+    since = datetime.strptime(month, '%Y-%m')
+    if since.month == 12:
+        return since, since.replace(year=since.year + 1, month=1)
+    return since, since.replace(month=since.month + 1)
+
+
+def report_title(since: Optional[datetime] = None, until: Optional[datetime] = None,
+                 month: Optional[str] = None) -> str:
+    """期間（または月）を含めた報告書の表題"""
+    if month:
+        return f"{DEFAULT_TITLE}（{month}）"
+    if since is None and until is None:
+        return DEFAULT_TITLE
+    start = since.strftime('%Y-%m-%d') if since else ""
+    end = until.strftime('%Y-%m-%d') if until else ""
+    return f"{DEFAULT_TITLE}（{start}〜{end}）"
+
+
+def _parse_date(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """保存済みのチェック結果から報告書（月次報告など）を作成する"""
+    parser = argparse.ArgumentParser(description='保存済みのチェック結果から報告書を作成')
+    parser.add_argument('--output', '-o', required=True, help='保存先（拡張子 .xlsx / .pdf で形式を決める）')
+    parser.add_argument('--format', '-f', choices=REPORT_FORMATS, default=None,
+                        help='報告書の形式（省略時は保存先の拡張子から決める）')
+    parser.add_argument('--db', default=DEFAULT_RESULTS_DB, help='データベースURL (default: SOUKEN_RESULTS_DB)')
+    parser.add_argument('--month', help='対象の月（例: 2026-09、--since / --until より優先）')
+    parser.add_argument('--project', help='案件名')
+    parser.add_argument('--office', help='設計事務所')
+    parser.add_argument('--since', type=_parse_date, help='この日時以降（例: 2026-07-01）')
+    parser.add_argument('--until', type=_parse_date, help='この日時より前（例: 2026-10-01）')
+    parser.add_argument('--title', help='報告書の表題（省略時は期間から作る）')
+    args = parser.parse_args(argv)
+
+    since, until = args.since, args.until
+    try:
+        if args.month:
+            since, until = month_range(args.month)
+        fmt = report_format(args.output, args.format)
+    except ValueError as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    store = ResultStore(args.db)
+    records = store.iter_records(since=since, until=until, project=args.project, office=args.office)
+    totals = write_report(records, args.output, fmt, args.title or report_title(since, until, args.month))
+    print(f"報告書を保存しました: {args.output}（{totals.files}文書、NG {totals.ng}件）", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Result Cache Module
+PDFのSHA-256とルールセットのバージョンをキーに、
+解析結果（DrawingData）とチェック結果をキャッシュする
+"""
+
+import os
+import pickle
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional
+
+from .user_dirs import USER_CACHE_DIR, prepare_private_dir
+
+
+# ディスクキャッシュの既定ディレクトリ（環境変数で変更可能、既定はユーザーごとのキャッシュディレクトリ）
+DEFAULT_CACHE_DIR = os.environ.get('SOUKEN_CACHE_DIR', USER_CACHE_DIR)
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+# 上限を超えたときに削除して減らす先（上限に対する割合、上限付近で毎回走査しないよう余裕を持たせる）
+_EVICT_TARGET = 0.9
+
+
+def hash_bytes(data: bytes) -> str:
+    """バイト列のSHA-256（16進文字列）"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_stream(stream: BinaryIO) -> str:
+    """ストリーム全体のSHA-256（読み出し位置は元に戻す）"""
+    position = stream.tell()
+    stream.seek(0)
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(_HASH_CHUNK_SIZE), b''):
+        digest.update(chunk)
+    stream.seek(position)
+    return digest.hexdigest()
+
+
+def hash_file(path: str) -> str:
+    """ファイルのSHA-256"""
+    with open(path, 'rb') as file:
+        return hash_stream(file)
+
+
+class ResultCache:
+    """
+    2階層のコンテンツアドレスキャッシュ
+
+    - メモリ: プロセス内のLRU（件数上限）
+    - ディスク: pickleファイル（合計サイズ上限、古いものから削除）
+
+    ディスクの合計サイズは書き込みのたびに足し込み、上限を超えたときだけディレクトリを走査する
+    """
+
+    def __init__(self, cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+                 max_memory_items: int = 64,
+                 max_disk_bytes: int = 512 * 1024 * 1024):
+        """
+        Args:
+            cache_dir: ディスクキャッシュのディレクトリ（Noneならメモリのみ）
+            max_memory_items: メモリに保持する最大件数
+            max_disk_bytes: ディスクキャッシュの合計サイズ上限（バイト）
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_memory_items = max_memory_items
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+        # ディスクキャッシュの合計サイズ（最初の書き込みで走査するまではNone）
+        self._disk_bytes: Optional[int] = None
+
+        if self.cache_dir is not None:
+            try:
+                prepare_private_dir(self.cache_dir)
+            except OSError as e:
+                print(f"キャッシュディレクトリを使えません（メモリのみでキャッシュします）: {e}")
+                self.cache_dir = None
+
+    @staticmethod
+    def drawing_key(file_hash: str, region: str, parser_version: str) -> str:
+        """解析結果（DrawingData）のキー（抽出範囲・解析結果の形式ごとに別のキー）"""
+        return f"drawing-{file_hash}-{region}-{parser_version}"
+
+    @staticmethod
+    def page_key(fingerprint: str, region: str, parser_version: str) -> str:
+        """1ページ分の抽出結果のキー（ページの描画命令・リソースのハッシュ、抽出範囲ごと）"""
+        return f"page-{fingerprint}-{region}-{parser_version}"
+
+    @staticmethod
+    def ocr_key(page_hash: str, engine_id: str) -> str:
+        """1ページ分のOCR結果のキー（ページの描画命令と画像のハッシュ、OCRの設定ごと）"""
+        return f"ocr-{page_hash}-{engine_id}"
+
+    @staticmethod
+    def results_key(file_hash: str, ruleset_version: str, parser_version: str, region: str) -> str:
+        """チェック結果のキー（ルールセット・解析結果の版（OCRの設定を含む）・抽出範囲ごとに別のキー）"""
+        return f"results-{file_hash}-{ruleset_version}-{parser_version}-{region}"
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        キャッシュから値を取得する
+
+        Args:
+            key: キャッシュキー
+
+        Returns:
+            キャッシュされた値（なければNone）
+        """
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return self._memory[key]
+
+        value = self._read_disk(key)
+        if value is None:
+            with self._lock:
+                self.stats['misses'] += 1
+            return None
+
+        with self._lock:
+            self.stats['disk_hits'] += 1
+            self._remember(key, value)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        """
+        キャッシュに値を保存する
+
+        Args:
+            key: キャッシュキー
+            value: pickle可能な値
+        """
+        with self._lock:
+            self._remember(key, value)
+        self._account([self._write_disk(key, value)])
+
+    def put_many(self, items: Dict[str, Any]) -> None:
+        """
+        複数の値をまとめて保存する（ディスクの上限確認は最後に1回だけ行う）
+
+        Args:
+            items: キャッシュキー -> pickle可能な値
+        """
+        with self._lock:
+            for key, value in items.items():
+                self._remember(key, value)
+        self._account([self._write_disk(key, value) for key, value in items.items()])
+
+    def clear(self) -> None:
+        """メモリとディスクのキャッシュをすべて削除する"""
+        with self._lock:
+            self._memory.clear()
+            self._disk_bytes = None
+        if self.cache_dir is not None:
+            for path in self.cache_dir.glob('*.pkl'):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def _remember(self, key: str, value: Any) -> None:
+        """メモリLRUに追加する（ロック取得済みで呼ぶ）"""
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.pkl"
+
+    def _read_disk(self, key: str) -> Optional[Any]:
+        """ディスクから読み込む（最終利用時刻も更新する）"""
+        if self.cache_dir is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as file:
+                value = pickle.load(file)
+            os.utime(path)
+            return value
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"キャッシュ読み込みエラー: {e}")
+            return None
+
+    def _write_disk(self, key: str, value: Any) -> Optional[int]:
+        """
+        ディスクに書き込む（上限の確認は呼び出し側で _account() を呼ぶ）
+
+        Returns:
+            Optional[int]: 合計サイズの増分（上書きした場合は元のファイルとの差、書き込めなければNone）
+        """
+        if self.cache_dir is None:
+            return None
+        path = self._path(key)
+        try:
+            previous = path.stat().st_size
+        except OSError:
+            previous = 0
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as file:
+                pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+                size = file.tell()
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"キャッシュ書き込みエラー: {e}")
+            # 書きかけの一時ファイルは _evict() の対象（*.pkl）にならないため、ここで消す
+            if tmp_path is not None:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+            return None
+        return size - previous
+
+    def _account(self, added: List[Optional[int]]) -> None:
+        """書き込んだ分を合計サイズに足し、上限を超えていれば古いものから削除する"""
+        written = [size for size in added if size is not None]
+        if not written:
+            return
+        with self._lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes += sum(written)
+                if self._disk_bytes <= self.max_disk_bytes:
+                    return
+        self._evict()
+
+    def _evict(self) -> None:
+        """
+        ディレクトリを走査して合計サイズを数え直し、上限を超えていれば最終利用時刻の古い順に
+        上限の_EVICT_TARGETまで削除する
+
+        他のプロセス（ワーカー）の書き込み・削除もここで合計サイズに反映される
+        """
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob('*.pkl'):
+            try:
+                info = path.stat()
+            except OSError:
+                continue
+            entries.append((info.st_mtime, info.st_size, path))
+            total += info.st_size
+
+        if total <= self.max_disk_bytes:
+            with self._lock:
+                self._disk_bytes = total
+            return
+
+        entries.sort()
+        target = self.max_disk_bytes * _EVICT_TARGET
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_bytes = total
@@ -0,0 +1,458 @@
+"""
+Results Store Module
+チェック結果をデータベース（既定はSQLite）に保存し、項目・ステータス・期間などで検索する
+"""
+
+import os
+import sys
+import json
+import argparse
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+from dataclasses import dataclass, field
+
+try:
+    from sqlalchemy import (
+        Column, DateTime, Float, ForeignKey, Index, Integer, MetaData, String, Table, Text,
+        create_engine, event, insert, inspect, select,
+    )
+    SQLALCHEMY_AVAILABLE = True
+except ImportError:
+    SQLALCHEMY_AVAILABLE = False
+
+from .checkers import CheckResult, CheckStatus, Importance
+from .user_dirs import USER_DATA_DIR, prepare_private_dir
+
+
+# 環境変数で指定しない場合の保存先（ユーザーごとのデータディレクトリ、ディレクトリは0700で作る）
+_USER_RESULTS_DB = 'sqlite:///' + os.path.join(USER_DATA_DIR, 'results.sqlite3')
+
+# 保存先の既定値（SQLAlchemyのURL、環境変数で変更可能）
+DEFAULT_RESULTS_DB = os.environ.get('SOUKEN_RESULTS_DB', _USER_RESULTS_DB)
+
+# 検索結果の既定の最大件数
+DEFAULT_QUERY_LIMIT = 1000
+
+# 検索で指定できるステータス
+STATUS_VALUES = tuple(status.value for status in CheckStatus)
+
+# iter_records で1回に取り出す行数
+_STREAM_ROWS = 2000
+
+
+if SQLALCHEMY_AVAILABLE:
+    _metadata = MetaData()
+
+    # 1文書1回のチェック
+    checks_table = Table(
+        'checks', _metadata,
+        Column('id', Integer, primary_key=True, autoincrement=True),
+        Column('file_hash', String(64)),
+        Column('file_name', Text, nullable=False),
+        Column('project', String(255)),
+        Column('office', String(255)),  # 設計事務所
+        Column('checked_at', DateTime, nullable=False),
+        Column('ruleset_version', String(64)),
+        Column('status', String(8), nullable=False),  # PASS / FAIL
+        Column('total', Integer, nullable=False),
+        Column('ok', Integer, nullable=False),
+        Column('ng', Integer, nullable=False),
+        Column('warning', Integer, nullable=False),
+        Column('required_ng', Integer, nullable=False),
+        Index('ix_checks_file_hash', 'file_hash', 'checked_at'),
+        Index('ix_checks_project', 'project', 'checked_at'),
+        Index('ix_checks_office', 'office', 'checked_at'),
+        Index('ix_checks_checked_at', 'checked_at'),
+    )
+
+    # チェック結果1件（検索で結合しなくて済むよう、ハッシュ・案件・設計事務所・日時を複製して持つ）
+    results_table = Table(
+        'check_results', _metadata,
+        Column('id', Integer, primary_key=True, autoincrement=True),
+        Column('check_id', Integer, ForeignKey('checks.id', ondelete='CASCADE'), nullable=False),
+        Column('file_hash', String(64)),
+        Column('project', String(255)),
+        Column('office', String(255)),
+        Column('checked_at', DateTime, nullable=False),
+        Column('category', String(255), nullable=False),
+        Column('item', String(255), nullable=False),
+        Column('status', String(16), nullable=False),
+        Column('importance', String(16), nullable=False),
+        Column('message', Text, nullable=False),
+        Column('page_number', Integer),
+        Column('x', Float),
+        Column('y', Float),
+        Column('suggestion', Text),
+        Index('ix_check_results_check_id', 'check_id'),
+        Index('ix_check_results_file_hash', 'file_hash'),
+        Index('ix_check_results_project', 'project', 'checked_at'),
+        Index('ix_check_results_item_status', 'item', 'status', 'checked_at'),
+        Index('ix_check_results_status', 'status', 'checked_at'),
+        Index('ix_check_results_office', 'office', 'checked_at'),
+    )
+
+
+@dataclass
+class CheckRecord:
+    """保存する1文書分のチェック結果"""
+    file_name: str
+    results: List[CheckResult]
+    summary: dict
+    file_hash: Optional[str] = None
+    project: Optional[str] = None
+    office: Optional[str] = None  # 設計事務所
+    ruleset_version: Optional[str] = None
+    checked_at: datetime = field(default_factory=datetime.now)
+
+
+@dataclass
+class StoredResult:
+    """保存済みのチェック結果1件"""
+    check_id: int
+    file_name: str
+    file_hash: Optional[str]
+    project: Optional[str]
+    checked_at: datetime
+    category: str
+    item: str
+    status: str
+    importance: str
+    message: str
+    page_number: Optional[int] = None
+    location: Optional[Tuple[float, float]] = None
+    suggestion: Optional[str] = None
+    office: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        """APIレスポンス用の辞書"""
+        return {
+            'check_id': self.check_id,
+            'file_name': self.file_name,
+            'file_hash': self.file_hash,
+            'project': self.project,
+            'office': self.office,
+            'checked_at': self.checked_at.isoformat(timespec='seconds'),
+            'category': self.category,
+            'item': self.item,
+            'status': self.status,
+            'importance': self.importance,
+            'message': self.message,
+            'page_number': self.page_number,
+            'location': list(self.location) if self.location else None,
+            'suggestion': self.suggestion,
+        }
+
+
+def _enable_sqlite_wal(dbapi_connection, connection_record) -> None:
+    """SQLiteの接続設定（書き込み中も読み出せるようWALにする）"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+class ResultStore:
+    """
+    チェック結果の保存先
+
+    1回のチェックを checks に、結果を check_results に保存する。
+    結果の行はまとめて1回のexecutemanyで挿入する
+    """
+
+    def __init__(self, url: str = DEFAULT_RESULTS_DB):
+        """
+        Args:
+            url: SQLAlchemyのデータベースURL（例: sqlite:///results.sqlite3、postgresql://...）
+
+        Raises:
+            RuntimeError: SQLAlchemyがインストールされていない場合
+            PermissionError: 既定の保存先のディレクトリを他のユーザーが所有している、または書き込める場合
+        """
+        if not SQLALCHEMY_AVAILABLE:
+            raise RuntimeError("SQLAlchemyがインストールされていません（pip install sqlalchemy）")
+        if url == _USER_RESULTS_DB:
+            # 顧客の図面のチェック結果を置くため、自分だけが読めるディレクトリにする
+            prepare_private_dir(USER_DATA_DIR)
+        self.url = url
+        self.engine = create_engine(url)
+        if self.engine.dialect.name == 'sqlite':
+            event.listen(self.engine, 'connect', _enable_sqlite_wal)
+        _metadata.create_all(self.engine)
+        self._add_missing_columns()
+
+    def _add_missing_columns(self) -> None:
+        """以前の版で作ったテーブルに、後から追加した列と索引を追加する"""
+        inspector = inspect(self.engine)
+        with self.engine.begin() as conn:
+            for table in (checks_table, results_table):
+                existing = {column['name'] for column in inspector.get_columns(table.name)}
+                missing = [column for column in table.columns if column.name not in existing]
+                for column in missing:
+                    column_type = column.type.compile(dialect=self.engine.dialect)
+                    conn.exec_driver_sql(
+                        f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"
+                    )
+                if missing:
+                    for index in table.indexes:
+                        index.create(conn, checkfirst=True)
+
+    def save(self, record: CheckRecord) -> int:
+        """
+        1文書分のチェック結果を保存する
+
+        Returns:
+            int: チェックID
+        """
+        return self.save_many([record])[0]
+
+    def save_many(self, records: Iterable[CheckRecord]) -> List[int]:
+        """
+        複数文書のチェック結果を1トランザクションで保存する
+
+        Args:
+            records: 保存するチェック結果
+
+        Returns:
+            List[int]: recordsと同じ順のチェックID
+        """
+        check_ids = []
+        rows = []
+        with self.engine.begin() as conn:
+            for record in records:
+                summary = record.summary
+                check_id = conn.execute(insert(checks_table).values(
+                    file_hash=record.file_hash,
+                    file_name=record.file_name,
+                    project=record.project,
+                    office=record.office,
+                    checked_at=record.checked_at,
+                    ruleset_version=record.ruleset_version,
+                    status=summary['status'],
+                    total=summary['total'],
+                    ok=summary['ok'],
+                    ng=summary['ng'],
+                    warning=summary['warning'],
+                    required_ng=summary['required_ng'],
+                )).inserted_primary_key[0]
+                check_ids.append(check_id)
+                for result in record.results:
+                    x, y = result.location if result.location else (None, None)
+                    rows.append({
+                        'check_id': check_id,
+                        'file_hash': record.file_hash,
+                        'project': record.project,
+                        'office': record.office,
+                        'checked_at': record.checked_at,
+                        'category': result.category,
+                        'item': result.item,
+                        'status': result.status.value,
+                        'importance': result.importance.value,
+                        'message': result.message,
+                        'page_number': result.page_number,
+                        'x': x,
+                        'y': y,
+                        'suggestion': result.suggestion,
+                    })
+            if rows:
+                conn.execute(insert(results_table), rows)
+        return check_ids
+
+    def find(self, item: Optional[str] = None, status: Optional[str] = None,
+             project: Optional[str] = None, file_hash: Optional[str] = None,
+             office: Optional[str] = None, since: Optional[datetime] = None, until: Optional[datetime] = None,
+             limit: Optional[int] = DEFAULT_QUERY_LIMIT) -> List[StoredResult]:
+        """
+        条件に合うチェック結果を新しい順に返す（条件はすべてAND、省略した条件は絞り込まない）
+
+        Args:
+            item: チェック項目名（例: "釘ピッチ"）
+            status: ステータス（OK / NG / WARNING）
+            project: 案件名
+            file_hash: PDFのSHA-256
+            office: 設計事務所
+            since: この日時以降のチェック（含む）
+            until: この日時より前のチェック（含まない）
+            limit: 最大件数（Noneなら上限なし）
+
+        Returns:
+            List[StoredResult]: チェック結果
+        """
+        r = results_table
+        query = (
+            select(r, checks_table.c.file_name)
+            .join(checks_table, checks_table.c.id == r.c.check_id)
+            .order_by(r.c.checked_at.desc(), r.c.id)
+        )
+        for column, value in ((r.c.item, item), (r.c.status, status),
+                              (r.c.project, project), (r.c.file_hash, file_hash),
+                              (r.c.office, office)):
+            if value is not None:
+                query = query.where(column == value)
+        if since is not None:
+            query = query.where(r.c.checked_at >= since)
+        if until is not None:
+            query = query.where(r.c.checked_at < until)
+        if limit is not None:
+            query = query.limit(limit)
+        with self.engine.connect() as conn:
+            rows = conn.execute(query).mappings().all()
+        return [
+            StoredResult(
+                check_id=row['check_id'],
+                file_name=row['file_name'],
+                file_hash=row['file_hash'],
+                project=row['project'],
+                checked_at=row['checked_at'],
+                category=row['category'],
+                item=row['item'],
+                status=row['status'],
+                importance=row['importance'],
+                message=row['message'],
+                page_number=row['page_number'],
+                location=(row['x'], row['y']) if row['x'] is not None else None,
+                suggestion=row['suggestion'],
+                office=row['office'],
+            )
+            for row in rows
+        ]
+
+    def history(self, file_hash: Optional[str] = None, project: Optional[str] = None,
+                office: Optional[str] = None, limit: Optional[int] = DEFAULT_QUERY_LIMIT) -> List[dict]:
+        """
+        チェックの履歴（サマリー）を新しい順に返す
+
+        Args:
+            file_hash: PDFのSHA-256で絞り込む
+            project: 案件名で絞り込む
+            office: 設計事務所で絞り込む
+            limit: 最大件数（Noneなら上限なし）
+        """
+        c = checks_table
+        query = select(c).order_by(c.c.checked_at.desc(), c.c.id.desc())
+        if file_hash is not None:
+            query = query.where(c.c.file_hash == file_hash)
+        if project is not None:
+            query = query.where(c.c.project == project)
+        if office is not None:
+            query = query.where(c.c.office == office)
+        if limit is not None:
+            query = query.limit(limit)
+        with self.engine.connect() as conn:
+            rows = conn.execute(query).mappings().all()
+        return [
+            {**row, 'checked_at': row['checked_at'].isoformat(timespec='seconds')}
+            for row in rows
+        ]
+
+    def iter_records(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                     project: Optional[str] = None, office: Optional[str] = None) -> Iterator[CheckRecord]:
+        """
+        条件に合うチェックを古い順に1件ずつ返す（報告書用）
+
+        結果の行は_STREAM_ROWS行ずつ取り出し、1チェック分がそろうたびに返すため、
+        対象のチェックが何件あってもメモリ上には1チェック分しか持たない
+
+        Args:
+            since: この日時以降のチェック（含む）
+            until: この日時より前のチェック（含まない）
+            project: 案件名
+            office: 設計事務所
+
+        Yields:
+            CheckRecord: チェック結果（指摘のないチェックはresultsが空）
+        """
+        c = checks_table
+        r = results_table
+        query = (
+            select(c, r.c.category, r.c.item, r.c.status.label('result_status'), r.c.importance,
+                   r.c.message, r.c.page_number, r.c.x, r.c.y, r.c.suggestion)
+            .select_from(c.outerjoin(r, r.c.check_id == c.c.id))
+            .order_by(c.c.checked_at, c.c.id, r.c.id)
+        )
+        for column, value in ((c.c.project, project), (c.c.office, office)):
+            if value is not None:
+                query = query.where(column == value)
+        if since is not None:
+            query = query.where(c.c.checked_at >= since)
+        if until is not None:
+            query = query.where(c.c.checked_at < until)
+        record = None
+        check_id = None
+        with self.engine.connect() as conn:
+            rows = conn.execution_options(yield_per=_STREAM_ROWS).execute(query).mappings()
+            for row in rows:
+                if row['id'] != check_id:
+                    if record is not None:
+                        yield record
+                    check_id = row['id']
+                    record = CheckRecord(
+                        file_name=row['file_name'],
+                        results=[],
+                        summary={key: row[key] for key in
+                                 ('status', 'total', 'ok', 'ng', 'warning', 'required_ng')},
+                        file_hash=row['file_hash'],
+                        project=row['project'],
+                        office=row['office'],
+                        ruleset_version=row['ruleset_version'],
+                        checked_at=row['checked_at'],
+                    )
+                if row['category'] is not None:
+                    record.results.append(CheckResult(
+                        category=row['category'],
+                        item=row['item'],
+                        status=CheckStatus(row['result_status']),
+                        message=row['message'],
+                        importance=Importance(row['importance']),
+                        location=(row['x'], row['y']) if row['x'] is not None else None,
+                        page_number=row['page_number'],
+                        suggestion=row['suggestion'],
+                    ))
+            if record is not None:
+                yield record
+
+    def close(self) -> None:
+        """接続プールを閉じる"""
+        self.engine.dispose()
+
+
+def open_default_store() -> Optional[ResultStore]:
+    """
+    環境変数の設定で保存先を開く（SOUKEN_RESULTS_DB=none または開けなければNone）
+    """
+    if DEFAULT_RESULTS_DB.lower() in ('', 'none'):
+        return None
+    try:
+        return ResultStore(DEFAULT_RESULTS_DB)
+    except Exception as e:
+        print(f"結果の保存先を開けません（保存しません）: {e}")
+        return None
+
+
+def _parse_date(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """保存済みのチェック結果を検索してJSON Linesで出力する"""
+    parser = argparse.ArgumentParser(description='保存済みのチェック結果を検索')
+    parser.add_argument('--db', default=DEFAULT_RESULTS_DB, help='データベースURL (default: SOUKEN_RESULTS_DB)')
+    parser.add_argument('--item', help='チェック項目名（例: 釘ピッチ）')
+    parser.add_argument('--status', choices=STATUS_VALUES, help='ステータス')
+    parser.add_argument('--project', help='案件名')
+    parser.add_argument('--file-hash', help='PDFのSHA-256')
+    parser.add_argument('--office', help='設計事務所')
+    parser.add_argument('--since', type=_parse_date, help='この日時以降（例: 2026-07-01）')
+    parser.add_argument('--until', type=_parse_date, help='この日時より前（例: 2026-10-01）')
+    parser.add_argument('--limit', type=int, default=DEFAULT_QUERY_LIMIT, help='最大件数')
+    args = parser.parse_args(argv)
+
+    store = ResultStore(args.db)
+    for result in store.find(item=args.item, status=args.status, project=args.project,
+                             file_hash=args.file_hash, office=args.office, since=args.since, until=args.until,
+                             limit=args.limit):
+        sys.stdout.write(json.dumps(result.to_dict(), ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+"""
+Rule Matcher Module
+複数のチェックルールのパターンを1つのキーワードオートマトンにまとめ、
+テキストを1回走査するだけで全ルールのヒットを検出する
+"""
+
+import re
+from typing import AbstractSet, Dict, Iterable, List, Optional, Tuple
+from dataclasses import dataclass, field
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python 3.10以前
+    import sre_parse
+
+
+@dataclass(frozen=True)
+class Rule:
+    """検出ルール（パターンは優先度順）"""
+    rule_id: str
+    patterns: Tuple[str, ...]
+    ignore_case: bool = False
+
+
+@dataclass(frozen=True)
+class RuleHit:
+    """ルールのヒット1件"""
+    rule_id: str
+    pattern_index: int  # Rule.patterns内のインデックス
+    start: int
+    end: int
+    text: str
+    groups: Tuple[Optional[str], ...] = ()
+
+
+@dataclass
+class MatchResult:
+    """1回の走査で得られた全ルールのヒット"""
+    hits: Dict[str, List[RuleHit]] = field(default_factory=dict)
+
+    def has(self, rule_id: str) -> bool:
+        """ルールが1件以上ヒットしたか"""
+        return bool(self.hits.get(rule_id))
+
+    def first(self, rule_id: str) -> Optional[RuleHit]:
+        """
+        パターン優先度順で最初のヒットを返す
+
+        ルールごとに re.search をパターン順に呼んだ場合と同じヒットになる
+        """
+        best = None
+        for hit in self.hits.get(rule_id, ()):
+            if best is None or (hit.pattern_index, hit.start) < (best.pattern_index, best.start):
+                best = hit
+        return best
+
+
+@dataclass(frozen=True)
+class _Target:
+    """アンカーキーワードに対応するパターン"""
+    rule_id: str
+    pattern_index: int
+    offset: int  # パターン先頭からアンカーまでの文字数
+    verifier: Optional["re.Pattern"]  # Noneならキーワードそのものがパターン
+    length: int = 0  # キーワードのみのパターンの文字数
+
+
+# first_only走査でヒット未記録のルールを表す番兵
+_UNSET = 1 << 30
+
+# 文字クラスをアンカー候補に展開する上限
+_MAX_ANCHOR_VARIANTS = 8
+
+
+def _anchor(pattern: str) -> Optional[Tuple[int, List[str]]]:
+    """
+    パターンが必ず含む固定位置のキーワードを求める
+
+    Returns:
+        (先頭からのオフセット, キーワードの候補一覧)。見つからなければNone
+    """
+    try:
+        tokens = list(sre_parse.parse(pattern))
+    except re.error:
+        return None
+
+    runs = []
+    offset = 0
+    run_offset = 0
+    variants = [""]
+    for op, arg in tokens:
+        chars = None
+        if op == sre_parse.LITERAL:
+            chars = [chr(arg)]
+        elif op == sre_parse.IN and all(item_op == sre_parse.LITERAL for item_op, _ in arg):
+            chars = [chr(value) for _, value in arg]
+        elif op == sre_parse.IN or op == sre_parse.ANY:
+            chars = None  # 幅1だがキーワードにできない
+        else:
+            break  # 可変長・ゼロ幅はここで打ち切る
+
+        if chars is not None and len(variants) * len(chars) <= _MAX_ANCHOR_VARIANTS:
+            variants = [v + c for v in variants for c in chars]
+        else:
+            if variants[0]:
+                runs.append((run_offset, variants))
+            variants = [""]
+            run_offset = offset + 1
+            if chars is not None:
+                variants = chars
+                run_offset = offset
+        offset += 1
+    if variants[0]:
+        runs.append((run_offset, variants))
+
+    if not runs:
+        return None
+    # 最も長い（=ヒットが少ない）キーワードを選ぶ
+    return max(runs, key=lambda run: (len(run[1][0]), -run[0]))
+
+
+_ASCII_LOWER = {code: code + 32 for code in range(ord('A'), ord('Z') + 1)}
+
+
+def fold_case(text: str) -> str:
+    """文字位置を保ったまま小文字化する"""
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        # 'İ'のように小文字化で文字数が変わる場合はASCIIのみ変換する
+        lowered = text.translate(_ASCII_LOWER)
+    return lowered
+
+
+class RuleMatcher:
+    """コンパイル済みのマルチパターンマッチャー"""
+
+    def __init__(self, rules: Iterable[Rule]):
+        self.rules: List[Rule] = list(rules)
+        # キーワード -> 対応するパターン（大文字小文字を区別する/しない）
+        self._exact: Dict[str, List[_Target]] = {}
+        self._folded: Dict[str, List[_Target]] = {}
+        # 小文字化キーワード -> そのキーワードを持つ全パターン
+        self._keyword_targets: Dict[str, List[_Target]] = {}
+        # 小文字化キーワード -> 同じ位置から始まり得るキーワード（自身と接頭辞）
+        self._prefixes: Dict[str, List[str]] = {}
+        # キーワード集合 -> コンパイル済みオートマトン
+        self._automata: Dict[frozenset, "re.Pattern"] = {}
+        # キーワードを持たないパターン（ルールID, パターンのインデックス, 先読みで包んだパターン）
+        self._residual: List[Tuple[str, int, "re.Pattern"]] = []
+        self._compile()
+
+    def _compile(self) -> None:
+        """全パターンをキーワードと検証用パターンに分解する"""
+        for rule in self.rules:
+            flags = re.IGNORECASE if rule.ignore_case else 0
+            for pattern_index, pattern in enumerate(rule.patterns):
+                anchor = _anchor(pattern)
+                if anchor is None:
+                    # 先読みで包むことでヒット同士が重なっても取りこぼさない。
+                    # 1つの選択肢にまとめると同じ位置では最初の選択肢しか記録されないため、パターンごとに走査する
+                    self._residual.append(
+                        (rule.rule_id, pattern_index, re.compile(f"(?=({pattern}))", flags))
+                    )
+                    continue
+
+                offset, variants = anchor
+                is_literal = re.escape(pattern) == pattern
+                verifier = None if is_literal else re.compile(pattern, flags)
+                target = _Target(rule.rule_id, pattern_index, offset, verifier, len(pattern))
+                table = self._folded if rule.ignore_case else self._exact
+                for keyword in variants:
+                    table.setdefault(keyword.lower() if rule.ignore_case else keyword, []).append(target)
+                    self._keyword_targets.setdefault(keyword.lower(), []).append(target)
+
+        keywords = list(self._keyword_targets)
+        for keyword in keywords:
+            self._prefixes[keyword] = [prefix for prefix in keywords if keyword.startswith(prefix)]
+
+    def _automaton(self, keywords: frozenset) -> "re.Pattern":
+        """
+        キーワード集合を1つの選択肢パターンにまとめる
+
+        小文字化したテキストを走査する（re.IGNORECASEは選択肢が多いと極端に遅い）。
+        大文字小文字を区別するキーワードは走査後に元テキストで照合する
+        """
+        automaton = self._automata.get(keywords)
+        if automaton is None:
+            # 同じ位置では長いキーワードを優先する
+            alternatives = sorted(keywords, key=lambda keyword: (-len(keyword), keyword))
+            automaton = re.compile("|".join(re.escape(keyword) for keyword in alternatives))
+            self._automata[keywords] = automaton
+        return automaton
+
+    def _live_keywords(self, best: Dict[str, int], rule_ids: Optional[AbstractSet[str]] = None) -> frozenset:
+        """対象ルールの、まだ結果を変え得るパターンを持つキーワードだけを残す"""
+        return frozenset(
+            keyword for keyword, targets in self._keyword_targets.items()
+            if any(target.pattern_index < best.get(target.rule_id, _UNSET)
+                   and (rule_ids is None or target.rule_id in rule_ids) for target in targets)
+        )
+
+    def scan(self, text: str, first_only: bool = False,
+             resolved: Optional[Dict[str, int]] = None,
+             lowered: Optional[str] = None,
+             rule_ids: Optional[AbstractSet[str]] = None) -> MatchResult:
+        """
+        テキストを1回走査して全ルール（rule_ids指定時はそのルールだけ）のヒットを返す
+
+        Args:
+            text: 検索対象テキスト
+            first_only: Trueの場合、MatchResult.first() に必要なヒットだけを記録する。
+                確定したパターンのキーワードは走査対象から外していく
+            resolved: first_only時、前のテキストで記録済みのルールID -> 最小パターンインデックス。
+                渡した辞書は走査結果で更新される（ページ単位の逐次走査用）
+            lowered: fold_case(text) を計算済みなら渡す（DocumentContext.folded）
+            rule_ids: 走査するルールID（省略時は全ルール、他のルールのキーワードは走査しない）
+
+        Returns:
+            MatchResult: ルールID -> ヒット一覧
+        """
+        result = MatchResult()
+        hits = result.hits
+        # first_only時: ルールID -> 記録済みヒットの最小パターンインデックス
+        best: Dict[str, int] = resolved if resolved is not None else {}
+        if best or rule_ids is not None:
+            keywords = self._live_keywords(best, rule_ids)
+        else:
+            keywords = frozenset(self._keyword_targets)
+        if lowered is None:
+            lowered = fold_case(text) if keywords else text
+        position = 0
+        while keywords:
+            search = self._automaton(keywords).search
+            narrowed = False
+            while not narrowed:
+                match = search(lowered, position)
+                if match is None:
+                    break
+                anchor_start = match.start()
+                # 重なったキーワードも拾えるよう1文字ずつ進める
+                position = anchor_start + 1
+                for keyword in self._prefixes[match.group()]:
+                    targets = self._folded.get(keyword, [])
+                    exact = self._exact.get(text[anchor_start:anchor_start + len(keyword)])
+                    if exact:
+                        targets = targets + exact
+                    for target in targets:
+                        if rule_ids is not None and target.rule_id not in rule_ids:
+                            continue
+                        if first_only and target.pattern_index >= best.get(target.rule_id, _UNSET):
+                            continue
+                        if self._verify(text, anchor_start, target, hits) and first_only:
+                            best[target.rule_id] = target.pattern_index
+                            narrowed = True
+            if not narrowed:
+                break
+            keywords = self._live_keywords(best, rule_ids)
+
+        for rule_id, pattern_index, residual in self._residual:
+            if rule_ids is not None and rule_id not in rule_ids:
+                continue
+            for match in residual.finditer(text):
+                start, end = match.span(1)
+                hits.setdefault(rule_id, []).append(RuleHit(
+                    rule_id, pattern_index, start, end, match.group(1), match.groups()[1:]
+                ))
+        return result
+
+    def _verify(self, text: str, anchor_start: int, target: _Target,
+                hits: Dict[str, List[RuleHit]]) -> bool:
+        """アンカー位置からパターン全体が一致するか確認してヒットを記録する"""
+        start = anchor_start - target.offset
+        if start < 0:
+            return False
+        if target.verifier is None:
+            end = start + target.length
+            hits.setdefault(target.rule_id, []).append(RuleHit(
+                target.rule_id, target.pattern_index, start, end, text[start:end]
+            ))
+            return True
+        match = target.verifier.match(text, start)
+        if not match:
+            return False
+        hits.setdefault(target.rule_id, []).append(RuleHit(
+            target.rule_id, target.pattern_index, start, match.end(),
+            match.group(0), match.groups()
+        ))
+        return True
@@ -0,0 +1,429 @@
+"""
+Rule Registry Module
+チェックルール（パターン・しきい値・重要度・修正提案）をデータファイルから読み込み、
+コンパイル済みのマッチャーと一緒に提供する。ファイルが更新されると自動で再読み込みする
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from dataclasses import dataclass
+
+from .rule_matcher import Rule, RuleMatcher
+
+
+# ルール定義ファイルの既定の場所（環境変数で変更可能）
+DEFAULT_RULES_PATH = os.environ.get(
+    'SOUKEN_RULES_PATH', str(Path(__file__).with_name('rules.json'))
+)
+
+# データファイルで指定できる重要度・ステータス（checkers.Importance / CheckStatus の値）
+IMPORTANCE_VALUES = ("必須", "推奨", "参考")
+STATUS_VALUES = ("NG", "WARNING")
+# ルールが判定に必要とするテキストの範囲（pdf_parser.REGION_SHEET / REGION_TITLE_BLOCK の値）
+REGION_VALUES = ("sheet", "title_block")
+
+
+class RuleDefinitionError(ValueError):
+    """ルール定義ファイルの内容が不正"""
+
+
+@dataclass(frozen=True)
+class FindingSpec:
+    """指摘の内容（メッセージ中の {value} {max} {unit} は判定時に置き換える）"""
+    status: str
+    message: str
+    suggestion: Optional[str] = None
+    importance: Optional[str] = None  # 省略時はルールの重要度
+
+
+@dataclass(frozen=True)
+class ThresholdSpec:
+    """パターンのグループから取り出した数値の上限"""
+    max: float
+    finding: FindingSpec  # 上限を超えた場合の指摘
+    group: int = 1
+    unit: str = ""
+
+    def fields(self, value: Optional[float] = None) -> Dict[str, object]:
+        """メッセージの {value} {max} {unit} に埋め込む値"""
+        return {'value': value, 'max': _format_number(self.max), 'unit': self.unit}
+
+
+@dataclass(frozen=True)
+class RuleSpec:
+    """チェック項目1件の定義"""
+    rule_id: str
+    item: str
+    importance: str
+    patterns: Tuple[str, ...]
+    missing: FindingSpec  # 記載が見つからない場合の指摘
+    ignore_case: bool = False
+    threshold: Optional[ThresholdSpec] = None
+    full_coverage: bool = False  # 遅延評価モードでも全ページを見るまで確定させない
+    region: str = "sheet"  # 判定に必要なテキストの範囲（title_blockなら表題欄だけで判定できる）
+    requires: Tuple[str, ...] = ()  # 前提ルールのID（いずれかに指摘があればこのルールは判定も走査もしない）
+
+    @property
+    def label(self) -> str:
+        """一覧表示用の項目名（しきい値があれば併記）"""
+        if self.threshold is None:
+            return self.item
+        return f"{self.item}（{_format_number(self.threshold.max)}{self.threshold.unit}以下）"
+
+    def to_rule(self) -> Rule:
+        return Rule(self.rule_id, self.patterns, self.ignore_case)
+
+
+@dataclass(frozen=True)
+class RuleCategory:
+    """チェックカテゴリ（必須記載事項など）"""
+    category_id: str
+    name: str
+    rules: Tuple[RuleSpec, ...]
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else str(value)
+
+
+class Ruleset:
+    """
+    コンパイル済みのルールセット（不変）
+
+    同じ内容のルールセットは1回だけコンパイルされ、プロセス内で共有される
+    """
+
+    def __init__(self, version: str, digest: str, categories: Tuple[RuleCategory, ...]):
+        self.version = version
+        self.digest = digest
+        self.categories = categories
+        # 全カテゴリのルールを1つにまとめ、文書全体を1回だけ走査する
+        self.matcher = RuleMatcher(rule.to_rule() for category in categories for rule in category.rules)
+        self._category_matchers: Dict[str, RuleMatcher] = {}
+        self._lock = threading.Lock()
+
+    def category(self, category_id: str) -> RuleCategory:
+        """
+        カテゴリを取得する
+
+        Raises:
+            KeyError: カテゴリが定義されていない場合
+        """
+        for category in self.categories:
+            if category.category_id == category_id:
+                return category
+        raise KeyError(f"カテゴリ '{category_id}' はルール定義にありません")
+
+    def category_matcher(self, category_id: str) -> RuleMatcher:
+        """1カテゴリ分のマッチャー（チェッカー単体で使う場合のみ、初回にコンパイル）"""
+        with self._lock:
+            matcher = self._category_matchers.get(category_id)
+            if matcher is None:
+                rules = self.category(category_id).rules
+                matcher = RuleMatcher(rule.to_rule() for rule in rules)
+                self._category_matchers[category_id] = matcher
+            return matcher
+
+    def rule_ids(self, category_ids: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        ルールIDの一覧
+        
+        Args:
+            category_ids: 対象とするカテゴリID（省略時は全カテゴリ）
+            
+        Raises:
+            KeyError: 定義されていないカテゴリが指定された場合
+        """
+        if category_ids is None:
+            categories = self.categories
+        else:
+            categories = [self.category(category_id) for category_id in category_ids]
+        return [rule.rule_id for category in categories for rule in category.rules]
+    
+    def region(self, rule_ids: Optional[Iterable[str]] = None) -> str:
+        """
+        ルールの判定に必要なテキストの範囲
+        
+        対象ルールがすべて表題欄だけで判定できる場合のみ "title_block"、それ以外は "sheet"
+        
+        Args:
+            rule_ids: 対象とするルールID（省略時は全ルール）
+        """
+        wanted = None if rule_ids is None else set(rule_ids)
+        regions = {
+            rule.region for category in self.categories for rule in category.rules
+            if wanted is None or rule.rule_id in wanted
+        }
+        return "title_block" if regions == {"title_block"} else "sheet"
+    
+    def items(self) -> List[dict]:
+        """チェック項目一覧（APIと画面表示用）"""
+        return [
+            {
+                'id': category.category_id,
+                'name': category.name,
+                'items': [
+                    {
+                        'id': rule.rule_id,
+                        'name': rule.item,
+                        'label': rule.label,
+                        'importance': rule.importance,
+                        'region': rule.region,
+                        'requires': list(rule.requires),
+                    }
+                    for rule in category.rules
+                ],
+            }
+            for category in self.categories
+        ]
+
+
+# ルールセットの内容ダイジェスト -> コンパイル済みルールセット
+_compiled: Dict[str, Ruleset] = {}
+_compiled_lock = threading.Lock()
+
+
+def _parse_finding(data: dict, where: str) -> FindingSpec:
+    status = data.get('status')
+    if status not in STATUS_VALUES:
+        raise RuleDefinitionError(f"{where}: statusは {STATUS_VALUES} のいずれかを指定してください")
+    importance = data.get('importance')
+    if importance is not None and importance not in IMPORTANCE_VALUES:
+        raise RuleDefinitionError(f"{where}: importanceは {IMPORTANCE_VALUES} のいずれかを指定してください")
+    if not data.get('message'):
+        raise RuleDefinitionError(f"{where}: messageがありません")
+    return FindingSpec(status, data['message'], data.get('suggestion'), importance)
+
+
+def _parse_rule(data: dict, default_region: str = "sheet") -> RuleSpec:
+    rule_id = data.get('id')
+    if not rule_id:
+        raise RuleDefinitionError("ルールにidがありません")
+    region = data.get('region', default_region)
+    if region not in REGION_VALUES:
+        raise RuleDefinitionError(f"{rule_id}: regionは {REGION_VALUES} のいずれかを指定してください")
+    if data.get('importance') not in IMPORTANCE_VALUES:
+        raise RuleDefinitionError(f"{rule_id}: importanceは {IMPORTANCE_VALUES} のいずれかを指定してください")
+    patterns = tuple(data.get('patterns') or ())
+    if not patterns:
+        raise RuleDefinitionError(f"{rule_id}: patternsがありません")
+    group_counts = []
+    for pattern in patterns:
+        try:
+            group_counts.append(re.compile(pattern).groups)
+        except re.error as e:
+            raise RuleDefinitionError(f"{rule_id}: パターン {pattern!r} が不正です: {e}")
+
+    threshold = None
+    if data.get('threshold') is not None:
+        spec = data['threshold']
+        if not isinstance(spec.get('max'), (int, float)):
+            raise RuleDefinitionError(f"{rule_id}: threshold.maxに数値を指定してください")
+        group = int(spec.get('group', 1))
+        # 値はどのパターンのヒットからも取り出すため、全パターンにグループが必要
+        for pattern, group_count in zip(patterns, group_counts):
+            if not 1 <= group <= group_count:
+                raise RuleDefinitionError(
+                    f"{rule_id}: threshold.groupに対応するグループがパターン {pattern!r} にありません"
+                )
+        threshold = ThresholdSpec(
+            max=spec['max'],
+            finding=_parse_finding(spec, f"{rule_id}.threshold"),
+            group=group,
+            unit=spec.get('unit', ''),
+        )
+
+    requires = data.get('requires') or ()
+    if isinstance(requires, str) or not all(isinstance(required, str) for required in requires):
+        raise RuleDefinitionError(f"{rule_id}: requiresにはルールIDのリストを指定してください")
+
+    return RuleSpec(
+        rule_id=rule_id,
+        item=data.get('item') or rule_id,
+        importance=data['importance'],
+        patterns=patterns,
+        missing=_parse_finding(data.get('missing') or {}, f"{rule_id}.missing"),
+        ignore_case=bool(data.get('ignore_case', False)),
+        threshold=threshold,
+        full_coverage=bool(data.get('full_coverage', False)),
+        region=region,
+        requires=tuple(requires),
+    )
+
+
+def _check_requires(rules: Dict[str, RuleSpec]) -> None:
+    """
+    前提ルールがすべて定義されていて、循環していないことを確認する
+
+    Raises:
+        RuleDefinitionError: 未定義のルールや循環する前提がある場合
+    """
+    for rule in rules.values():
+        for required in rule.requires:
+            if required not in rules:
+                raise RuleDefinitionError(f"{rule.rule_id}: 前提ルール '{required}' は定義されていません")
+            if required == rule.rule_id:
+                raise RuleDefinitionError(f"{rule.rule_id}: 自分自身を前提ルールにはできません")
+
+    # 0: 未確認 / 1: 確認中 / 2: 確認済み
+    state: Dict[str, int] = {}
+    for root in rules:
+        if state.get(root):
+            continue
+        state[root] = 1
+        stack = [(root, iter(rules[root].requires))]
+        while stack:
+            rule_id, requires = stack[-1]
+            required = next(requires, None)
+            if required is None:
+                state[rule_id] = 2
+                stack.pop()
+            elif state.get(required) == 1:
+                cycle = [entry[0] for entry in stack] + [required]
+                cycle = cycle[cycle.index(required):]
+                raise RuleDefinitionError(f"前提ルールが循環しています: {' -> '.join(cycle)}")
+            elif not state.get(required):
+                state[required] = 1
+                stack.append((required, iter(rules[required].requires)))
+
+
+def parse_ruleset(data: dict) -> Ruleset:
+    """
+    ルール定義（JSONを読み込んだ辞書）からルールセットを作る
+
+    内容が同じならコンパイル済みのルールセットを再利用する
+
+    Raises:
+        RuleDefinitionError: 定義が不正な場合
+    """
+    digest = hashlib.sha256(
+        json.dumps(data, ensure_ascii=False, sort_keys=True).encode('utf-8')
+    ).hexdigest()
+    with _compiled_lock:
+        ruleset = _compiled.get(digest)
+    if ruleset is not None:
+        return ruleset
+
+    categories = []
+    seen: Dict[str, RuleSpec] = {}
+    for category_data in data.get('categories') or ():
+        if not category_data.get('id'):
+            raise RuleDefinitionError("カテゴリにidがありません")
+        # カテゴリのregionは、regionを指定していないルールの既定値
+        region = category_data.get('region', 'sheet')
+        if region not in REGION_VALUES:
+            raise RuleDefinitionError(
+                f"カテゴリ '{category_data['id']}': regionは {REGION_VALUES} のいずれかを指定してください"
+            )
+        rules = tuple(_parse_rule(rule_data, region) for rule_data in category_data.get('rules') or ())
+        for rule in rules:
+            if rule.rule_id in seen:
+                raise RuleDefinitionError(f"ルールID '{rule.rule_id}' が重複しています")
+            seen[rule.rule_id] = rule
+        categories.append(RuleCategory(
+            category_data['id'], category_data.get('name') or category_data['id'], rules
+        ))
+    if not categories:
+        raise RuleDefinitionError("categoriesがありません")
+    _check_requires(seen)
+
+    ruleset = Ruleset(str(data.get('version', '')), digest, tuple(categories))
+    with _compiled_lock:
+        return _compiled.setdefault(digest, ruleset)
+
+
+def load_ruleset(path: str) -> Ruleset:
+    """
+    ルール定義ファイルを読み込む
+
+    Raises:
+        RuleDefinitionError: ファイルが読めない、または定義が不正な場合
+    """
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise RuleDefinitionError(f"ルール定義ファイルを読み込めません ({path}): {e}")
+    return parse_ruleset(data)
+
+
+class RuleRegistry:
+    """
+    ルール定義ファイルを監視し、常に最新のルールセットを返すレジストリ
+
+    更新されたファイルは新しいルールセットとしてコンパイルしてから差し替えるため、
+    処理中のチェックは開始時のルールセットのまま完了する。
+    更新後の定義が不正な場合はエラーを表示し、直前のルールセットを使い続ける
+    """
+
+    def __init__(self, path: str = DEFAULT_RULES_PATH, check_interval: float = 1.0):
+        """
+        Args:
+            path: ルール定義ファイル（JSON）
+            check_interval: ファイルの更新を確認する間隔（秒、0なら毎回確認）
+
+        Raises:
+            RuleDefinitionError: 初回の読み込みに失敗した場合
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._signature = self._stat()
+        self._ruleset = load_ruleset(path)
+        self._checked_at = time.monotonic()
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    @property
+    def current(self) -> Ruleset:
+        """最新のルールセット（check_intervalごとにファイルの更新を確認する）"""
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            self.reload_if_changed()
+        return self._ruleset
+
+    def reload_if_changed(self) -> bool:
+        """
+        ファイルが更新されていれば読み込み直す
+
+        Returns:
+            bool: ルールセットを差し替えた場合True
+        """
+        with self._lock:
+            self._checked_at = time.monotonic()
+            signature = self._stat()
+            if signature is None or signature == self._signature:
+                return False
+            try:
+                ruleset = load_ruleset(self.path)
+            except RuleDefinitionError as e:
+                print(f"ルール定義の再読み込みエラー（直前のルールを使い続けます）: {e}")
+                self._signature = signature
+                return False
+            self._signature = signature
+            changed = ruleset is not self._ruleset
+            self._ruleset = ruleset
+            return changed
+
+
+_default_registry: Optional[RuleRegistry] = None
+_default_registry_lock = threading.Lock()
+
+
+def get_default_registry() -> RuleRegistry:
+    """DEFAULT_RULES_PATHを監視するプロセス共通のレジストリ（遅延初期化）"""
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = RuleRegistry()
+        return _default_registry
@@ -0,0 +1,118 @@
+"""
+Rule Scheduler Module
+ルールの判定順を決める（前提ルールを先に）。
+前提ルールに指摘があれば依存するルールは判定せず、そのルールのパターンも走査しない
+"""
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Generic, Iterable, List, Optional, Tuple, TypeVar
+
+from .rule_registry import RuleSpec
+
+
+T = TypeVar('T')
+
+
+@dataclass
+class ScheduleRun(Generic[T]):
+    """1回分の判定結果"""
+    # ルールID -> 判定結果（Noneなら指摘なし）、判定した順
+    results: Dict[str, Optional[T]] = field(default_factory=dict)
+    # 判定しなかったルールID -> 指摘のあった（または判定しなかった）前提ルールのID
+    skipped: Dict[str, Tuple[str, ...]] = field(default_factory=dict)
+
+
+class RuleScheduler:
+    """
+    ルールセット1つ分の判定順序
+
+    ルールを前提ルール（RuleSpec.requires）の深さで段に分け、浅い段から判定する。
+    段ごとに、前提ルールに指摘がなかったルールだけを準備（走査）してから判定するので、
+    判定しないルールのパターンは走査しない。同じ段の中は定義順
+    """
+
+    def __init__(self, rules: Iterable[RuleSpec]):
+        """
+        Args:
+            rules: 判定するルール（定義順）
+        """
+        self.rules: Tuple[RuleSpec, ...] = tuple(rules)
+        self._index = {rule.rule_id: i for i, rule in enumerate(self.rules)}
+        # ルールID -> 段（前提ルールがなければ0、対象外のルールの前提は満たされているものとする）
+        self._depth: Dict[str, int] = {}
+        for rule in self.rules:
+            self._measure_depth(rule.rule_id)
+
+    def _measure_depth(self, rule_id: str) -> int:
+        """ルールの段（前提ルールの最も深い段 + 1）"""
+        depth = self._depth.get(rule_id)
+        if depth is None:
+            requires = [required for required in self.rules[self._index[rule_id]].requires
+                        if required in self._index]
+            depth = 1 + max(map(self._measure_depth, requires)) if requires else 0
+            self._depth[rule_id] = depth
+        return depth
+
+    def waves(self, rule_ids: Optional[Iterable[str]] = None) -> List[List[RuleSpec]]:
+        """
+        判定する段ごとのルール（各段の前提ルールはすべてそれより前の段にある）
+
+        Args:
+            rule_ids: 対象とするルールID（省略時は全ルール、前提ルールは自動で含める）
+        """
+        wanted = self._closure(rule_ids)
+        waves: List[List[RuleSpec]] = []
+        for rule in self.rules:
+            if rule.rule_id not in wanted:
+                continue
+            depth = self._depth[rule.rule_id]
+            while len(waves) <= depth:
+                waves.append([])
+            waves[depth].append(rule)
+        return [wave for wave in waves if wave]
+
+    def run(self, evaluate: Callable[[RuleSpec], Optional[T]],
+            rule_ids: Optional[Iterable[str]] = None,
+            prepare: Optional[Callable[[List[RuleSpec]], None]] = None) -> ScheduleRun[T]:
+        """
+        ルールを段ごとに評価する
+
+        前提ルールのいずれかが指摘を返した（または判定されなかった）ルールは評価しない
+
+        Args:
+            evaluate: ルールを判定する関数（指摘がなければNone）
+            rule_ids: 対象とするルールID（省略時は全ルール）
+            prepare: 段ごとに、その段で判定するルールを受け取って判定の準備（走査など）をする関数
+        """
+        run: ScheduleRun[T] = ScheduleRun()
+        for wave in self.waves(rule_ids):
+            ready = []
+            for rule in wave:
+                blocked = tuple(
+                    required for required in rule.requires
+                    if required in run.skipped or run.results.get(required) is not None
+                )
+                if blocked:
+                    run.skipped[rule.rule_id] = blocked
+                else:
+                    ready.append(rule)
+            if ready and prepare is not None:
+                prepare(ready)
+            for rule in ready:
+                run.results[rule.rule_id] = evaluate(rule)
+        return run
+
+    def _closure(self, rule_ids: Optional[Iterable[str]]) -> set:
+        """対象ルールと、その前提ルールすべて"""
+        if rule_ids is None:
+            return set(self._index)
+        wanted = set()
+        pending = [rule_id for rule_id in rule_ids if rule_id in self._index]
+        while pending:
+            rule_id = pending.pop()
+            if rule_id in wanted:
+                continue
+            wanted.add(rule_id)
+            pending.extend(required for required in self.rules[self._index[rule_id]].requires
+                           if required in self._index)
+        return wanted
@@ -0,0 +1,66 @@
+"""
+Stage Timings Module
+PDF解析・チェックの段階ごとの処理時間を記録する
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+
+class StageTimings:
+    """
+    1文書分の段階ごとの処理時間（秒）
+
+    - stages: 段階名 -> 処理時間（同じ段階は合算）
+      hash / metadata / fingerprint / extraction / ocr / fallback / word_index / normalize / scan / checker.<カテゴリID> / summary / serialization
+    - pages: ページごとの抽出時間（ページ順）
+    - cache: キャッシュ種別（drawing / pages / results） -> 'hit' / 'miss'（pagesは一部再利用なら 'partial'）
+    - memory: 解析中のRSS（start_mb / peak_mb / limit_mb）
+    - skipped: 前提ルールに指摘があり判定しなかったルールID -> その前提ルールのID
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.pages: List[float] = []
+        self.cache: Dict[str, str] = {}
+        self.memory: Dict[str, Optional[float]] = {}
+        self.skipped: Dict[str, List[str]] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """ブロックの実行時間を段階nameに加算する"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float) -> None:
+        """段階nameに処理時間を加算する"""
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def merge(self, other: "StageTimings") -> None:
+        """別の記録（ワーカーで計測したものなど）を取り込む"""
+        for name, seconds in other.stages.items():
+            self.add(name, seconds)
+        self.pages.extend(other.pages)
+        self.cache.update(other.cache)
+        self.memory.update(other.memory)
+        self.skipped.update(other.skipped)
+
+    @property
+    def total(self) -> float:
+        """全段階の合計時間"""
+        return sum(self.stages.values())
+
+    def to_dict(self) -> dict:
+        """結果の `timings` ブロック用の辞書（ミリ秒）"""
+        return {
+            'total_ms': round(self.total * 1000, 3),
+            'stages_ms': {name: round(seconds * 1000, 3) for name, seconds in self.stages.items()},
+            'pages_ms': [round(seconds * 1000, 3) for seconds in self.pages],
+            'cache': dict(self.cache),
+            'memory': dict(self.memory),
+            'skipped': {rule_id: list(blocked) for rule_id, blocked in self.skipped.items()},
+        }
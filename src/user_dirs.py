@@ -0,0 +1,48 @@
+"""
+User Directories Module
+ユーザーごとのキャッシュ・データの保存先と、自分だけが使えるディレクトリの用意
+"""
+
+import os
+import stat
+from pathlib import Path
+
+
+# キャッシュの既定ディレクトリ（$XDG_CACHE_HOME/souken、未設定なら ~/.cache/souken）
+USER_CACHE_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'souken'
+)
+
+# ジョブ・チェック結果などのデータの既定ディレクトリ（$XDG_DATA_HOME/souken、未設定なら ~/.local/share/souken）
+USER_DATA_DIR = os.path.join(
+    os.environ.get('XDG_DATA_HOME') or os.path.join(os.path.expanduser('~'), '.local', 'share'), 'souken'
+)
+
+
+def prepare_private_dir(path: Path) -> None:
+    """
+    ディレクトリを自分だけが使える状態（所有者が自分、0700）で用意する
+
+    アップロードされた図面やチェック結果、pickleで読み込むキャッシュを置くため、
+    他のユーザーが先に作ったディレクトリや書き込めるディレクトリは使わない
+
+    Args:
+        path: ディレクトリ（なければ親ディレクトリも含めて作成する）
+
+    Raises:
+        OSError: 作成できない場合
+        PermissionError: 他のユーザーが所有している、または書き込める場合
+    """
+    path = Path(path)
+    path.mkdir(mode=0o700, parents=True, exist_ok=True)
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode):
+        raise PermissionError(f"{path} はディレクトリではありません")
+    if not hasattr(os, 'getuid'):
+        return  # Windowsでは所有者・パーミッションを確認しない
+    if info.st_uid != os.getuid():
+        raise PermissionError(f"{path} は他のユーザー（uid={info.st_uid}）が所有しています")
+    if info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise PermissionError(f"{path} は他のユーザーが書き込めます（chmod 700 してください）")
+    if info.st_mode & 0o077:
+        os.chmod(path, 0o700)
@@ -0,0 +1,223 @@
+"""
+Word Index Module
+抽出したテキストの単語ごとのページと座標を並列配列で保持し、
+ルールのヒット位置から図面上の位置を求める・近くの単語を探す
+"""
+
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+# 空間グリッドのセルの大きさ（pt、A3図面で横24×縦17セル程度）
+DEFAULT_CELL_SIZE = 50.0
+
+# PageData.words の1単語あたりの値の数（開始位置, 終了位置, x0, top, x1, bottom）
+WORD_FIELDS = 6
+
+BBox = Tuple[float, float, float, float]
+
+
+@dataclass(frozen=True)
+class Word:
+    """単語1件（座標はpdfplumberと同じく左上が原点）"""
+    text: str
+    page_number: int
+    x0: float
+    top: float
+    x1: float
+    bottom: float
+    start: int  # 文書テキスト（ページを改行で連結したもの）での開始位置
+    end: int
+
+    @property
+    def bbox(self) -> BBox:
+        return (self.x0, self.top, self.x1, self.bottom)
+
+
+def _distance(a: BBox, b: BBox) -> float:
+    """2つの矩形の最短距離（重なっていれば0）"""
+    dx = max(a[0] - b[2], b[0] - a[2], 0.0)
+    dy = max(a[1] - b[3], b[1] - a[3], 0.0)
+    return (dx * dx + dy * dy) ** 0.5
+
+
+class WordIndex:
+    """
+    文書全体の単語の位置索引
+
+    単語のテキスト位置・ページ・座標を単語順の並列配列で持ち、
+    テキスト位置からの検索は二分探索、座標からの検索はページごとの
+    一様グリッドで行う（どちらも単語数に対して線形にならない）。
+    グリッドは最初に座標で検索したときに作る
+    """
+
+    def __init__(self, cell_size: float = DEFAULT_CELL_SIZE):
+        """
+        Args:
+            cell_size: 空間グリッドのセルの大きさ（pt）
+        """
+        self.cell_size = cell_size
+        self.pages = array('i')
+        self.starts = array('l')
+        self.ends = array('l')
+        self.x0 = array('d')
+        self.top = array('d')
+        self.x1 = array('d')
+        self.bottom = array('d')
+        self._texts: List[str] = []  # ページ番号順ではなく追加順のページテキスト
+        self._text_index = array('i')  # 単語 -> self._textsのインデックス
+        self._text_offsets = array('l')  # self._texts -> 文書テキストでの開始位置
+        # (ページ番号, 列, 行) -> そのセルに掛かる単語のインデックス
+        self._grid: Dict[Tuple[int, int, int], array] = {}
+        self._grid_size = 0  # グリッドに登録済みの単語数
+        self._length = -1  # 連結した文書テキストの長さ（ページがなければ-1）
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @classmethod
+    def from_pages(cls, pages: Iterable, cell_size: float = DEFAULT_CELL_SIZE) -> "WordIndex":
+        """PageDataの並び（extracted_textと同じ順）から索引を作る"""
+        index = cls(cell_size)
+        for page in pages:
+            index.add_page(page.page_number, page.text, page.words)
+        return index
+
+    def add_page(self, page_number: int, text: str, words: Optional[Sequence[float]]) -> None:
+        """
+        1ページ分の単語を追加する（ページは文書テキストに連結する順に追加すること）
+
+        Args:
+            page_number: ページ番号
+            text: ページのテキスト
+            words: 単語ごとの (ページ内の開始位置, 終了位置, x0, top, x1, bottom) を
+                平たく並べた配列（PageData.words、Noneなら位置情報なし）
+        """
+        offset = self._length + 1  # 前のページとは改行1文字で連結される
+        self._length = offset + len(text)
+        text_index = len(self._texts)
+        self._texts.append(text)
+        self._text_offsets.append(offset)
+        if not words:
+            return
+
+        count = len(words) // WORD_FIELDS
+        self.pages.extend([page_number] * count)
+        self._text_index.extend([text_index] * count)
+        self.starts.extend(offset + int(words[base]) for base in range(0, len(words), WORD_FIELDS))
+        self.ends.extend(offset + int(words[base + 1]) for base in range(0, len(words), WORD_FIELDS))
+        self.x0.extend(words[2::WORD_FIELDS])
+        self.top.extend(words[3::WORD_FIELDS])
+        self.x1.extend(words[4::WORD_FIELDS])
+        self.bottom.extend(words[5::WORD_FIELDS])
+
+    def _update_grid(self) -> None:
+        """まだグリッドに登録していない単語を登録する"""
+        cell = self.cell_size
+        grid = self._grid
+        for index in range(self._grid_size, len(self.starts)):
+            page_number = self.pages[index]
+            for column in range(int(self.x0[index] // cell), int(self.x1[index] // cell) + 1):
+                for row in range(int(self.top[index] // cell), int(self.bottom[index] // cell) + 1):
+                    key = (page_number, column, row)
+                    bucket = grid.get(key)
+                    if bucket is None:
+                        bucket = grid[key] = array('i')
+                    bucket.append(index)
+        self._grid_size = len(self.starts)
+
+    def word(self, index: int) -> Word:
+        """インデックスの単語"""
+        text_index = self._text_index[index]
+        offset = self._text_offsets[text_index]
+        start, end = self.starts[index], self.ends[index]
+        return Word(
+            text=self._texts[text_index][start - offset:end - offset],
+            page_number=self.pages[index],
+            x0=self.x0[index], top=self.top[index], x1=self.x1[index], bottom=self.bottom[index],
+            start=start, end=end,
+        )
+
+    def bbox(self, index: int) -> BBox:
+        return (self.x0[index], self.top[index], self.x1[index], self.bottom[index])
+
+    def span(self, start: int, end: int) -> List[int]:
+        """
+        文書テキストの範囲 [start, end) に掛かる単語のインデックス
+
+        Args:
+            start: 開始位置（RuleHit.start）
+            end: 終了位置（RuleHit.end）
+        """
+        index = bisect_right(self.starts, start) - 1
+        if index < 0 or self.ends[index] <= start:
+            index += 1
+        found = []
+        while index < len(self.starts) and self.starts[index] < max(end, start + 1):
+            found.append(index)
+            index += 1
+        return found
+
+    def locate(self, start: int, end: int) -> Optional[Tuple[int, BBox]]:
+        """
+        文書テキストの範囲が図面上のどこにあるか
+
+        Returns:
+            Optional[Tuple[int, BBox]]: (ページ番号, 範囲を囲む矩形 (x0, top, x1, bottom))。
+                範囲が複数ページにまたがる場合は最初のページの部分。位置情報がなければNone
+        """
+        indices = self.span(start, end)
+        if not indices:
+            return None
+        page_number = self.pages[indices[0]]
+        boxes = [self._clip(i, start, end) for i in indices if self.pages[i] == page_number]
+        return page_number, (
+            min(box[0] for box in boxes), min(box[1] for box in boxes),
+            max(box[2] for box in boxes), max(box[3] for box in boxes),
+        )
+
+    def _clip(self, index: int, start: int, end: int) -> BBox:
+        """単語の矩形のうち範囲 [start, end) に当たる部分（単語内は文字数で按分する）"""
+        word_start, word_end = self.starts[index], self.ends[index]
+        x0, x1 = self.x0[index], self.x1[index]
+        length = word_end - word_start
+        if length > 0 and (start > word_start or end < word_end):
+            width = (x1 - x0) / length
+            x0, x1 = (x0 + width * max(start - word_start, 0),
+                      x0 + width * (min(end, word_end) - word_start))
+        return (x0, self.top[index], x1, self.bottom[index])
+
+    def near(self, page_number: int, bbox: BBox, distance: float) -> List[int]:
+        """
+        矩形から distance 以内にある単語のインデックス（近い順）
+
+        Args:
+            page_number: ページ番号
+            bbox: 基準の矩形 (x0, top, x1, bottom)（記号や別の単語の位置）
+            distance: 探す範囲（pt）
+        """
+        if self._grid_size < len(self.starts):
+            self._update_grid()
+        cell = self.cell_size
+        candidates = set()
+        for column in range(int((bbox[0] - distance) // cell), int((bbox[2] + distance) // cell) + 1):
+            for row in range(int((bbox[1] - distance) // cell), int((bbox[3] + distance) // cell) + 1):
+                bucket = self._grid.get((page_number, column, row))
+                if bucket is not None:
+                    candidates.update(bucket)
+        scored = []
+        for index in candidates:
+            gap = _distance(bbox, self.bbox(index))
+            if gap <= distance:
+                scored.append((gap, index))
+        return [index for _, index in sorted(scored)]
+
+    def within(self, page_number: int, bbox: BBox) -> List[int]:
+        """矩形の内側（一部でも重なる）にある単語のインデックス（テキスト順）"""
+        return sorted(
+            index for index in self.near(page_number, bbox, 0.0)
+            if self.x0[index] < bbox[2] and self.x1[index] > bbox[0]
+            and self.top[index] < bbox[3] and self.bottom[index] > bbox[1]
+        )
@@ -0,0 +1,93 @@
+"""
+チェック用プールのテスト
+同時実行数の上限を守り、ワーカーが異常終了しても原因の文書だけが失敗すること
+"""
+
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from src.check_pool import CheckPool, PoolFullError, check_pdf_path
+from src.result_cache import hash_file
+
+
+# ワーカーで実行する関数（pickleできるようにモジュールの最上位に置く）
+
+def _square(value: int, delay: float = 0.0) -> int:
+    time.sleep(delay)
+    return value * value
+
+
+def _crash(marker: str) -> None:
+    """実行のたびに marker に1行追記してからワーカーごと異常終了する"""
+    with open(marker, 'a') as file:
+        file.write('run\n')
+    os._exit(1)
+
+
+def _runs(marker) -> int:
+    return len(marker.read_text().splitlines()) if marker.exists() else 0
+
+
+def _wait_idle(pool: CheckPool, timeout: float = 10.0) -> None:
+    """完了したFutureのコールバックで枠が返されるまで待つ"""
+    deadline = time.monotonic() + timeout
+    while pool.in_flight and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def pool():
+    pool = CheckPool(workers=2, max_in_flight=2, cache_dir=None)
+    yield pool
+    pool.shutdown()
+
+
+def test_try_submit_raises_when_full(pool):
+    running = [pool.try_submit(_square, value, 0.5) for value in (2, 3)]
+
+    with pytest.raises(PoolFullError):
+        pool.try_submit(_square, 4)
+    assert pool.in_flight == 2
+
+    assert [future.result(timeout=30) for future in running] == [4, 9]
+    _wait_idle(pool)
+    assert pool.in_flight == 0
+    assert pool.try_submit(_square, 4).result(timeout=30) == 16
+
+
+def test_crash_fails_only_the_culprit(pool, tmp_path):
+    marker = tmp_path / 'crash.log'
+    bystander = pool.try_submit(_square, 5, 1.0)
+    time.sleep(0.2)  # 巻き込まれる文書を先に実行させる
+    culprit = pool.try_submit(_crash, str(marker))
+
+    with pytest.raises(BrokenProcessPool):
+        culprit.result(timeout=30)
+    assert bystander.result(timeout=30) == 25
+    # 原因の文書は専用のワーカーで1回だけ再実行される
+    assert _runs(marker) == 2
+
+    _wait_idle(pool)
+    assert pool.in_flight == 0
+    assert [pool.try_submit(_square, value).result(timeout=30) for value in (6, 7)] == [36, 49]
+
+
+def test_crash_without_retry(pool, tmp_path):
+    marker = tmp_path / 'crash.log'
+
+    with pytest.raises(BrokenProcessPool):
+        pool.try_submit(_crash, str(marker), retry=False).result(timeout=30)
+    assert _runs(marker) == 1
+    assert pool.submit(_square, 3).result(timeout=30) == 9
+
+
+def test_check_pdf_path_in_worker(pool, drawing_pdf):
+    pdf_path = drawing_pdf(pages=2, density=20, vectors=20)
+
+    results, summary, timings, file_hash = pool.try_submit(check_pdf_path, pdf_path).result(timeout=60)
+
+    assert file_hash == hash_file(pdf_path)
+    assert summary['total'] == len(results)
@@ -0,0 +1,109 @@
+"""
+ジョブストアのテスト
+複数のプロセスが同じジョブを取り出さず、処理していたプロセスが終了したジョブは待機中に戻ること
+"""
+
+import os
+import socket
+import stat
+import subprocess
+import sys
+
+import pytest
+
+from src.jobs import JobStatus, JobStore
+
+
+def _store(jobs_dir, owner_id: str) -> JobStore:
+    return JobStore(str(jobs_dir), owner_id=owner_id)
+
+
+def _create(store: JobStore, file_name: str):
+    return store.create(file_name, store.new_upload_path())
+
+
+def _dead_owner() -> str:
+    """このホストの終了したプロセスを所有者とするID"""
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return f"{socket.gethostname()}:{process.pid}:dead"
+
+
+def test_claims_are_exclusive(tmp_path):
+    first = _store(tmp_path / 'jobs', 'worker-a')
+    second = _store(tmp_path / 'jobs', 'worker-b')
+    jobs = [_create(first, f"{index}.pdf") for index in range(2)]
+
+    claimed_a = first.claim_next()
+    claimed_b = second.claim_next()
+
+    assert claimed_a.status == JobStatus.RUNNING
+    assert {claimed_a.job_id, claimed_b.job_id} == {job.job_id for job in jobs}
+    assert second.claim_next() is None
+    assert first.get(claimed_b.job_id).status == JobStatus.RUNNING
+
+
+def test_complete_and_fail_only_own_jobs(tmp_path):
+    first = _store(tmp_path / 'jobs', 'worker-a')
+    second = _store(tmp_path / 'jobs', 'worker-b')
+    _create(first, 'a.pdf')
+    job = first.claim_next()
+
+    second.complete(job.job_id, {'ok': True})
+    second.fail(job.job_id, 'error')
+    assert first.get(job.job_id).status == JobStatus.RUNNING
+
+    first.complete(job.job_id, {'ok': True})
+    done = first.get(job.job_id)
+    assert done.status == JobStatus.COMPLETED
+    assert done.result == {'ok': True}
+
+
+def test_requeues_stale_jobs_only(tmp_path):
+    worker = _store(tmp_path / 'jobs', 'worker-a')
+    _create(worker, 'a.pdf')
+    job = worker.claim_next()
+    watcher = _store(tmp_path / 'jobs', 'worker-b')
+
+    # 生存通知が新しいジョブはそのまま
+    assert watcher.requeue_abandoned(stale_after=3600) == 0
+    assert watcher.get(job.job_id).status == JobStatus.RUNNING
+    # 自分のジョブは戻さない
+    assert worker.requeue_abandoned(stale_after=0) == 0
+
+    assert watcher.requeue_abandoned(stale_after=0) == 1
+    requeued = watcher.get(job.job_id)
+    assert requeued.status == JobStatus.QUEUED
+    assert requeued.started_at is None
+
+    # 元の所有者の完了は反映されず、引き継いだプロセスが取り出せる
+    worker.complete(job.job_id, {'ok': True})
+    assert watcher.claim_next().job_id == job.job_id
+
+
+def test_requeues_jobs_of_dead_process(tmp_path):
+    dead = _store(tmp_path / 'jobs', _dead_owner())
+    _create(dead, 'a.pdf')
+    job = dead.claim_next()
+    dead.heartbeat()
+
+    watcher = _store(tmp_path / 'jobs', 'worker-b')
+
+    assert watcher.requeue_abandoned(stale_after=3600) == 1
+    assert watcher.get(job.job_id).status == JobStatus.QUEUED
+
+
+def test_directories_are_private(tmp_path):
+    store = _store(tmp_path / 'jobs', 'worker-a')
+
+    assert stat.S_IMODE(os.stat(store.jobs_dir).st_mode) == 0o700
+    assert stat.S_IMODE(os.stat(store.uploads_dir).st_mode) == 0o700
+
+
+def test_rejects_writable_directory(tmp_path):
+    jobs_dir = tmp_path / 'jobs'
+    jobs_dir.mkdir()
+    os.chmod(jobs_dir, 0o777)
+
+    with pytest.raises(PermissionError):
+        _store(jobs_dir, 'worker-a')
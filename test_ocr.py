@@ -0,0 +1,49 @@
+"""
+OCRのテスト
+テキストレイヤーのあるページはOCRせず、スキャン画像だけのページをOCRすること
+"""
+
+import pdfplumber
+
+from src.ocr import OcrEngine, StubBackend
+from src.pdf_parser import PDFParser
+
+
+STUB_TEXT = "図面番号: S-001 縮尺: 1/100 作成日: 2024年6月1日"
+
+
+def _parser() -> PDFParser:
+    return PDFParser(ocr=OcrEngine(StubBackend(STUB_TEXT)))
+
+
+def test_parse_ocrs_only_scanned_pages(drawing_pdf):
+    pdf_path = drawing_pdf(pages=3, density=20, vectors=20, scanned=1)
+    plain = PDFParser().parse(pdf_path)
+
+    drawing = _parser().parse(pdf_path)
+
+    assert drawing.metadata['ocr_pages'] == [3]
+    assert drawing.metadata['ocr_skipped'] == []
+    assert drawing.extracted_text[3] == STUB_TEXT
+    for page_number in (1, 2):
+        assert drawing.extracted_text[page_number] == plain.extracted_text[page_number]
+        assert not drawing.pages[page_number - 1].ocr
+    assert drawing.pages[2].ocr
+
+
+def test_iter_pages_ocrs_only_scanned_pages(drawing_pdf):
+    pdf_path = drawing_pdf(pages=3, density=20, vectors=20, scanned=2)
+
+    pages = list(_parser().iter_pages(pdf_path))
+
+    assert [page.ocr for page in pages] == [False, True, True]
+    assert pages[0].text != STUB_TEXT
+    assert [page.text for page in pages[1:]] == [STUB_TEXT, STUB_TEXT]
+
+
+def test_text_pages_are_not_candidates(drawing_pdf):
+    engine = OcrEngine(StubBackend(STUB_TEXT))
+    with pdfplumber.open(drawing_pdf(pages=2, density=20, vectors=20, scanned=1)) as pdf:
+        text_page, scanned_page = pdf.pages
+        assert engine.candidate(text_page, text_page.extract_text() or "") is None
+        assert engine.candidate(scanned_page, scanned_page.extract_text() or "") is not None
@@ -0,0 +1,85 @@
+"""
+解析結果キャッシュのテスト
+ディスクの上限を超えたら最終利用時刻の古い順に削除し、ディレクトリは自分だけが使えること
+"""
+
+import os
+import stat
+
+from src.result_cache import ResultCache
+
+
+VALUE = b'x' * 1000
+
+
+def _mode(path) -> int:
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache_dir = tmp_path / 'cache'
+    cache = ResultCache(str(cache_dir), max_memory_items=1)
+    for index, key in enumerate(('a', 'b', 'c')):
+        cache.put(key, VALUE)
+        os.utime(cache_dir / f"{key}.pkl", (100 + index, 100 + index))
+    size = (cache_dir / 'a.pkl').stat().st_size
+
+    # ディスクから読んだエントリは最終利用時刻が更新される
+    assert ResultCache(str(cache_dir), max_memory_items=1).get('a') == VALUE
+
+    cache = ResultCache(str(cache_dir), max_memory_items=1, max_disk_bytes=int(size * 3.5))
+    cache.put('d', VALUE)
+
+    assert sorted(path.stem for path in cache_dir.glob('*.pkl')) == ['a', 'c', 'd']
+    assert cache._disk_bytes == size * 3
+
+
+def test_accounts_writes_without_rescanning(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache'), max_disk_bytes=10 ** 6)
+    cache.put('a', VALUE)
+    size = cache._disk_bytes
+
+    cache.put('b', VALUE)
+    cache.put('a', VALUE)  # 上書きは元のファイルとの差だけ足す
+
+    assert cache._disk_bytes == size * 2
+
+
+def test_creates_private_directory(tmp_path):
+    cache_dir = tmp_path / 'nested' / 'cache'
+    ResultCache(str(cache_dir))
+
+    assert _mode(cache_dir) == 0o700
+
+
+def test_tightens_readable_directory(tmp_path):
+    cache_dir = tmp_path / 'cache'
+    cache_dir.mkdir(mode=0o755)
+    os.chmod(cache_dir, 0o755)
+
+    cache = ResultCache(str(cache_dir))
+
+    assert cache.cache_dir == cache_dir
+    assert _mode(cache_dir) == 0o700
+
+
+def test_writable_directory_falls_back_to_memory(tmp_path):
+    cache_dir = tmp_path / 'cache'
+    cache_dir.mkdir()
+    os.chmod(cache_dir, 0o777)
+
+    cache = ResultCache(str(cache_dir))
+    cache.put('a', VALUE)
+
+    assert cache.cache_dir is None
+    assert cache.get('a') == VALUE
+    assert list(cache_dir.iterdir()) == []
+
+
+def test_failed_write_removes_temp_file(tmp_path):
+    cache_dir = tmp_path / 'cache'
+    cache = ResultCache(str(cache_dir))
+
+    cache.put('a', lambda: None)  # pickleできない値
+
+    assert list(cache_dir.iterdir()) == []
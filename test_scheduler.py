@@ -0,0 +1,87 @@
+"""
+ルールスケジューラのテスト
+前提ルールを先に判定し、前提ルールに指摘があれば依存するルールは判定も走査もしないこと
+"""
+
+from src.rule_matcher import Rule, RuleMatcher
+from src.rule_registry import _parse_rule
+from src.scheduler import RuleScheduler
+
+
+def _rule(rule_id: str, *requires: str):
+    return _parse_rule({
+        'id': rule_id,
+        'importance': '必須',
+        'patterns': [rule_id],
+        'missing': {'status': 'NG', 'message': f"{rule_id}がありません"},
+        'requires': list(requires),
+    })
+
+
+# c -> b -> a の依存と、前提ルールのない d（定義順は依存の順と逆）
+RULES = [_rule('c', 'b'), _rule('a'), _rule('b', 'a'), _rule('d')]
+
+
+def _ids(waves):
+    return [[rule.rule_id for rule in wave] for wave in waves]
+
+
+def test_waves_order_prerequisites_first():
+    scheduler = RuleScheduler(RULES)
+
+    assert _ids(scheduler.waves()) == [['a', 'd'], ['b'], ['c']]
+
+
+def test_waves_include_prerequisites_of_selected_rules():
+    scheduler = RuleScheduler(RULES)
+
+    assert _ids(scheduler.waves(['c'])) == [['a'], ['b'], ['c']]
+    assert _ids(scheduler.waves(['d'])) == [['d']]
+
+
+def test_prerequisite_outside_ruleset_is_satisfied():
+    scheduler = RuleScheduler([_rule('e', 'missing'), _rule('a')])
+
+    assert _ids(scheduler.waves()) == [['e', 'a']]
+
+
+def test_run_evaluates_every_wave_without_findings():
+    prepared = []
+    run = RuleScheduler(RULES).run(lambda rule: None,
+                                   prepare=lambda wave: prepared.append([rule.rule_id for rule in wave]))
+
+    assert list(run.results) == ['a', 'd', 'b', 'c']
+    assert run.skipped == {}
+    assert prepared == [['a', 'd'], ['b'], ['c']]
+
+
+def test_run_skips_rules_behind_a_finding():
+    prepared = []
+    evaluated = []
+
+    def evaluate(rule):
+        evaluated.append(rule.rule_id)
+        return 'finding' if rule.rule_id == 'a' else None
+
+    run = RuleScheduler(RULES).run(evaluate,
+                                   prepare=lambda wave: prepared.append([rule.rule_id for rule in wave]))
+
+    assert evaluated == ['a', 'd']
+    assert run.results == {'a': 'finding', 'd': None}
+    # 判定しなかったルールも、それに依存するルールを止める
+    assert run.skipped == {'b': ('a',), 'c': ('b',)}
+    # 判定しない段は準備（走査）しない
+    assert prepared == [['a', 'd']]
+
+
+def test_scan_only_selected_rules():
+    matcher = RuleMatcher([
+        Rule('scale', (r'縮尺',)),
+        Rule('date', (r'作成日',)),
+        Rule('number', (r'\d+\s*mm',)),  # キーワードのないパターン
+    ])
+    text = "縮尺: 1/100 作成日: 2024年6月1日 寸法 150mm"
+
+    assert set(matcher.scan(text).hits) == {'scale', 'date', 'number'}
+    assert set(matcher.scan(text, rule_ids={'scale'}).hits) == {'scale'}
+    assert set(matcher.scan(text, rule_ids={'number'}).hits) == {'number'}